@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Batched post mutations
+Applies a list of create / update / reschedule / delete operations to the
+stored posts in one pass, so a whole calendar edit is validated together and
+committed with a single write by the post store or the running scheduler
+"""
+
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from post_store import new_post_id, parse_schedule_time
+from slot_allocator import SlotConflict
+
+OPERATIONS = ('create', 'update', 'reschedule', 'delete')
+UPDATE_FIELDS = ('topic', 'content')
+PENDING_STATUSES = ('scheduled', 'retrying')
+
+
+def apply_operations(posts: List[Dict], operations: List[Dict], allocator, now: datetime = None,
+                     id_prefix: str = 'batch_post') -> Tuple[List[Dict], List[Dict]]:
+    """
+    Apply operations in order to a copy of posts
+
+    Later operations see the effect of earlier ones; a failed operation
+    changes nothing. allocator must index posts and is updated in place, so
+    callers that may discard the result should pass a throwaway one.
+
+    Returns:
+        tuple: (the updated posts, one result per operation with 'index', 'op',
+                'ok', 'post_id' and either 'schedule_time' or 'error')
+    """
+    now = now or datetime.now()
+    posts = [dict(post) for post in posts]
+    by_id = {post['id']: post for post in posts}
+    results = []
+
+    for index, operation in enumerate(operations):
+        op = operation.get('op') if isinstance(operation, dict) else None
+        result = {'index': index, 'op': op, 'ok': False, 'post_id': None}
+        results.append(result)
+        try:
+            if op not in OPERATIONS:
+                raise ValueError(f"Unknown operation: {op}")
+
+            if op == 'create':
+                post = _create(operation, allocator, now, new_post_id(id_prefix))
+                posts.append(post)
+                by_id[post['id']] = post
+            else:
+                post_id = operation.get('post_id')
+                post = by_id.get(post_id)
+                if post is None:
+                    raise ValueError(f"Post {post_id} not found")
+                if op == 'update':
+                    _update(post, operation)
+                elif op == 'reschedule':
+                    _reschedule(post, operation, allocator, now)
+                else:
+                    posts.remove(post)
+                    del by_id[post_id]
+                    allocator.release(post_id)
+
+            result['ok'] = True
+            result['post_id'] = post['id']
+            if op in ('create', 'reschedule'):
+                result['schedule_time'] = post['schedule_time']
+        except (KeyError, TypeError, ValueError) as e:
+            # SlotConflict is a ValueError
+            result['post_id'] = operation.get('post_id') if isinstance(operation, dict) else None
+            result['error'] = f"Missing field {e}" if isinstance(e, KeyError) else str(e)
+
+    return posts, results
+
+
+def _future_time(schedule_time, now: datetime) -> datetime:
+    when = parse_schedule_time(schedule_time, now)
+    if when <= now:
+        raise ValueError(f"Schedule time {schedule_time} is in the past!")
+    return when
+
+
+def _create(operation: Dict, allocator, now: datetime, post_id: str) -> Dict:
+    topic = (operation.get('topic') or '').strip()
+    if not topic:
+        raise ValueError("Missing topic")
+    account = operation.get('account') or None
+    when = allocator.place(_future_time(operation['schedule_time'], now), account, not_before=now)
+    allocator.reserve(post_id, when, account)
+
+    post = {
+        'id': post_id,
+        'topic': topic,
+        'schedule_time': when.isoformat(),
+        'content': operation.get('content') or None,
+        'status': 'scheduled'
+    }
+    if account:
+        post['account'] = account
+    return post
+
+
+def _update(post: Dict, operation: Dict):
+    if post['status'] not in PENDING_STATUSES:
+        raise ValueError(f"Post {post['id']} is {post['status']}; only pending posts can be edited")
+    changes = {field: operation[field] for field in UPDATE_FIELDS if field in operation}
+    if not changes:
+        raise ValueError(f"Nothing to update; give one of {', '.join(UPDATE_FIELDS)}")
+    if 'topic' in changes and not (changes['topic'] or '').strip():
+        raise ValueError("Topic cannot be empty")
+    post.update(changes)
+
+
+def _reschedule(post: Dict, operation: Dict, allocator, now: datetime):
+    when = _future_time(operation['schedule_time'], now)
+    account = post.get('account')
+    # Free the post's own slot so it does not conflict with itself
+    released = allocator.release(post['id'])
+    try:
+        when = allocator.place(when, account, not_before=now)
+    except SlotConflict:
+        if released is not None:
+            allocator.reserve(post['id'], released, account)
+        raise
+    allocator.reserve(post['id'], when, account)
+
+    post['schedule_time'] = when.isoformat()
+    post['status'] = 'scheduled'
+    for key in ('completed_at', 'attempts', 'next_attempt_at', 'last_error'):
+        post.pop(key, None)
+
+
+def build_batch_report(results: List[Dict], committed: bool) -> Dict:
+    """Summary returned by every batch path"""
+    applied = sum(1 for result in results if result['ok'])
+    return {
+        'committed': committed,
+        'applied': applied if committed else 0,
+        'rejected': len(results) - applied,
+        'results': results
+    }
+
+
+def should_commit(results: List[Dict], allow_partial: bool = False, dry_run: bool = False) -> bool:
+    """Commit all-or-nothing unless allow_partial; never on a dry run or when nothing applied"""
+    applied = sum(1 for result in results if result['ok'])
+    return not dry_run and applied > 0 and (allow_partial or applied == len(results))
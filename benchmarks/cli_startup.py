@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the read-only schedule_post.py commands
+Fails (exit code 1) when heavy modules leak into the fast path or the
+median wall time goes over budget
+
+Usage:
+    python benchmarks/cli_startup.py [--runs 10] [--budget 0.3]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the read-only commands must never import
+HEAVY_MODULES = ['openai', 'apscheduler', 'dotenv', 'requests', 'django',
+                 'content_generator', 'linkedin_poster', 'custom_scheduler']
+
+PROBE = """
+import runpy, sys, io, contextlib
+sys.argv = ['schedule_post.py', {command!r}]
+with contextlib.redirect_stdout(io.StringIO()):
+    runpy.run_path('schedule_post.py', run_name='__main__')
+print(','.join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def leaked_modules(command):
+    """Run the command in a fresh interpreter and report heavy imports"""
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE.format(command=command, heavy=HEAVY_MODULES)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    output = result.stdout.strip()
+    return output.split(',') if output else []
+
+
+def time_command(command, runs):
+    """Median wall time of `python schedule_post.py <command>` over several runs"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, 'schedule_post.py', command], cwd=ROOT,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def time_command_baseline(runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark read-only CLI startup')
+    parser.add_argument('--runs', type=int, default=10, help='Runs per command')
+    parser.add_argument('--budget', type=float, default=0.3, help='Median seconds allowed per command')
+    parser.add_argument('--commands', nargs='+', default=['list'], help='Commands to measure')
+    args = parser.parse_args()
+
+    baseline = time_command_baseline(args.runs)
+    print(f"[INFO] Bare interpreter startup: {baseline * 1000:.0f} ms")
+
+    failed = False
+    for command in args.commands:
+        leaked = leaked_modules(command)
+        median = time_command(command, args.runs)
+        print(f"[INFO] schedule_post.py {command}: {median * 1000:.0f} ms median over {args.runs} runs")
+
+        if leaked:
+            print(f"[ERROR] '{command}' imported heavy modules: {', '.join(leaked)}")
+            failed = True
+        if median > args.budget:
+            print(f"[ERROR] '{command}' exceeded the {args.budget * 1000:.0f} ms budget")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+    print("[SUCCESS] Read-only commands are within budget")
+
+
+if __name__ == "__main__":
+    main()
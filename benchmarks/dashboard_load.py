@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Dashboard load test
+Starts the Django dashboard on a free local port against a throwaway database
+and a synthetic posts store (live file plus archive), then drives the real
+endpoints - the home page, /api/posts/, /api/stats/, history and the mutation
+APIs - from concurrent clients and reports throughput and p50/p95/p99 latency
+per endpoint. Nothing outside the temporary directory is read or written, so
+it can run in CI and before/after a dashboard change.
+
+Usage:
+    python benchmarks/dashboard_load.py --posts 5000 --archived 20000 --duration 30 --concurrency 16
+    python benchmarks/dashboard_load.py --posts 2000 --duration 10 --mutation-share 0.2 --p95-budget 500
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.cookies import SimpleCookie
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DJANGO_DIR = os.path.join(ROOT, 'linkedin_Scheduler')
+sys.path.insert(0, ROOT)
+
+from post_archive import PostArchive, default_archive_dir
+
+FINISHED_STATUSES = ('completed', 'completed', 'completed', 'failed', 'expired', 'cancelled')
+
+# Relative weight of each read endpoint; mutations take --mutation-share on top
+READ_MIX = (
+    ('home', 1),
+    ('posts', 6),
+    ('stats', 4),
+    ('history', 2),
+)
+MUTATIONS = ('batch', 'reschedule')
+# Part of the SlotConflict message a rejected reschedule answers with
+SLOT_CONFLICT_MARK = 'nearest free slot'
+
+
+def make_store(posts_file, live, archived, seed, accounts=3):
+    """
+    Write a synthetic live posts file and archive
+
+    Returns:
+        list: ids of the pending posts, which the mutation clients reschedule
+    """
+    rng = random.Random(seed)
+    now = datetime.now().replace(second=0, microsecond=0)
+    posts = []
+    for i in range(live):
+        posts.append({
+            'id': f"load_post_{i}",
+            'topic': f"Load test topic {i}",
+            'schedule_time': (now + timedelta(minutes=rng.randint(60, 60 * 24 * 60))).isoformat(),
+            'content': f"Prepared content {i}" if rng.random() < 0.5 else None,
+            'status': 'scheduled',
+            'account': f"account_{i % accounts}",
+            'created_at': now.isoformat()
+        })
+    with open(posts_file, 'w', encoding='utf-8') as f:
+        json.dump(posts, f)
+
+    finished = []
+    for i in range(archived):
+        when = now - timedelta(minutes=rng.randint(60, 60 * 24 * 365))
+        finished.append({
+            'id': f"load_archived_{i}",
+            'topic': f"Archived topic {i}",
+            'schedule_time': when.isoformat(),
+            'content': f"Published content {i}",
+            'status': rng.choice(FINISHED_STATUSES),
+            'completed_at': (when + timedelta(seconds=rng.randint(5, 120))).isoformat()
+        })
+    if finished:
+        PostArchive(default_archive_dir(posts_file)).archive(finished)
+    return [post['id'] for post in posts]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def start_server(work_dir, port, timeout=60):
+    """Migrate a fresh database and start runserver; returns the process once it answers"""
+    env = dict(os.environ,
+               LINKEDIN_POSTS_FILE=os.path.join(work_dir, 'scheduled_posts.json'),
+               DASHBOARD_DB_PATH=os.path.join(work_dir, 'db.sqlite3'),
+               PYTHONUNBUFFERED='1')
+    manage = [sys.executable, os.path.join(DJANGO_DIR, 'manage.py')]
+    log = open(os.path.join(work_dir, 'server.log'), 'w', encoding='utf-8')
+    subprocess.run(manage + ['migrate', '--noinput'], cwd=DJANGO_DIR, env=env,
+                   stdout=log, stderr=subprocess.STDOUT, check=True)
+    server = subprocess.Popen(manage + ['runserver', f"127.0.0.1:{port}", '--noreload'],
+                              cwd=DJANGO_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Dashboard exited with code {server.returncode}; see {log.name}")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"Dashboard did not start within {timeout}s; see {log.name}")
+
+
+def stop_server(server):
+    server.terminate()
+    try:
+        server.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+class _Client:
+    """One keep-alive connection with the session's CSRF cookie and the last /api/posts/ ETag"""
+
+    def __init__(self, port, rng, post_ids, mutation_share):
+        self.port = port
+        self.rng = rng
+        self.post_ids = post_ids
+        self.mutation_share = mutation_share
+        self.connection = None
+        self.csrf_token = None
+        self.etag = None
+        self.reads = [name for name, weight in READ_MIX for _ in range(weight)]
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if self.csrf_token:
+            headers['Cookie'] = f"csrftoken={self.csrf_token}"
+            headers['X-CSRFToken'] = self.csrf_token
+        if body is not None:
+            body = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        for attempt in (1, 2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                payload = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                # The development server may close idle keep-alive connections
+                self.connection.close()
+                self.connection = None
+                if attempt == 2:
+                    raise
+        if response.getheader('Connection', '').lower() == 'close':
+            self.connection.close()
+            self.connection = None
+        return response, payload
+
+    def login(self):
+        """GET / once for the CSRF cookie the mutation APIs require"""
+        response, _ = self.request('GET', '/')
+        cookie = SimpleCookie()
+        for header in response.headers.get_all('Set-Cookie') or []:
+            cookie.load(header)
+        if 'csrftoken' in cookie:
+            self.csrf_token = cookie['csrftoken'].value
+
+    def next_call(self):
+        """Pick an endpoint; returns (name, ok)"""
+        if self.rng.random() < self.mutation_share:
+            name = self.rng.choice(MUTATIONS)
+        else:
+            name = self.rng.choice(self.reads)
+        return name, getattr(self, f"_call_{name}")()
+
+    def _new_time(self):
+        when = datetime.now() + timedelta(days=self.rng.randint(2, 90), minutes=self.rng.randint(0, 1439))
+        return when.strftime('%Y-%m-%d %H:%M')
+
+    def _call_home(self):
+        response, _ = self.request('GET', '/')
+        return response.status == 200
+
+    def _call_posts(self):
+        headers = {'If-None-Match': self.etag} if self.etag else {}
+        response, _ = self.request('GET', '/api/posts/', headers=headers)
+        if response.status == 200:
+            self.etag = response.getheader('ETag')
+        return response.status in (200, 304)
+
+    def _call_stats(self):
+        response, _ = self.request('GET', '/api/stats/')
+        return response.status == 200
+
+    def _call_history(self):
+        response, _ = self.request('GET', '/api/posts/?history=1')
+        return response.status == 200
+
+    def _call_batch(self):
+        operations = [{'op': 'reschedule', 'post_id': post_id, 'schedule_time': self._new_time()}
+                      for post_id in self.rng.sample(self.post_ids, min(5, len(self.post_ids)))]
+        response, payload = self.request('POST', '/api/batch/', {'operations': operations, 'allow_partial': True})
+        # A slot conflict rejects single operations; the request itself still succeeded
+        return response.status == 200 and json.loads(payload).get('committed', False)
+
+    def _call_reschedule(self):
+        body = {'post_id': self.rng.choice(self.post_ids), 'new_time': self._new_time()}
+        response, payload = self.request('POST', '/api/reschedule-post/', body)
+        if response.status != 200:
+            return False
+        result = json.loads(payload)
+        # A random time may land too close to another post; that answer is still a success
+        return result.get('success', False) or SLOT_CONFLICT_MARK in result.get('error', '')
+
+
+def _drive(client, until, samples, lock):
+    local = []
+    while time.monotonic() < until:
+        started = time.perf_counter()
+        try:
+            name, ok = client.next_call()
+        except Exception:
+            name, ok = 'connection', False
+        local.append((name, time.perf_counter() - started, ok))
+    with lock:
+        samples.extend(local)
+
+
+def run_load_test(posts=2000, archived=10000, duration=15, concurrency=8, mutation_share=0.05,
+                  warmup=3, seed=42, keep=False):
+    """
+    Start the dashboard, drive it for duration seconds and return the report
+
+    Returns:
+        dict: per-endpoint counts, errors and latency percentiles (ms), overall throughput
+    """
+    work_dir = tempfile.mkdtemp(prefix='dashboard-load-')
+    server = None
+    try:
+        post_ids = make_store(os.path.join(work_dir, 'scheduled_posts.json'), posts, archived, seed)
+        port = _free_port()
+        server = start_server(work_dir, port)
+
+        clients = [_Client(port, random.Random(f"{seed}:{i}"), post_ids, mutation_share)
+                   for i in range(concurrency)]
+        # The first request imports the store into the database; keep it out of the numbers
+        started = time.perf_counter()
+        clients[0].login()
+        first_request = time.perf_counter() - started
+        for client in clients[1:]:
+            client.login()
+        if warmup:
+            _run_clients(clients, warmup, [])
+
+        samples = []
+        wall_started = time.perf_counter()
+        _run_clients(clients, duration, samples)
+        wall_seconds = time.perf_counter() - wall_started
+
+        endpoints = {}
+        for name in sorted({sample[0] for sample in samples}):
+            latencies = [sample[1] * 1000 for sample in samples if sample[0] == name]
+            endpoints[name] = {
+                'requests': len(latencies),
+                'errors': sum(1 for sample in samples if sample[0] == name and not sample[2]),
+                'p50_ms': round(_percentile(latencies, 50), 1),
+                'p95_ms': round(_percentile(latencies, 95), 1),
+                'p99_ms': round(_percentile(latencies, 99), 1),
+                'max_ms': round(max(latencies), 1),
+            }
+        latencies = [sample[1] * 1000 for sample in samples]
+        errors = sum(1 for sample in samples if not sample[2])
+
+        return {
+            'posts': posts,
+            'archived': archived,
+            'concurrency': concurrency,
+            'duration_seconds': round(wall_seconds, 2),
+            'first_request_ms': round(first_request * 1000, 1),
+            'requests': len(samples),
+            'errors': errors,
+            'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+            'requests_per_second': round(len(samples) / wall_seconds, 1) if wall_seconds else 0.0,
+            'p50_ms': round(_percentile(latencies, 50), 1),
+            'p95_ms': round(_percentile(latencies, 95), 1),
+            'p99_ms': round(_percentile(latencies, 99), 1),
+            'endpoints': endpoints,
+            'work_dir': work_dir if keep else None
+        }
+    finally:
+        if server is not None:
+            stop_server(server)
+        if not keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _run_clients(clients, seconds, samples):
+    lock = threading.Lock()
+    until = time.monotonic() + seconds
+    threads = [threading.Thread(target=_drive, args=(client, until, samples, lock), daemon=True)
+               for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def print_report(report):
+    print("\n[INFO] Dashboard Load Test Report")
+    print("=" * 50)
+    print(f"Store: {report['posts']} live posts, {report['archived']} archived")
+    print(f"Clients: {report['concurrency']} for {report['duration_seconds']}s "
+          f"(first request {report['first_request_ms']} ms)")
+    print(f"Requests: {report['requests']} ({report['requests_per_second']} req/s), "
+          f"errors {report['errors']}")
+    print(f"Latency: p50 {report['p50_ms']} ms, p95 {report['p95_ms']} ms, p99 {report['p99_ms']} ms")
+    print(f"\n{'endpoint':<12}{'requests':>10}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, stats in report['endpoints'].items():
+        print(f"{name:<12}{stats['requests']:>10}{stats['errors']:>8}{stats['p50_ms']:>10}"
+              f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['max_ms']:>10}")
+    if report['work_dir']:
+        print(f"\nFiles kept in: {report['work_dir']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the dashboard against a synthetic posts store')
+    parser.add_argument('--posts', type=int, default=2000, help='Pending posts in the live file')
+    parser.add_argument('--archived', type=int, default=10000, help='Finished posts in the archive')
+    parser.add_argument('--duration', type=float, default=15, help='Seconds of measured load')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients')
+    parser.add_argument('--mutation-share', type=float, default=0.05,
+                        help='Share of requests that reschedule posts (batch and single)')
+    parser.add_argument('--warmup', type=float, default=3, help='Unmeasured seconds of load first')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--p95-budget', type=float, help='Fail if the overall p95 exceeds this many ms')
+    parser.add_argument('--max-error-rate', type=float, default=0.0, help='Fail above this share of errors')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    parser.add_argument('--keep', action='store_true', help='Keep the store, database and server log')
+    args = parser.parse_args()
+
+    print(f"[INFO] Load testing the dashboard with {args.concurrency} clients for {args.duration:g}s...")
+    report = run_load_test(args.posts, args.archived, args.duration, args.concurrency, args.mutation_share,
+                           args.warmup, args.seed, args.keep)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    failed = False
+    if report['error_rate'] > args.max_error_rate:
+        print(f"[ERROR] Error rate {report['error_rate']:.2%} is above {args.max_error_rate:.2%}")
+        failed = True
+    if args.p95_budget is not None and report['p95_ms'] > args.p95_budget:
+        print(f"[ERROR] p95 {report['p95_ms']} ms is over the {args.p95_budget:g} ms budget")
+        failed = True
+    if not failed:
+        print("[SUCCESS] Within budget")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Accelerated-time scheduler simulation
+Replays a synthetic queue of posts through CustomPostScheduler on a
+SimulatedClock with fake content generation and publishing, then reports fire
+lag, throughput, retries and missed posts. Runs in a throwaway directory, so
+scheduler changes can be benchmarked reproducibly without real time passing
+or any API being called.
+
+Usage:
+    python benchmarks/scheduler_simulation.py --posts 2000 --days 30
+    python benchmarks/scheduler_simulation.py --posts 5000 --days 7 --step 60 --failure-rate 0.05
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from clock import SimulatedClock
+
+DEFAULT_START = datetime(2030, 1, 7, 0, 0)
+
+
+class FakeContentGenerator:
+    """Stands in for ContentGenerator; fails generation at the given rate"""
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+
+    def generate_post(self, topic):
+        if self.outcomes.fails(topic, 'generation'):
+            return None
+        return {'topic': topic, 'content': f"Simulated post about {topic}", 'hashtags': []}
+
+
+class FakeLinkedInPoster:
+    """Stands in for LinkedInPoster; failures are mostly transient (503), some permanent (400)"""
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+
+    def post_content(self, content_data):
+        topic = content_data['topic']
+        if self.outcomes.fails(topic, 'publish'):
+            status = '400' if self.outcomes.permanent(topic) else '503'
+            content_data['publish_statuses'] = [status]
+            return False
+        content_data['publish_statuses'] = ['201']
+        content_data['publish_path'] = 'simulated'
+        return True
+
+
+class _Outcomes:
+    """
+    Deterministic failure decisions: the nth call for a topic at a stage
+    fails or not depending only on the seed, not on thread scheduling
+    """
+
+    def __init__(self, seed, failure_rate, permanent_share=0.2):
+        self.seed = seed
+        self.failure_rate = failure_rate
+        self.permanent_share = permanent_share
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def fails(self, topic, stage):
+        with self._lock:
+            n = self._calls.get((topic, stage), 0)
+            self._calls[(topic, stage)] = n + 1
+        return random.Random(f"{self.seed}:{stage}:{topic}:{n}").random() < self.failure_rate
+
+    def permanent(self, topic):
+        return random.Random(f"{self.seed}:permanent:{topic}").random() < self.permanent_share
+
+
+def make_posts(count, start, days, seed, content_share=0.5, accounts=3):
+    """Synthetic posts spread uniformly over the simulated window"""
+    rng = random.Random(seed)
+    span = int(days * 86400)
+    posts = []
+    for i in range(count):
+        schedule_time = start + timedelta(seconds=rng.randint(60, span))
+        posts.append({
+            'id': f"sim_post_{i}",
+            'topic': f"Simulated topic {i}",
+            'schedule_time': schedule_time.isoformat(),
+            'content': f"Prepared content {i}" if rng.random() < content_share else None,
+            'status': 'scheduled',
+            'account': f"account_{i % accounts}",
+            'created_at': start.isoformat()
+        })
+    return posts
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _wait_idle(scheduler, timeout=60):
+    """Block until every dispatched job has finished (the clock is frozen meanwhile)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        pool = scheduler.worker_pool.snapshot()
+        if pool['jobs_waiting'] == 0 and pool['jobs_running'] == 0:
+            return True
+        time.sleep(0.001)
+    return False
+
+
+def run_simulation(posts=2000, days=30, step=30, failure_rate=0.02, seed=42, start=DEFAULT_START,
+                   scheduler_overrides=None, verbose=False, keep=False):
+    """
+    Run one simulation and return its report
+
+    Args:
+        step (float): simulated seconds per wheel turn; fire lag is bounded by it
+        scheduler_overrides (dict): extra 'scheduler' config keys
+
+    Returns:
+        dict: counts by outcome, fire lag percentiles and timing
+    """
+    # Imported here so the module can be inspected without the scheduler's dependencies
+    from custom_scheduler import CustomPostScheduler, TERMINAL_STATUSES
+
+    work_dir = tempfile.mkdtemp(prefix='scheduler-sim-')
+    original_dir = os.getcwd()
+    config = {
+        'core': 'wheel',
+        'metrics_port': 0,
+        'recurring_enabled': False,
+        'slot_policy': 'off',
+        'retry_jitter': 0,  # keep retry times reproducible
+        'lease_path': os.path.join(work_dir, 'leases.db'),
+        'log_dir': os.path.join(work_dir, 'logs')
+    }
+    config.update(scheduler_overrides or {})
+
+    lags = []
+    missed = []
+    clock = SimulatedClock(start)
+    outcomes = _Outcomes(seed, failure_rate)
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+    try:
+        os.chdir(work_dir)
+        with open('config.json', 'w', encoding='utf-8') as f:
+            json.dump({'scheduler': config}, f, indent=2)
+        with open('scheduled_posts.json', 'w', encoding='utf-8') as f:
+            json.dump(make_posts(posts, start, days, seed), f)
+
+        wall_started = time.perf_counter()
+        with output:
+            scheduler = CustomPostScheduler(clock=clock)
+            scheduler.content_generator = FakeContentGenerator(outcomes)
+            scheduler.linkedin_poster = FakeLinkedInPoster(outcomes)
+
+            wheel = scheduler.scheduler
+            record_submission = wheel.on_submit
+            wheel.on_submit = lambda job_id, lag: (lags.append(lag), record_submission(job_id, lag))
+            wheel.on_missed = missed.append
+            wheel.start(ticker=False)
+
+            # Run past the last post long enough for its retries to play out
+            end = start + timedelta(days=days) + timedelta(seconds=scheduler.config['retry_max_delay'] * 2)
+            next_housekeeping = clock.now()
+            while clock.now() < end:
+                clock.advance(step)
+                wheel.run_due()
+                _wait_idle(scheduler)
+                if clock.now() >= next_housekeeping:
+                    scheduler._arm_due_posts()
+                    scheduler._archive_finished_posts()
+                    next_housekeeping = clock.now() + timedelta(hours=1)
+
+            wheel.shutdown(wait=True)
+            scheduler.log_writer.close()
+        wall_seconds = time.perf_counter() - wall_started
+
+        statuses = {}
+        for post in scheduler.scheduled_posts:
+            statuses[post['status']] = statuses.get(post['status'], 0) + 1
+        for status, count in scheduler.archive.counts().items():
+            statuses[status] = statuses.get(status, 0) + count
+        never_ran = sum(count for status, count in statuses.items() if status not in TERMINAL_STATUSES)
+
+        return {
+            'posts': posts,
+            'simulated_days': round((end - start).total_seconds() / 86400, 2),
+            'step_seconds': step,
+            'statuses': dict(sorted(statuses.items())),
+            'jobs_fired': len(lags),
+            'missed_run_time': len(missed),
+            'never_ran': never_ran,
+            'lag_p50': round(_percentile(lags, 50), 2),
+            'lag_p95': round(_percentile(lags, 95), 2),
+            'lag_max': round(max(lags, default=0.0), 2),
+            'wall_seconds': round(wall_seconds, 2),
+            'jobs_per_second': round(len(lags) / wall_seconds, 1) if wall_seconds else 0.0,
+            'speedup': round((end - start).total_seconds() / wall_seconds) if wall_seconds else 0,
+            'work_dir': work_dir if keep else None
+        }
+    finally:
+        os.chdir(original_dir)
+        if not keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def print_report(report):
+    print("\n[INFO] Scheduler Simulation Report")
+    print("=" * 50)
+    print(f"Posts: {report['posts']} over {report['simulated_days']} simulated days "
+          f"(step {report['step_seconds']}s)")
+    print(f"Outcomes: " + ", ".join(f"{status} {count}" for status, count in report['statuses'].items()))
+    print(f"Jobs fired: {report['jobs_fired']} (retries included)")
+    print(f"Fire lag: p50 {report['lag_p50']}s, p95 {report['lag_p95']}s, max {report['lag_max']}s")
+    print(f"Wall time: {report['wall_seconds']}s ({report['jobs_per_second']} jobs/s, "
+          f"{report['speedup']}x real time)")
+    if report['work_dir']:
+        print(f"Files kept in: {report['work_dir']}")
+
+    if report['missed_run_time'] or report['never_ran']:
+        print(f"[WARNING] Missed posts: {report['missed_run_time']} past misfire grace, "
+              f"{report['never_ran']} never ran")
+    else:
+        print("[SUCCESS] No missed posts")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay scheduled posts through the scheduler at accelerated time')
+    parser.add_argument('--posts', type=int, default=2000, help='Number of synthetic posts')
+    parser.add_argument('--days', type=float, default=30, help='Simulated days the posts are spread over')
+    parser.add_argument('--step', type=float, default=30, help='Simulated seconds per step')
+    parser.add_argument('--failure-rate', type=float, default=0.02, help='Share of generation/publish calls that fail')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--start', help="Simulated start time 'YYYY-MM-DD HH:MM' (default 2030-01-07 00:00)")
+    parser.add_argument('--config', action='append', default=[], metavar='KEY=VALUE',
+                        help="Override a scheduler config key (JSON value), e.g. misfire_grace_time=60")
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    parser.add_argument('--verbose', action='store_true', help='Show scheduler output')
+    parser.add_argument('--keep', action='store_true', help='Keep the simulation directory')
+    args = parser.parse_args()
+
+    overrides = {}
+    for item in args.config:
+        key, _, value = item.partition('=')
+        try:
+            overrides[key] = json.loads(value)
+        except ValueError:
+            overrides[key] = value
+
+    start = datetime.strptime(args.start, '%Y-%m-%d %H:%M') if args.start else DEFAULT_START
+    print(f"[INFO] Simulating {args.posts} posts over {args.days:g} days...")
+    report = run_simulation(args.posts, args.days, args.step, args.failure_rate, args.seed, start,
+                            overrides, args.verbose, args.keep)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 1 if report['missed_run_time'] or report['never_ran'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Bulk post import
+Parses CSV / JSONL content calendars and validates every row in one pass
+before anything is written to the post store
+"""
+
+import csv
+import json
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from post_store import new_post_id, parse_schedule_time
+from slot_allocator import SlotConflict
+
+TIME_FIELDS = ('time', 'schedule_time')
+
+
+def iter_rows(stream, fmt: str = 'csv') -> Iterator[Tuple[int, Dict]]:
+    """
+    Yield (line number, row) pairs from a CSV or JSONL stream
+
+    CSV needs a header row with 'topic' and 'time' (or 'schedule_time')
+    columns and optional 'content' / 'account' columns; JSONL has one object per line
+    with the same keys.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'jsonl':
+        for line_no, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, {'_error': f"Invalid JSON: {e.msg}"}
+    else:
+        raise ValueError(f"Unsupported bulk format: {fmt}")
+
+
+def validate_rows(rows: Iterable[Tuple[int, Dict]], now: datetime = None) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Check every row and normalize the valid ones
+
+    Returns:
+        tuple: (entries with topic / schedule_datetime / content / line,
+                errors as {'line': n, 'error': message})
+    """
+    now = now or datetime.now()
+    entries, errors = [], []
+
+    for line_no, row in rows:
+        if not isinstance(row, dict):
+            errors.append({'line': line_no, 'error': 'Row must be an object'})
+            continue
+        if '_error' in row:
+            errors.append({'line': line_no, 'error': row['_error']})
+            continue
+
+        topic = (row.get('topic') or '').strip()
+        schedule_time = next((row[field] for field in TIME_FIELDS if row.get(field)), None)
+        content = (row.get('content') or '').strip() or None
+        account = (row.get('account') or '').strip() or None
+
+        if not topic:
+            errors.append({'line': line_no, 'error': 'Missing topic'})
+            continue
+        if not schedule_time:
+            errors.append({'line': line_no, 'error': 'Missing time'})
+            continue
+
+        try:
+            schedule_datetime = parse_schedule_time(str(schedule_time).strip())
+        except ValueError as e:
+            errors.append({'line': line_no, 'error': str(e)})
+            continue
+
+        if schedule_datetime <= now:
+            errors.append({'line': line_no, 'error': f"Schedule time {schedule_time} is in the past"})
+            continue
+
+        entries.append({
+            'line': line_no,
+            'topic': topic,
+            'schedule_datetime': schedule_datetime,
+            'content': content,
+            'account': account
+        })
+
+    return entries, errors
+
+
+def allocate_slots(entries: List[Dict], allocator, now: datetime = None) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Apply the slot policy to validated entries, in file order
+
+    Each accepted entry holds a placeholder reservation ('slot_key') so later
+    rows are spaced from earlier ones; callers swap it for the real post id
+    with claim_slots() or drop it with release_slots().
+
+    Returns:
+        tuple: (entries that got a slot, errors for rows that conflicted)
+    """
+    now = now or datetime.now()
+    placed, errors = [], []
+    for entry in entries:
+        try:
+            when = allocator.place(entry['schedule_datetime'], entry['account'], not_before=now)
+        except SlotConflict as e:
+            errors.append({'line': entry['line'], 'error': str(e)})
+            continue
+        if when != entry['schedule_datetime']:
+            entry['shifted_from'] = entry['schedule_datetime']
+            entry['schedule_datetime'] = when
+        entry['slot_key'] = f"bulk_line_{entry['line']}"
+        allocator.reserve(entry['slot_key'], when, entry['account'])
+        placed.append(entry)
+    return placed, errors
+
+
+def claim_slots(entries: List[Dict], posts: List[Dict], allocator):
+    """Move placeholder reservations over to the created posts"""
+    for entry, post in zip(entries, posts):
+        allocator.release(entry['slot_key'])
+        allocator.reserve(post['id'], entry['schedule_datetime'], entry['account'])
+
+
+def release_slots(entries: List[Dict], allocator):
+    for entry in entries:
+        allocator.release(entry['slot_key'])
+
+
+def make_posts(entries: List[Dict], id_prefix: str = 'bulk_post') -> List[Dict]:
+    """Turn validated entries into store records with unique ids"""
+    posts = []
+    for entry in entries:
+        post = {
+            'id': new_post_id(id_prefix),
+            'topic': entry['topic'],
+            'schedule_time': entry['schedule_datetime'].isoformat(),
+            'content': entry['content'],
+            'status': 'scheduled'
+        }
+        if entry.get('account'):
+            post['account'] = entry['account']
+        posts.append(post)
+    return posts
+
+
+def build_report(entries: List[Dict], errors: List[Dict], posts: List[Dict], committed: bool) -> Dict:
+    """Summary returned by every bulk import path"""
+    return {
+        'committed': committed,
+        'accepted': len(posts) if committed else 0,
+        'valid': len(entries),
+        'rejected': len(errors),
+        'shifted': sum(1 for entry in entries if 'shifted_from' in entry),
+        'errors': sorted(errors, key=lambda error: error['line']),
+        'post_ids': [post['id'] for post in posts] if committed else []
+    }
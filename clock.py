@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Time source for the scheduler
+CustomPostScheduler and the timing wheel core read the current time through a
+Clock so simulations can substitute a SimulatedClock and replay weeks of
+scheduling in seconds
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+
+class Clock:
+    """The real wall clock"""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def time(self) -> float:
+        return time.time()
+
+
+class SimulatedClock(Clock):
+    """A clock that only moves when advance() or set() is called"""
+
+    def __init__(self, start: Optional[datetime] = None):
+        self._now = start or datetime.now()
+        self._lock = threading.Lock()
+
+    def now(self) -> datetime:
+        with self._lock:
+            return self._now
+
+    def time(self) -> float:
+        return self.now().timestamp()
+
+    def advance(self, seconds: float) -> datetime:
+        with self._lock:
+            self._now += timedelta(seconds=seconds)
+            return self._now
+
+    def set(self, when: datetime):
+        with self._lock:
+            if when < self._now:
+                raise ValueError("A simulated clock cannot move backwards")
+            self._now = when
+
+
+SYSTEM_CLOCK = Clock()
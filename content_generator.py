@@ -3,19 +3,46 @@ import json
 import random
 from typing import List, Dict, Optional
 import os
+import threading
+import time
 import requests
 from dotenv import load_dotenv
+from metrics import OPENAI_REQUEST_SECONDS, GENERATION_FALLBACK_TOTAL
 
 load_dotenv()
 
+# Seconds a whole generate_post call (text, hashtags and image) may take
+DEFAULT_GENERATION_TIMEOUT = 120
+
 class ContentGenerator:
-    def __init__(self):
+    def __init__(self, config_file: str = 'config.json', generation_timeout: float = DEFAULT_GENERATION_TIMEOUT):
         openai.api_key = os.getenv('OPENAI_API_KEY')
-        with open('config.json', 'r') as f:
+        with open(config_file, 'r') as f:
             self.config = json.load(f)
+        self.generation_timeout = generation_timeout
+        # Deadline of the current generate_post call; thread-local because
+        # one generator is shared by the generation workers
+        self._generation = threading.local()
+    
+    def _call_timeout(self) -> float:
+        """Seconds left for the next API call of the current generate_post call"""
+        deadline = getattr(self._generation, 'deadline', None)
+        if deadline is None:
+            return self.generation_timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"generation took longer than {self.generation_timeout}s")
+        return remaining
     
     def generate_post(self, topic: str = None, with_image: bool = None) -> Dict[str, str]:
         """Generate a LinkedIn post based on topic with optional image"""
+        self._generation.deadline = time.monotonic() + self.generation_timeout
+        try:
+            return self._generate_post(topic, with_image)
+        finally:
+            self._generation.deadline = None
+    
+    def _generate_post(self, topic: str = None, with_image: bool = None) -> Dict[str, str]:
         if not topic:
             topic = random.choice(self.config['content_topics'])
         
@@ -25,15 +52,17 @@ class ContentGenerator:
         prompt = self._create_prompt(topic)
         
         try:
-            response = openai.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a professional LinkedIn content creator."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=500,
-                temperature=0.7
-            )
+            with OPENAI_REQUEST_SECONDS.time(kind='chat'):
+                response = openai.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=[
+                        {"role": "system", "content": "You are a professional LinkedIn content creator."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=500,
+                    temperature=0.7,
+                    timeout=self._call_timeout()
+                )
             
             content = response.choices[0].message.content.strip()
             hashtags = self._generate_hashtags(topic, content) if self.config['include_hashtags'] else []
@@ -56,6 +85,7 @@ class ContentGenerator:
             
         except Exception as e:
             print(f"Error generating content: {e}")
+            GENERATION_FALLBACK_TOTAL.inc(kind='content')
             return self._fallback_content(topic)
     
     def _generate_image(self, topic: str, content: str) -> Optional[Dict[str, str]]:
@@ -66,13 +96,15 @@ class ContentGenerator:
             
             print(f"🎨 Generating image with prompt: {image_prompt[:100]}...")
             
-            response = openai.images.generate(
-                model="dall-e-3",
-                prompt=image_prompt,
-                size=self.config.get('image_size', "1024x1024"),
-                quality=self.config.get('image_quality', "standard"),
-                n=1
-            )
+            with OPENAI_REQUEST_SECONDS.time(kind='image'):
+                response = openai.images.generate(
+                    model="dall-e-3",
+                    prompt=image_prompt,
+                    size=self.config.get('image_size', "1024x1024"),
+                    quality=self.config.get('image_quality', "standard"),
+                    n=1,
+                    timeout=self._call_timeout()
+                )
             
             image_url = response.data[0].url
             
@@ -87,6 +119,7 @@ class ContentGenerator:
             
         except Exception as e:
             print(f"❌ Error generating image: {e}")
+            GENERATION_FALLBACK_TOTAL.inc(kind='image')
             return None
     
     def _create_image_prompt(self, topic: str, content: str) -> str:
@@ -129,7 +162,6 @@ class ContentGenerator:
             os.makedirs(images_dir, exist_ok=True)
             
             # Generate filename
-            import time
             timestamp = int(time.time())
             safe_topic = "".join(c for c in topic if c.isalnum() or c in (' ', '-', '_')).rstrip()
             safe_topic = safe_topic.replace(' ', '_')[:30]
@@ -137,7 +169,8 @@ class ContentGenerator:
             filepath = os.path.join(images_dir, filename)
             
             # Download image
-            response = requests.get(image_url, timeout=30)
+            with OPENAI_REQUEST_SECONDS.time(kind='image_download'):
+                response = requests.get(image_url, timeout=min(30, self._call_timeout()))
             response.raise_for_status()
             
             with open(filepath, 'wb') as f:
@@ -183,15 +216,17 @@ class ContentGenerator:
             - No explanations, just the hashtags
             """
             
-            response = openai.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a LinkedIn hashtag expert. Generate relevant professional hashtags."},
-                    {"role": "user", "content": hashtag_prompt}
-                ],
-                max_tokens=100,
-                temperature=0.5
-            )
+            with OPENAI_REQUEST_SECONDS.time(kind='hashtags'):
+                response = openai.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=[
+                        {"role": "system", "content": "You are a LinkedIn hashtag expert. Generate relevant professional hashtags."},
+                        {"role": "user", "content": hashtag_prompt}
+                    ],
+                    max_tokens=100,
+                    temperature=0.5,
+                    timeout=self._call_timeout()
+                )
             
             hashtags_text = response.choices[0].message.content.strip()
             hashtags = [tag.strip() for tag in hashtags_text.split('\n') if tag.strip().startswith('#')]
@@ -201,12 +236,14 @@ class ContentGenerator:
             
             # Fallback to static if not enough hashtags generated
             if len(hashtags) < 3:
+                GENERATION_FALLBACK_TOTAL.inc(kind='hashtags')
                 return self._get_static_hashtags(topic)
             
             return hashtags
             
         except Exception as e:
             print(f"Error generating hashtags with AI: {e}")
+            GENERATION_FALLBACK_TOTAL.inc(kind='hashtags')
             return self._get_static_hashtags(topic)
     
     def _get_static_hashtags(self, topic: str) -> List[str]:
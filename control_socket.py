@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Local control channel for the running scheduler
+The scheduler listens on a Unix domain socket next to the posts file; each
+request is one JSON line {"op": ..., ...} answered by one JSON line
+{"ok": true, "result": ...} or {"ok": false, "error": ...}
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from metrics import CONTROL_REQUEST_SECONDS
+
+SOCKET_NAME = 'scheduler.sock'
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+
+
+def default_socket_path(posts_file: str) -> str:
+    """Socket lives beside the posts file so every client finds the same one"""
+    return os.path.join(os.path.dirname(os.path.abspath(posts_file)), SOCKET_NAME)
+
+
+def control_supported() -> bool:
+    return hasattr(socket, 'AF_UNIX')
+
+
+class SchedulerUnavailable(Exception):
+    """No scheduler is listening on the control socket"""
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline(MAX_REQUEST_BYTES)
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+            response = {'ok': True, 'result': self.server.dispatch(request)}
+        except Exception as e:
+            response = {'ok': False, 'error': str(e)}
+        self.wfile.write(json.dumps(response, default=str).encode('utf-8') + b'\n')
+
+
+if control_supported():
+    class _ControlUnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+class ControlServer:
+    """Serves control requests by calling dispatch(request) -> result"""
+
+    def __init__(self, path: str, dispatch: Callable[[Dict], object]):
+        self.path = path
+        self.dispatch = dispatch
+        self._server = None
+        self._thread = None
+
+    def start(self) -> bool:
+        """Start listening; returns False if unsupported or another scheduler owns the socket"""
+        if not control_supported():
+            print("[INFO] Control socket not supported on this platform")
+            return False
+
+        if os.path.exists(self.path):
+            if ping(self.path):
+                print(f"[INFO] Control socket {self.path} is served by another scheduler")
+                return False
+            os.remove(self.path)  # stale socket from a crashed process
+
+        self._server = _ControlUnixServer(self.path, _ControlHandler)
+        self._server.dispatch = self.dispatch
+        self._thread = threading.Thread(target=self._server.serve_forever, name='control-socket', daemon=True)
+        self._thread.start()
+        print(f"[SUCCESS] Control socket listening on {self.path}")
+        return True
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class ControlClient:
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+
+    def request(self, op: str, **params):
+        """
+        Send one request and return its result
+
+        Raises:
+            SchedulerUnavailable: if no scheduler is listening
+            RuntimeError: if the scheduler rejected the request
+        """
+        if not control_supported() or not os.path.exists(self.path):
+            raise SchedulerUnavailable(self.path)
+
+        payload = dict(params, op=op)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError as e:
+                raise SchedulerUnavailable(str(e))
+
+            # Once the request is sent the scheduler may have applied it, so
+            # a slow reply is an error rather than a reason to fall back
+            try:
+                sock.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+                with sock.makefile('rb') as reader:
+                    line = reader.readline()
+            except socket.timeout:
+                raise RuntimeError("timed out waiting for the scheduler to reply")
+
+        if not line:
+            raise RuntimeError("scheduler closed the connection without replying")
+
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise RuntimeError(response.get('error', 'unknown error'))
+        return response.get('result')
+
+
+def ping(path: str) -> bool:
+    try:
+        ControlClient(path, timeout=1.0).request('ping')
+        return True
+    except Exception:
+        return False
+
+
+def send_control_request(posts_file: str, op: str, **params) -> Optional[Dict]:
+    """
+    Ask the running scheduler to perform op
+
+    Returns:
+        dict: {'ok': True, 'result': ...} or {'ok': False, 'error': ...}
+        None: when no scheduler is reachable and the caller should use the store
+    """
+    client = ControlClient(default_socket_path(posts_file))
+    started = time.perf_counter()
+    outcome = 'ok'
+    try:
+        return {'ok': True, 'result': client.request(op, **params)}
+    except SchedulerUnavailable:
+        outcome = 'unavailable'
+        return None
+    except (OSError, ValueError, RuntimeError) as e:
+        outcome = 'error'
+        return {'ok': False, 'error': str(e)}
+    finally:
+        CONTROL_REQUEST_SECONDS.observe(time.perf_counter() - started, op=op, outcome=outcome)
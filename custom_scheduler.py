@@ -4,79 +4,525 @@ Custom LinkedIn Post Scheduler
 Allows scheduling posts at specific custom times
 """
 
+import heapq
 import time
 from datetime import datetime, timedelta
 from apscheduler.schedulers.background import BackgroundScheduler  # Change from BlockingScheduler
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.events import EVENT_JOB_SUBMITTED, EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES
 from apscheduler.triggers.date import DateTrigger
 import signal
 import os
 import json
-from content_generator import ContentGenerator
-from linkedin_poster import LinkedInPoster
+import threading
+from worker_pool import PostWorkerPool, StageTimeout
+from recurring_schedule import RecurringScheduleEngine, default_state_path
+from job_leases import create_lease_backend, default_node_id, LeaseKeeper
+from post_store import (PostStore, parse_schedule_time, format_time_remaining, print_post_listing,
+                        expire_overdue_posts, new_post_id)
+from control_socket import ControlServer, default_socket_path
+from bulk_import import validate_rows, allocate_slots, claim_slots, release_slots, make_posts, build_report
+from batch_ops import apply_operations, build_batch_report, should_commit
+from post_archive import PostArchive, ARCHIVABLE_STATUSES, default_archive_dir
+from log_writer import BufferedLogWriter
+from slot_allocator import SlotAllocator, SlotConflict, DEFAULT_MIN_GAP_MINUTES, DEFAULT_SLOT_POLICY
+from retry_policy import RetryPolicy, is_retryable
+from heartbeat import HeartbeatWriter, default_run_dir
+from timing_wheel import WheelScheduler
+from clock import SYSTEM_CLOCK
+from metrics import MetricsServer, JOB_LAG_SECONDS, JOB_STAGE_SECONDS, JOBS_TOTAL, JOB_QUEUE_DEPTH
+
+TERMINAL_STATUSES = ('completed', 'failed', 'error', 'expired', 'cancelled', 'dead_letter')
+PENDING_STATUSES = ('scheduled', 'retrying')
+ACTIVE_JOBS_SHOWN = 20
+
+SCHEDULER_CORES = ('apscheduler', 'wheel')
+
+DEFAULT_SCHEDULER_CONFIG = {
+    'core': 'apscheduler',
+    'wheel_tick_seconds': 1.0,
+    'wheel_slots': 3600,
+    'max_concurrent_jobs': 10,
+    'generation_workers': 4,
+    'publish_workers': 2,
+    'job_timeout': 300,
+    'misfire_grace_time': 300,
+    'arm_window_hours': 24,
+    'recurring_enabled': False,
+    'recurring_horizon': 3,
+    'lease_backend': 'sqlite',
+    'lease_path': 'scheduler_leases.db',
+    'lease_ttl': 120,
+    'failover_grace': 3600,
+    'archive_after_hours': 24,
+    'log_dir': 'logs',
+    'log_max_bytes': 10 * 1024 * 1024,
+    'log_queue_size': 10000,
+    'metrics_port': 9464,
+    'slot_min_gap_minutes': DEFAULT_MIN_GAP_MINUTES,
+    'slot_account_gaps': {},
+    'slot_policy': DEFAULT_SLOT_POLICY,
+    'retry_max_attempts': 4,
+    'retry_base_delay': 60,
+    'retry_max_delay': 3600,
+    'retry_jitter': 0.5,
+    'heartbeat_interval': 10
+}
+
+def load_scheduler_config(config_file='config.json'):
+    """Read the 'scheduler' section of config.json merged over the defaults"""
+    config = dict(DEFAULT_SCHEDULER_CONFIG)
+    try:
+        with open(config_file, 'r', encoding='utf-8') as f:
+            config.update(json.load(f).get('scheduler', {}))
+    except Exception as e:
+        print(f"[WARNING] Could not read scheduler config: {e}")
+    return config
 
 class CustomPostScheduler:
-    def __init__(self):
-        self.scheduler = BackgroundScheduler()  # Use BackgroundScheduler instead
-        self.content_generator = ContentGenerator()
-        self.linkedin_poster = LinkedInPoster()
+    def __init__(self, clock=None):
+        self.config = load_scheduler_config()
+        self.clock = clock or SYSTEM_CLOCK
+        if self.config['core'] not in SCHEDULER_CORES:
+            raise ValueError(f"Unknown scheduler core: {self.config['core']} "
+                             f"(expected one of {', '.join(SCHEDULER_CORES)})")
+        self._wheel_core = self.config['core'] == 'wheel'
+        if self._wheel_core:
+            # One slotted entry per post instead of an APScheduler job object
+            self.scheduler = WheelScheduler(
+                self.execute_scheduled_post,
+                max_workers=self.config['max_concurrent_jobs'],
+                misfire_grace_time=self.config['misfire_grace_time'],
+                tick=self.config['wheel_tick_seconds'],
+                slots=self.config['wheel_slots'],
+                on_submit=lambda job_id, lag: self._record_submission(lag),
+                on_missed=lambda job_id: print(f"[WARNING] Job {job_id} missed its run time (misfire grace exceeded)"),
+                on_busy=lambda job_id: print(f"[WARNING] Job {job_id} skipped, previous run still active"),
+                clock=self.clock
+            )
+        else:
+            if self.clock is not SYSTEM_CLOCK:
+                raise ValueError("A custom clock needs the 'wheel' scheduler core")
+            self.scheduler = BackgroundScheduler(  # Use BackgroundScheduler instead
+                executors={'default': ThreadPoolExecutor(max_workers=self.config['max_concurrent_jobs'])},
+                job_defaults={
+                    'coalesce': False,
+                    'max_instances': 1,
+                    'misfire_grace_time': self.config['misfire_grace_time']
+                }
+            )
+            self.scheduler.add_listener(self._on_job_event, EVENT_JOB_SUBMITTED | EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
+        self.worker_pool = PostWorkerPool(
+            generation_workers=self.config['generation_workers'],
+            publish_workers=self.config['publish_workers'],
+            job_timeout=self.config['job_timeout']
+        )
+        # OpenAI / LinkedIn clients are only built when a post actually runs
+        self._content_generator = None
+        self._linkedin_poster = None
         self.scheduled_posts = []
         self.posts_file = 'scheduled_posts.json'
+        self.store = PostStore(self.posts_file)
         self.running = False
+        self._posts_lock = threading.RLock()
+        self._removed_ids = set()  # deleted or archived; never merged back from disk
+        self._store_version = None  # posts file version of our last save or merge
+        self._saved_posts = {}  # post id -> the post as of that save or merge (the merge base)
+        self._deferred = []  # (fire time, post id) heap of posts due after the arming window
+        self.archive = PostArchive(default_archive_dir(self.posts_file))
+        self.slots = SlotAllocator.from_config(self.config)
+        self.retry_policy = RetryPolicy.from_config(self.config)
+        self.last_success = None
+        self.last_failure = None
+        self.control_server = ControlServer(default_socket_path(self.posts_file), self.handle_control_request)
+        self.recurring = RecurringScheduleEngine(horizon=self.config['recurring_horizon'],
+                                                 state_file=default_state_path(self.posts_file))
+        self.node_id = default_node_id()
+        self.leases = create_lease_backend(self.config['lease_backend'], self.config['lease_path'])
+        self.log_writer = BufferedLogWriter(
+            log_dir=self.config['log_dir'],
+            max_bytes=self.config['log_max_bytes'],
+            queue_size=self.config['log_queue_size']
+        )
+        self.metrics_server = MetricsServer(self.config['metrics_port']) if self.config['metrics_port'] else None
+        self.heartbeat = HeartbeatWriter(default_run_dir(self.posts_file), self.node_id,
+                                         self._heartbeat_snapshot, self.config['heartbeat_interval'])
+        JOB_QUEUE_DEPTH.set_function(self._queue_depth_samples)
         
         # Load existing scheduled posts
         self._load_scheduled_posts()
     
+    @property
+    def content_generator(self):
+        if self._content_generator is None:
+            from content_generator import ContentGenerator
+            # Keep every OpenAI call inside the job deadline so timed-out generation workers are freed
+            self._content_generator = ContentGenerator(generation_timeout=self.config['job_timeout'])
+        return self._content_generator
+    
+    @content_generator.setter
+    def content_generator(self, generator):
+        self._content_generator = generator
+    
+    @property
+    def linkedin_poster(self):
+        if self._linkedin_poster is None:
+            from linkedin_poster import LinkedInPoster
+            # Keep every API call inside the job deadline so timed-out publish workers are freed
+            self._linkedin_poster = LinkedInPoster(publish_timeout=self.config['job_timeout'])
+        return self._linkedin_poster
+    
+    @linkedin_poster.setter
+    def linkedin_poster(self, poster):
+        self._linkedin_poster = poster
+    
     def _load_scheduled_posts(self):
         """Load scheduled posts from file"""
         try:
             if os.path.exists(self.posts_file):
-                with open(self.posts_file, 'r', encoding='utf-8') as f:
-                    saved_posts = json.load(f)
+                with self.store.lock():
+                    saved_posts, self._store_version = self.store.load_versioned()
+                self._saved_posts = self._snapshot(saved_posts)
                 
                 # Load ALL posts (scheduled, completed, failed) for history
-                current_time = datetime.now()
+                current_time = self.clock.now()
                 active_jobs = 0
                 
                 for post in saved_posts:
-                    if post['status'] == 'scheduled':
+                    if post['status'] == 'retrying':
+                        # Retries survive restarts; overdue ones run right away
+                        retry_time = max(datetime.fromisoformat(post['next_attempt_at']), current_time)
+                        self._add_job_for_post(post, retry_time)
+                        active_jobs += 1
+                    elif post['status'] == 'scheduled':
                         post_time = datetime.fromisoformat(post['schedule_time'])
                         
                         # Only add future scheduled posts to scheduler
                         if post_time > current_time:
-                            self.scheduler.add_job(
-                                func=self.execute_scheduled_post,
-                                trigger=DateTrigger(run_date=post_time),
-                                args=[post['topic'], post['content']],
-                                id=post['id'],
-                                replace_existing=True
-                            )
+                            # Posts past the arming window are armed later by _arm_due_posts()
+                            self._add_job_for_post(post, post_time)
                             active_jobs += 1
-                            print(f"[INFO] Loaded scheduled post: {post['topic']} at {post['schedule_time']}")
+                        elif self.leases.state(self._lease_key(post)) == 'running':
+                            # Another node is executing it (or died doing so);
+                            # failover recovery decides what happens next
+                            continue
                         else:
                             # Mark past scheduled posts as expired
                             post['status'] = 'expired'
                 
-                # Keep ALL posts in memory (including completed/failed for history)
+                # Keep active and recently finished posts in memory;
+                # older history lives in the compressed archive
                 self.scheduled_posts = saved_posts
-                print(f"[SUCCESS] Loaded {active_jobs} active scheduled posts")
-                print(f"[INFO] Total posts in history: {len(saved_posts)}")
+                self.slots.rebuild(saved_posts)
+                print(f"[SUCCESS] Loaded {active_jobs} active scheduled posts, {self._job_count()} of them "
+                      f"due within {self.config['arm_window_hours']} hours and armed now")
                 
                 # Save any status updates (like expired posts)
-                self._save_scheduled_posts()
+                if not self._archive_finished_posts():
+                    self._save_scheduled_posts()
+                print(f"[INFO] Posts in live store: {len(self.scheduled_posts)}")
                 
         except Exception as e:
             print(f"[WARNING] Could not load scheduled posts: {e}")
             self.scheduled_posts = []
     
+    def _archive_finished_posts(self):
+        """
+        Move posts that finished more than archive_after_hours ago into the
+        archive; returns the number archived (the store is saved if any were)
+        """
+        try:
+            cutoff = (self.clock.now() - timedelta(hours=self.config['archive_after_hours'])).isoformat()
+            
+            with self._posts_lock, self.store.lock():
+                # Posts another writer archived or deleted must not be archived again
+                self._refresh_from_store()
+                finished = [
+                    post for post in self.scheduled_posts
+                    if post['status'] in ARCHIVABLE_STATUSES
+                    and (post.get('completed_at') or post['schedule_time']) < cutoff
+                ]
+                if not finished:
+                    return 0
+                
+                self.archive.archive(finished)
+                archived_ids = {post['id'] for post in finished}
+                self._removed_ids.update(archived_ids)
+                self.scheduled_posts = [p for p in self.scheduled_posts if p['id'] not in archived_ids]
+                self._save_scheduled_posts()
+            
+            print(f"[INFO] Archived {len(finished)} finished posts")
+            return len(finished)
+            
+        except Exception as e:
+            print(f"[WARNING] Could not archive finished posts: {e}")
+            return 0
+    
+    def _expire_overdue_posts(self):
+        """
+        Mark scheduled posts whose job missed its run time (past misfire
+        grace) as expired, so the stored status counts stay accurate;
+        returns the number expired
+        """
+        try:
+            cutoff = self.clock.now() - timedelta(seconds=self.config['misfire_grace_time'])
+            # The store records its earliest scheduled time, so this is usually one small read
+            next_due = self.store.summary()['next_due']
+            if next_due is None or datetime.fromisoformat(next_due) >= cutoff:
+                return 0
+            
+            with self._posts_lock:
+                # Armed jobs and posts another node is running are left to the scheduler and failover
+                expired = expire_overdue_posts(
+                    self.scheduled_posts, cutoff,
+                    skip=lambda post: self._has_job(post['id']) or self.leases.state(self._lease_key(post)) == 'running'
+                )
+                if not expired:
+                    return 0
+                self._save_scheduled_posts()
+            
+            print(f"[INFO] Expired {len(expired)} posts that missed their run time")
+            return len(expired)
+            
+        except Exception as e:
+            print(f"[WARNING] Could not expire overdue posts: {e}")
+            return 0
+    
+    def _add_job_for_post(self, post, post_time):
+        """
+        Register a one-off scheduler job for a stored post; a post due after
+        the arming window only gets a heap entry until _arm_due_posts() arms it
+        """
+        if post_time > self.clock.now() + timedelta(hours=self.config['arm_window_hours']):
+            self._remove_job(post['id'])  # it may have been moved out of the window
+            heapq.heappush(self._deferred, (post_time, post['id']))
+            return
+        if self._wheel_core:
+            self.scheduler.add_job(post['id'], post_time,
+                                   (post['topic'], post['content'], post['id'], self._lease_key(post)))
+            return
+        self.scheduler.add_job(
+            func=self.execute_scheduled_post,
+            trigger=DateTrigger(run_date=post_time),
+            args=[post['topic'], post['content']],
+            kwargs={'post_id': post['id'], 'lease_key': self._lease_key(post)},
+            id=post['id'],
+            replace_existing=True
+        )
+
+    def _arm_due_posts(self):
+        """Arm deferred posts that have come within the arming window; returns the number armed"""
+        horizon = self.clock.now() + timedelta(hours=self.config['arm_window_hours'])
+        armed = 0
+        with self._posts_lock:
+            due = []
+            while self._deferred and self._deferred[0][0] <= horizon:
+                due.append(heapq.heappop(self._deferred))
+            if not due:
+                return 0
+            
+            posts = {post['id']: post for post in self.scheduled_posts}
+            for post_time, post_id in due:
+                post = posts.get(post_id)
+                if post is None or post['status'] not in PENDING_STATUSES or self._has_job(post_id):
+                    continue
+                # Entries left behind by a reschedule no longer match the post's time
+                if datetime.fromisoformat(post.get('next_attempt_at') or post['schedule_time']) != post_time:
+                    continue
+                self._add_job_for_post(post, post_time)
+                armed += 1
+        
+        if armed:
+            print(f"[INFO] Armed {armed} posts due in the next {self.config['arm_window_hours']} hours")
+        return armed
+
+    def _remove_job(self, job_id):
+        """Disarm a post's job; returns False if none was armed"""
+        if self._wheel_core:
+            return self.scheduler.remove_job(job_id)
+        if self.scheduler.get_job(job_id):
+            self.scheduler.remove_job(job_id)
+            return True
+        return False
+
+    def _has_job(self, job_id):
+        if self._wheel_core:
+            return self.scheduler.has_job(job_id)
+        return self.scheduler.get_job(job_id) is not None
+
+    def _job_count(self):
+        if self._wheel_core:
+            return self.scheduler.job_count()
+        return len(self.scheduler.get_jobs())
+
+    def _next_job(self):
+        """(post id, fire time) of the earliest armed job, or None"""
+        if self._wheel_core:
+            return self.scheduler.next_job()
+        jobs = self.scheduler.get_jobs()
+        if not jobs:
+            return None
+        next_job = min(jobs, key=lambda j: j.next_run_time)
+        return next_job.id, next_job.next_run_time
+
+    def _upcoming_jobs(self, limit=None):
+        """(post id, fire time) pairs in fire order"""
+        if self._wheel_core:
+            return self.scheduler.upcoming(limit)
+        jobs = [(job.id, job.next_run_time) for job in self.scheduler.get_jobs()]
+        return jobs[:limit] if limit is not None else jobs
+
+    @staticmethod
+    def _lease_key(post):
+        """
+        Lease name for the post's next attempt; a reschedule or a retry gets a
+        fresh lease so the finished earlier attempt does not block it
+        """
+        key = f"{post['id']}@{post['schedule_time']}"
+        attempt = post.get('attempts', 0) + 1
+        return key if attempt == 1 else f"{key}#{attempt}"
+
+    def _materialize_recurring_posts(self):
+        """Top up the upcoming occurrences of config.json post_schedule rules"""
+        if not self.config['recurring_enabled']:
+            return
+        
+        try:
+            self.recurring.reload_if_changed()
+            with self._posts_lock, self.store.lock():
+                # Materialize against the stored posts, so occurrences deleted elsewhere count
+                self._refresh_from_store()
+                new_posts, orphaned_ids = self.recurring.materialize(self.scheduled_posts, self.clock.now())
+                new_posts = [post for post in new_posts if post['id'] not in self._removed_ids]
+                
+                for post in new_posts:
+                    post_time = datetime.fromisoformat(post['schedule_time'])
+                    self._add_job_for_post(post, post_time)
+                    # Rule times are authoritative; they are indexed so ad-hoc posts keep clear of them
+                    self.slots.reserve(post['id'], post_time, post.get('account'))
+                    self.scheduled_posts.append(post)
+                
+                orphaned = set(orphaned_ids)
+                for post in self.scheduled_posts:
+                    if post['id'] in orphaned:
+                        self._remove_job(post['id'])
+                        post['status'] = 'cancelled'
+                        self.slots.release(post['id'])
+                
+                if new_posts or orphaned:
+                    print(f"[INFO] Recurring schedule: {len(new_posts)} occurrences added, "
+                          f"{len(orphaned)} withdrawn")
+                    self._save_scheduled_posts()
+                    self.recurring.record(new_posts)
+                
+        except Exception as e:
+            print(f"[WARNING] Could not materialize recurring posts: {e}")
+
+    @staticmethod
+    def _snapshot(posts):
+        return {post['id']: dict(post) for post in posts}
+
+    def _refresh_from_store(self):
+        """Merge the posts file into memory if anyone else saved it since we last did"""
+        if self.store.version() != self._store_version:
+            return self._merge_store_changes()
+        return 0
+
+    def _merge_store_changes(self):
+        """
+        Fold in changes other writers (scheduler nodes, the CLI, the dashboard)
+        made to the shared posts file so a save from this node does not undo them
+        
+        A three-way merge against the posts as of our last save or merge: a
+        post only one side changed keeps that side's version, a post we had
+        seen that is gone from the file was removed elsewhere (deleted or
+        archived), and a post the file never had was created here. Jobs of
+        posts taken from the file are re-armed or disarmed to match.
+        
+        Returns:
+            int: number of posts taken from, or dropped because of, the file
+        """
+        if not os.path.exists(self.posts_file):
+            return 0
+        
+        with self._posts_lock, self.store.lock():
+            version = self.store.version()
+            stored_posts = self.store.load()
+            stored_by_id = {post['id']: post for post in stored_posts}
+            base = self._saved_posts
+            current_time = self.clock.now()
+            merged = []
+            changed = 0
+            
+            for post in self.scheduled_posts:
+                stored = stored_by_id.pop(post['id'], None)
+                if stored is None:
+                    if post['id'] in base:
+                        self._remove_job(post['id'])
+                        self._removed_ids.add(post['id'])
+                        changed += 1
+                    else:
+                        merged.append(post)  # created here since our last save
+                elif self._prefer_stored(post, stored, base.get(post['id'])):
+                    merged.append(stored)
+                    self._sync_job(stored, current_time)
+                    changed += 1
+                else:
+                    merged.append(post)
+            
+            for stored in stored_by_id.values():
+                # Only in the file: added elsewhere, unless we removed it since
+                if stored['id'] in self._removed_ids or stored['id'] in base:
+                    continue
+                merged.append(stored)
+                self._sync_job(stored, current_time)
+                changed += 1
+            
+            self.scheduled_posts = merged
+            self._saved_posts = self._snapshot(stored_posts)
+            self._store_version = version
+            if changed:
+                self.slots.rebuild(merged)
+            return changed
+
+    @staticmethod
+    def _prefer_stored(post, stored, base):
+        """Whether the file's version of a post wins over the one in memory"""
+        if stored == post:
+            return False
+        if base is not None:
+            if post == base:
+                return True  # only the file changed
+            if stored == base:
+                return False  # only we changed it
+        # Both changed: an outcome recorded elsewhere wins over our pending state
+        if post['status'] in PENDING_STATUSES and stored['status'] in TERMINAL_STATUSES:
+            return True
+        # Another node's attempt failed and queued a retry
+        return (post['status'] in PENDING_STATUSES and stored['status'] == 'retrying'
+                and stored.get('attempts', 0) > post.get('attempts', 0))
+
+    def _sync_job(self, post, current_time):
+        """Arm, re-arm or disarm a post's job to match its stored state"""
+        if post['status'] == 'retrying':
+            self._add_job_for_post(post, max(datetime.fromisoformat(post['next_attempt_at']), current_time))
+        elif post['status'] == 'scheduled' and datetime.fromisoformat(post['schedule_time']) > current_time:
+            self._add_job_for_post(post, datetime.fromisoformat(post['schedule_time']))
+        else:
+            self._remove_job(post['id'])
+
     def _save_scheduled_posts(self):
         """Save scheduled posts to file"""
         try:
-            with open(self.posts_file, 'w', encoding='utf-8') as f:
-                json.dump(self.scheduled_posts, f, indent=2, ensure_ascii=False)
+            with self._posts_lock, self.store.lock():
+                # Only fold in the file when someone else saved since we did
+                self._refresh_from_store()
+                self._store_version = self.store.save(self.scheduled_posts)
+                self._saved_posts = self._snapshot(self.scheduled_posts)
         except Exception as e:
             print(f"[WARNING] Could not save scheduled posts: {e}")
 
-    def add_post(self, topic, schedule_time, content=None):
+    def add_post(self, topic, schedule_time, content=None, account=None):
         """
         Add a post to be scheduled at specific time
         
@@ -84,26 +530,43 @@ class CustomPostScheduler:
             topic (str): Topic for content generation
             schedule_time (str): Time in format "YYYY-MM-DD HH:MM" or "HH:MM" (today)
             content (str, optional): Pre-written content, if None will generate
+            account (str, optional): Account whose minimum posting gap applies
+        
+        Returns:
+            str: the new post's job ID, or False if it could not be scheduled
         """
         try:
-            # Parse the schedule time
-            post_datetime = self._parse_schedule_time(schedule_time)
-            
-            if post_datetime <= datetime.now():
-                print(f"[WARNING] Schedule time {schedule_time} is in the past!")
-                return False
+            post_info = self._create_post(topic, schedule_time, content, account)
+        except Exception as e:
+            print(f"[ERROR] Error scheduling post: {e}")
+            return False
+        
+        print(f"[SUCCESS] Post scheduled successfully!")
+        print(f"   Topic: {topic}")
+        print(f"   Time: {datetime.fromisoformat(post_info['schedule_time']).strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"   Job ID: {post_info['id']}")
+        
+        return post_info['id']
+    
+    def _create_post(self, topic, schedule_time, content=None, account=None, image_path=None):
+        """
+        Validate, place and arm a new post
+        
+        Raises:
+            ValueError: if the time is invalid or in the past
+            SlotConflict: if the time is too close to another post (slot_policy 'reject')
+        """
+        # Parse the schedule time
+        post_datetime = self._parse_schedule_time(schedule_time)
+        
+        if post_datetime <= self.clock.now():
+            raise ValueError(f"Schedule time {schedule_time} is in the past!")
+        
+        with self._posts_lock:
+            post_datetime = self.slots.place(post_datetime, account, not_before=self.clock.now())
             
             # Create unique job ID
-            job_id = f"custom_post_{len(self.scheduled_posts)}_{int(time.time())}"
-            
-            # Add job to scheduler
-            self.scheduler.add_job(
-                func=self.execute_scheduled_post,
-                trigger=DateTrigger(run_date=post_datetime),
-                args=[topic, content],
-                id=job_id,
-                replace_existing=True
-            )
+            job_id = new_post_id('custom_post')
             
             # Store post info
             post_info = {
@@ -113,58 +576,191 @@ class CustomPostScheduler:
                 'content': content,
                 'status': 'scheduled'
             }
+            if account:
+                post_info['account'] = account
+            if image_path:
+                post_info['image_path'] = image_path
+            
+            # Add job to scheduler
+            self._add_job_for_post(post_info, post_datetime)
+            self.slots.reserve(job_id, post_datetime, account)
             
             self.scheduled_posts.append(post_info)
             
             # Save to file
             self._save_scheduled_posts()
+        
+        return post_info
+    
+    def add_posts_bulk(self, rows, allow_partial=False, dry_run=False):
+        """
+        Schedule many posts with one validation pass and one save
+        
+        Args:
+            rows (list): (line number, row dict) pairs, see bulk_import.iter_rows
+            allow_partial (bool): schedule the valid rows even if some are rejected
+            dry_run (bool): validate only
+        
+        Returns:
+            dict: import report with accepted/rejected counts and per-line errors
+        """
+        entries, errors = validate_rows(rows)
+        
+        with self._posts_lock:
+            entries, slot_errors = allocate_slots(entries, self.slots)
+            errors.extend(slot_errors)
+            if dry_run or not entries or (errors and not allow_partial):
+                release_slots(entries, self.slots)
+                return build_report(entries, errors, [], committed=False)
             
-            print(f"[SUCCESS] Post scheduled successfully!")
-            print(f"   Topic: {topic}")
-            print(f"   Time: {post_datetime.strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"   Job ID: {job_id}")
+            new_posts = make_posts(entries)
+            claim_slots(entries, new_posts, self.slots)
+            for post, entry in zip(new_posts, entries):
+                self._add_job_for_post(post, entry['schedule_datetime'])
+            self.scheduled_posts.extend(new_posts)
+            self._save_scheduled_posts()
+        
+        print(f"[SUCCESS] Bulk scheduled {len(new_posts)} posts")
+        return build_report(entries, errors, new_posts, committed=True)
+    
+    def apply_batch(self, operations, allow_partial=False, dry_run=False):
+        """
+        Apply create/update/reschedule/delete operations with one save
+        
+        Args:
+            operations (list): dicts with 'op' and its fields, see batch_ops
+            allow_partial (bool): commit the operations that succeeded even if some failed
+            dry_run (bool): validate only
+        
+        Returns:
+            dict: batch report with per-operation results
+        """
+        with self._posts_lock:
+            # Work on a copy so a rejected batch leaves posts, jobs and slots untouched
+            slots = SlotAllocator.from_config(self.config)
+            slots.rebuild(self.scheduled_posts)
+            posts, results = apply_operations(self.scheduled_posts, operations, slots,
+                                              now=self.clock.now(), id_prefix='custom_post')
+            committed = should_commit(results, allow_partial, dry_run)
+            if not committed:
+                return build_batch_report(results, committed)
             
-            return True
+            before = {post['id']: post for post in self.scheduled_posts}
+            remaining = {post['id'] for post in posts}
+            for post_id in before.keys() - remaining:
+                self._remove_job(post_id)
+                self._removed_ids.add(post_id)
+            for post in posts:
+                # Jobs carry topic and content, so any change re-arms the post
+                if post['status'] in PENDING_STATUSES and post != before.get(post['id']):
+                    due = post.get('next_attempt_at') or post['schedule_time']
+                    self._add_job_for_post(post, max(datetime.fromisoformat(due), self.clock.now()))
             
-        except Exception as e:
-            print(f"[ERROR] Error scheduling post: {e}")
-            return False
+            self.scheduled_posts = posts
+            self.slots = slots
+            self._save_scheduled_posts()
+        
+        report = build_batch_report(results, committed)
+        print(f"[SUCCESS] Batch applied {report['applied']} operations")
+        return report
     
     def _parse_schedule_time(self, schedule_time):
         """Parse schedule time string to datetime object"""
+        return parse_schedule_time(schedule_time, self.clock.now())
+    
+    def _on_job_event(self, event):
+        """Track executor queueing for status reporting"""
+        if event.code == EVENT_JOB_SUBMITTED:
+            lag = None
+            if event.scheduled_run_times:
+                run_time = event.scheduled_run_times[0]
+                lag = (datetime.now(run_time.tzinfo) - run_time).total_seconds()
+            self._record_submission(lag)
+        elif event.code == EVENT_JOB_MISSED:
+            print(f"[WARNING] Job {event.job_id} missed its run time (misfire grace exceeded)")
+        elif event.code == EVENT_JOB_MAX_INSTANCES:
+            print(f"[WARNING] Job {event.job_id} skipped, previous run still active")
+
+    def _record_submission(self, lag):
+        if lag is not None:
+            JOB_LAG_SECONDS.observe(max(0.0, lag))
+        self.worker_pool.job_submitted(lag)
+
+    def _queue_depth_samples(self):
+        """Current executor queue depth for the metrics endpoint"""
+        pool = self.worker_pool.snapshot()
+        samples = {('all', 'waiting'): pool['jobs_waiting'], ('all', 'running'): pool['jobs_running']}
+        for stage, stage_stats in pool['stages'].items():
+            samples[(stage, 'waiting')] = stage_stats['queued']
+            samples[(stage, 'running')] = stage_stats['active']
+        return samples
+
+    def execute_scheduled_post(self, topic, content=None, post_id=None, lease_key=None):
+        """Execute a scheduled post"""
+        self.worker_pool.job_started()
         try:
-            # If only time provided (HH:MM), use today's date
-            if ':' in schedule_time and len(schedule_time) <= 5:
-                today = datetime.now().date()
-                time_part = datetime.strptime(schedule_time, '%H:%M').time()
-                return datetime.combine(today, time_part)
+            if post_id is None:
+                return self._execute_post(topic, content)
             
-            # Full datetime (YYYY-MM-DD HH:MM)
-            elif len(schedule_time) > 10:
-                return datetime.strptime(schedule_time, '%Y-%m-%d %H:%M')
+            # Only the node holding the lease may publish this attempt
+            armed_key = lease_key
+            lease_key = lease_key or post_id
+            if not self.leases.acquire(lease_key, self.node_id, self.config['lease_ttl']):
+                print(f"[INFO] Post {post_id} is owned by another scheduler node, skipping")
+                JOBS_TOTAL.inc(outcome='skipped')
+                return False
             
-            # Date only (YYYY-MM-DD), use 09:00 as default
-            else:
-                date_part = datetime.strptime(schedule_time, '%Y-%m-%d').date()
-                default_time = datetime.strptime('09:00', '%H:%M').time()
-                return datetime.combine(date_part, default_time)
-                
-        except ValueError as e:
-            raise ValueError(f"Invalid time format. Use 'HH:MM', 'YYYY-MM-DD', or 'YYYY-MM-DD HH:MM'")
-    
-    def execute_scheduled_post(self, topic, content=None):
-        """Execute a scheduled post"""
+            try:
+                with LeaseKeeper(self.leases, lease_key, self.node_id, self.config['lease_ttl']):
+                    post = self._current_attempt(post_id, armed_key)
+                    if post is None:
+                        print(f"[INFO] Post {post_id} was cancelled, deleted or moved since it was armed, skipping")
+                        JOBS_TOTAL.inc(outcome='skipped')
+                        return False
+                    return self._execute_post(post['topic'], post.get('content'), post_id, post.get('image_path'))
+            finally:
+                self.leases.complete(lease_key, self.node_id)
+        finally:
+            self.worker_pool.job_finished()
+
+    def _current_attempt(self, post_id, lease_key=None):
+        """
+        The post as it now stands in the store, or None unless it is still
+        pending at the time and attempt count its job was armed for (lease_key)
+        """
+        with self._posts_lock:
+            # Another node, the CLI or the dashboard may have changed it since
+            self._refresh_from_store()
+            post = next((p for p in self.scheduled_posts if p['id'] == post_id), None)
+            if post is None or post['status'] not in PENDING_STATUSES:
+                return None
+            if lease_key is not None and self._lease_key(post) != lease_key:
+                return None
+            return dict(post)
+
+    def _execute_post(self, topic, content=None, post_id=None, image_path=None):
+        """Generate and publish a post within the configured job deadline"""
         print(f"\n[EXEC] Starting scheduled post creation...")
         print(f"Topic: {topic}")
-        print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"Time: {self.clock.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        
+        deadline = self.worker_pool.job_deadline()
+        durations = {}
+        stage = 'generation'
         
         try:
             # Generate content if not provided
             if not content:
                 print("[INFO] Generating content...")
-                content_data = self.content_generator.generate_post(topic)
+                started = time.monotonic()
+                content_data = self.worker_pool.run_stage(
+                    'generation', self.content_generator.generate_post, topic, deadline=deadline
+                )
+                durations['generation'] = round(time.monotonic() - started, 3)
+                JOB_STAGE_SECONDS.observe(durations['generation'], stage='generation')
                 if not content_data:
                     print("[ERROR] Failed to generate content")
+                    self._fail_post(topic, post_id, 'failed', "Content generation failed", True, stage, durations)
                     return False
             else:
                 # Use provided content
@@ -173,117 +769,146 @@ class CustomPostScheduler:
                     'topic': topic,
                     'hashtags': []
                 }
+                if image_path:
+                    # e.g. the image generated with a dashboard draft
+                    content_data['image_path'] = image_path
                 print("[INFO] Using provided content...")
             
             print("[SUCCESS] Content ready!")
             
             # Post to LinkedIn
             print("[INFO] Posting to LinkedIn...")
-            success = self.linkedin_poster.post_content(content_data)
+            stage = 'publish'
+            started = time.monotonic()
+            success = self.worker_pool.run_stage(
+                'publish', self.linkedin_poster.post_content, content_data, deadline=deadline
+            )
+            durations['publish'] = round(time.monotonic() - started, 3)
+            JOB_STAGE_SECONDS.observe(durations['publish'], stage='publish')
             
             if success:
                 print("[SUCCESS] Scheduled post published successfully!")
-                self._log_post_success(topic, content_data)
+                self._log_post_success(topic, content_data, post_id, durations)
+                self.last_success = {'post_id': post_id, 'topic': topic, 'at': self.clock.now().isoformat()}
                 
                 # Update post status to completed
-                self._update_post_status(topic, 'completed')
+                self._update_post_status(topic, 'completed', post_id)
+                JOBS_TOTAL.inc(outcome='completed')
                 
                 return True
             else:
                 print("[ERROR] Failed to publish scheduled post")
-                self._log_post_failure(topic, "Posting failed")
-                self._update_post_status(topic, 'failed')
+                statuses = content_data.get('publish_statuses')
+                error = f"Posting failed (API status {', '.join(statuses)})" if statuses else "Posting failed"
+                self._fail_post(topic, post_id, 'failed', error, is_retryable(statuses), stage, durations)
                 return False
                 
+        except StageTimeout as e:
+            print(f"[ERROR] Scheduled post timed out: {e}")
+            if stage == 'publish':
+                # The abandoned call may still go through, so a retry could publish twice
+                self._fail_post(topic, post_id, 'error',
+                                f"{e}; it may have been published, check LinkedIn before rescheduling",
+                                False, stage, durations)
+            else:
+                self._fail_post(topic, post_id, 'error', str(e), True, stage, durations)
+            return False
         except Exception as e:
             print(f"[ERROR] Error executing scheduled post: {e}")
-            self._log_post_failure(topic, str(e))
-            self._update_post_status(topic, 'error')
+            self._fail_post(topic, post_id, 'error', str(e), True, stage, durations)
             return False
     
-    def _update_post_status(self, topic, status):
+    def _fail_post(self, topic, post_id, status, error, retryable, stage, durations):
+        """
+        Record a failed attempt: transient failures are queued for another
+        attempt with backoff until the retry budget runs out (dead_letter);
+        permanent ones get the given final status straight away
+        """
+        self._log_post_failure(topic, error, post_id, stage, durations)
+        self.last_failure = {'post_id': post_id, 'topic': topic, 'at': self.clock.now().isoformat(), 'error': error}
+        
+        if post_id is None:
+            self._update_post_status(topic, status, post_id)
+            JOBS_TOTAL.inc(outcome=status)
+            return status
+        
+        now = self.clock.now()
+        with self._posts_lock:
+            post = next((p for p in self.scheduled_posts if p['id'] == post_id), None)
+            if post is None or post['status'] not in PENDING_STATUSES:
+                return None  # cancelled or deleted while the attempt ran
+            
+            attempts = post.get('attempts', 0) + 1
+            post['attempts'] = attempts
+            post['last_error'] = error
+            
+            if retryable and self.retry_policy.should_retry(attempts):
+                retry_time = now + timedelta(seconds=self.retry_policy.delay(attempts))
+                post['status'] = 'retrying'
+                post['next_attempt_at'] = retry_time.isoformat()
+                self._add_job_for_post(post, retry_time)
+                outcome = 'retrying'
+                print(f"[INFO] Post {post_id} will be retried at {retry_time.strftime('%Y-%m-%d %H:%M:%S')} "
+                      f"(attempt {attempts + 1} of {self.retry_policy.max_attempts})")
+            else:
+                outcome = 'dead_letter' if retryable else status
+                post['status'] = outcome
+                post['completed_at'] = now.isoformat()
+                post.pop('next_attempt_at', None)
+                self.slots.release(post_id)
+                if outcome == 'dead_letter':
+                    print(f"[ERROR] Post {post_id} gave up after {attempts} attempts")
+                    self._write_log('dead_letter', {
+                        'timestamp': now.isoformat(),
+                        'post_id': post_id,
+                        'node': self.node_id,
+                        'topic': topic,
+                        'attempts': attempts,
+                        'error': error
+                    })
+            
+            self._save_scheduled_posts()
+        
+        JOBS_TOTAL.inc(outcome=outcome)
+        return outcome
+    
+    def _update_post_status(self, topic, status, post_id=None):
         """Update post status and save to file"""
         for post in self.scheduled_posts:
-            if post['topic'] == topic and post['status'] == 'scheduled':
+            if post_id is not None and post['id'] != post_id:
+                continue
+            if post['topic'] == topic and post['status'] in PENDING_STATUSES:
                 post['status'] = status
-                post['completed_at'] = datetime.now().isoformat()  # Add completion timestamp
+                post['completed_at'] = self.clock.now().isoformat()  # Add completion timestamp
+                post.pop('next_attempt_at', None)
+                self.slots.release(post['id'])
                 break
         self._save_scheduled_posts()
 
     def list_scheduled_posts(self):
         """List all scheduled posts"""
-        print("\n[INFO] Scheduled Posts:")
-        print("=" * 60)
-        
-        if not self.scheduled_posts:
-            print("No posts found.")
-            return
-        
-        # Separate posts by status
-        scheduled_posts = [p for p in self.scheduled_posts if p['status'] == 'scheduled']
-        completed_posts = [p for p in self.scheduled_posts if p['status'] == 'completed']
-        failed_posts = [p for p in self.scheduled_posts if p['status'] in ['failed', 'error']]
-        expired_posts = [p for p in self.scheduled_posts if p['status'] == 'expired']
-        
-        if scheduled_posts:
-            print("UPCOMING POSTS:")
-            for i, post in enumerate(scheduled_posts, 1):
-                schedule_time = datetime.fromisoformat(post['schedule_time'])
-                time_remaining = schedule_time - datetime.now()
-                
-                if time_remaining.total_seconds() > 0:
-                    print(f"{i}. Topic: {post['topic']}")
-                    print(f"   Time: {schedule_time.strftime('%Y-%m-%d %H:%M:%S')}")
-                    print(f"   In: {self._format_time_remaining(time_remaining)}")
-                    print(f"   ID: {post['id']}")
-                    print("-" * 40)
-        
-        if completed_posts:
-            print(f"\nCOMPLETED POSTS ({len(completed_posts)}):")
-            for i, post in enumerate(completed_posts, 1):
-                schedule_time = datetime.fromisoformat(post['schedule_time'])
-                completed_time = post.get('completed_at', 'Unknown')
-                print(f"{i}. Topic: {post['topic']}")
-                print(f"   Scheduled: {schedule_time.strftime('%Y-%m-%d %H:%M:%S')}")
-                if completed_time != 'Unknown':
-                    completed_dt = datetime.fromisoformat(completed_time)
-                    print(f"   Completed: {completed_dt.strftime('%Y-%m-%d %H:%M:%S')}")
-                print(f"   Status: {post['status']}")
-                print("-" * 20)
-        
-        if failed_posts:
-            print(f"\nFAILED POSTS ({len(failed_posts)}):")
-            for i, post in enumerate(failed_posts, 1):
-                schedule_time = datetime.fromisoformat(post['schedule_time'])
-                print(f"{i}. Topic: {post['topic']}")
-                print(f"   Time: {schedule_time.strftime('%Y-%m-%d %H:%M:%S')}")
-                print(f"   Status: {post['status']}")
-                print("-" * 20)
+        print_post_listing(self.scheduled_posts)
     
     def _format_time_remaining(self, time_delta):
         """Format time remaining in a readable way"""
-        if time_delta.days > 0:
-            return f"{time_delta.days} days, {time_delta.seconds // 3600} hours"
-        elif time_delta.seconds > 3600:
-            return f"{time_delta.seconds // 3600} hours, {(time_delta.seconds % 3600) // 60} minutes"
-        elif time_delta.seconds > 60:
-            return f"{time_delta.seconds // 60} minutes"
-        else:
-            return "less than 1 minute"
+        return format_time_remaining(time_delta)
 
     def cancel_post(self, job_id):
         """Cancel a scheduled post"""
         try:
-            self.scheduler.remove_job(job_id)
-            
-            # Update post status
-            for post in self.scheduled_posts:
-                if post['id'] == job_id:
-                    post['status'] = 'cancelled'
-                    break
-            
-            # Save changes
-            self._save_scheduled_posts()
+            with self._posts_lock:
+                # Posts beyond the arming window have no job yet, so go by the stored status
+                post = next((p for p in self.scheduled_posts if p['id'] == job_id), None)
+                if post is None or post['status'] not in PENDING_STATUSES:
+                    raise LookupError(f"No scheduled post with id {job_id}")
+                self._remove_job(job_id)
+                
+                # Update post status
+                post['status'] = 'cancelled'
+                self.slots.release(job_id)
+                
+                # Save changes
+                self._save_scheduled_posts()
             
             print(f"[SUCCESS] Post {job_id} cancelled successfully")
             return True
@@ -292,64 +917,195 @@ class CustomPostScheduler:
             print(f"[ERROR] Error cancelling post: {e}")
             return False
 
-    def _reload_posts_if_changed(self):
-        """Check if posts file has been modified and reload if necessary"""
+    def reschedule_post(self, job_id, schedule_time):
+        """Move a post to a new time, re-arming it if it had already run"""
         try:
-            if not os.path.exists(self.posts_file):
-                return
+            post = self._move_post(job_id, schedule_time)
+        except Exception as e:
+            print(f"[ERROR] Error rescheduling post: {e}")
+            return False
+        
+        new_time = datetime.fromisoformat(post['schedule_time'])
+        print(f"[SUCCESS] Post {job_id} rescheduled to {new_time.strftime('%Y-%m-%d %H:%M')}")
+        return True
+    
+    def _move_post(self, job_id, schedule_time):
+        """
+        Re-time a post and arm it again
+        
+        Raises:
+            ValueError: if the time is invalid, in the past, or the post does not exist
+            SlotConflict: if the time is too close to another post (slot_policy 'reject')
+        """
+        post_datetime = self._parse_schedule_time(schedule_time)
+        if post_datetime <= self.clock.now():
+            raise ValueError(f"Schedule time {schedule_time} is in the past!")
+        
+        with self._posts_lock:
+            post = next((p for p in self.scheduled_posts if p['id'] == job_id), None)
+            if post is None:
+                raise ValueError(f"Post {job_id} not found")
             
-            # Check file modification time
-            current_mtime = os.path.getmtime(self.posts_file)
+            # Free the post's own slot so it does not conflict with itself
+            account = post.get('account')
+            released = self.slots.release(job_id)
+            try:
+                post_datetime = self.slots.place(post_datetime, account, not_before=self.clock.now())
+            except SlotConflict:
+                if released is not None:
+                    self.slots.reserve(job_id, released, account)
+                raise
             
-            if not hasattr(self, '_last_mtime'):
-                self._last_mtime = current_mtime
-                return
+            post['schedule_time'] = post_datetime.isoformat()
+            post['status'] = 'scheduled'
+            for key in ('completed_at', 'attempts', 'next_attempt_at', 'last_error'):
+                post.pop(key, None)
+            self._add_job_for_post(post, post_datetime)
+            self.slots.reserve(job_id, post_datetime, account)
+            self._save_scheduled_posts()
+        
+        return post
+
+    def delete_post(self, job_id):
+        """Remove a post from the scheduler and the posts file"""
+        with self._posts_lock:
+            self._remove_job(job_id)
             
-            if current_mtime > self._last_mtime:
-                print("[INFO] Detected new posts, reloading...")
-                self._last_mtime = current_mtime
+            remaining = [p for p in self.scheduled_posts if p['id'] != job_id]
+            if len(remaining) == len(self.scheduled_posts):
+                return False
+            
+            self.scheduled_posts = remaining
+            self._removed_ids.add(job_id)
+            self.slots.release(job_id)
+            self._save_scheduled_posts()
+        
+        print(f"[SUCCESS] Post {job_id} deleted")
+        return True
+
+    def get_status(self):
+        """Summarize the live job set for status queries"""
+        next_job = self._next_job()
+        return {
+            'node_id': self.node_id,
+            'running': self.running,
+            'core': self.config['core'],
+            'active_jobs': self._job_count(),
+            'next_post_id': next_job[0] if next_job else None,
+            'next_run_time': next_job[1].isoformat() if next_job else None,
+            'total_posts': len(self.scheduled_posts),
+            'executor': self.worker_pool.snapshot()
+        }
+
+    def _heartbeat_snapshot(self):
+        """Status written to the heartbeat file for `status` and the dashboard"""
+        status = self.get_status()
+        status.update({
+            'pending_posts': sum(1 for post in self.scheduled_posts if post['status'] in PENDING_STATUSES),
+            'last_success': self.last_success,
+            'last_failure': self.last_failure,
+            'control_socket': self.control_server.path,
+            'metrics_port': self.config['metrics_port']
+        })
+        return status
+
+    def handle_control_request(self, request):
+        """Dispatch a request received on the control socket"""
+        op = request.get('op')
+        
+        with self._posts_lock:
+            if op == 'ping':
+                return {'node_id': self.node_id}
+            elif op == 'status':
+                return self.get_status()
+            elif op == 'add':
+                post = self._create_post(request['topic'], request['schedule_time'],
+                                         request.get('content'), request.get('account'),
+                                         request.get('image_path'))
+                return {'post_id': post['id'], 'schedule_time': post['schedule_time']}
+            elif op == 'cancel':
+                if not self.cancel_post(request['post_id']):
+                    raise ValueError(f"Could not cancel post {request['post_id']}")
+                return {'post_id': request['post_id']}
+            elif op == 'reschedule':
+                post = self._move_post(request['post_id'], request['schedule_time'])
+                return {'post_id': post['id'], 'schedule_time': post['schedule_time']}
+            elif op == 'bulk':
+                return self.add_posts_bulk(
+                    [tuple(row) for row in request['rows']],
+                    allow_partial=request.get('allow_partial', False),
+                    dry_run=request.get('dry_run', False)
+                )
+            elif op == 'batch':
+                return self.apply_batch(
+                    request['operations'],
+                    allow_partial=request.get('allow_partial', False),
+                    dry_run=request.get('dry_run', False)
+                )
+            elif op == 'delete':
+                if not self.delete_post(request['post_id']):
+                    raise ValueError('Post not found')
+                return {'post_id': request['post_id']}
+        
+        raise ValueError(f"Unknown control operation: {op}")
+
+    def _reload_posts_if_changed(self):
+        """
+        Pick up changes other writers made to the posts file: new posts are
+        armed, moved ones re-armed and cancelled, finished or deleted ones disarmed
+        """
+        try:
+            changed = self._refresh_from_store()
+            if changed:
+                print(f"[SUCCESS] Picked up {changed} post changes from the posts file")
+                self._print_active_jobs()
                 
-                # Load new posts
-                with open(self.posts_file, 'r', encoding='utf-8') as f:
-                    saved_posts = json.load(f)
+        except Exception as e:
+            print(f"[WARNING] Error reloading posts: {e}")
+    
+    def _recover_orphaned_jobs(self):
+        """Re-run posts whose owning node stopped renewing its lease mid-run"""
+        try:
+            expired_keys = self.leases.expired()
+            if not expired_keys:
+                return
+            
+            self._refresh_from_store()
+            current_time = self.clock.now()
+            posts = {post['id']: post for post in self.scheduled_posts}
+            
+            for lease_key in expired_keys:
+                post = posts.get(lease_key.split('@', 1)[0])
                 
-                # Find new posts that aren't in scheduler yet
-                current_job_ids = {job.id for job in self.scheduler.get_jobs()}
-                current_time = datetime.now()
+                if post is None or post['status'] not in PENDING_STATUSES or lease_key != self._lease_key(post):
+                    # The failed node got as far as recording an outcome
+                    if self.leases.acquire(lease_key, self.node_id, self.config['lease_ttl']):
+                        self.leases.complete(lease_key, self.node_id)
+                    continue
                 
-                new_posts_added = 0
-                for post in saved_posts:
-                    if (post['id'] not in current_job_ids and 
-                        post['status'] == 'scheduled'):
-                        
-                        post_time = datetime.fromisoformat(post['schedule_time'])
-                        
-                        if post_time > current_time:
-                            # Add new job to scheduler
-                            self.scheduler.add_job(
-                                func=self.execute_scheduled_post,
-                                trigger=DateTrigger(run_date=post_time),
-                                args=[post['topic'], post['content']],
-                                id=post['id'],
-                                replace_existing=True
-                            )
-                            new_posts_added += 1
+                due_time = datetime.fromisoformat(post.get('next_attempt_at') or post['schedule_time'])
+                if (current_time - due_time).total_seconds() > self.config['failover_grace']:
+                    if self.leases.acquire(lease_key, self.node_id, self.config['lease_ttl']):
+                        self.leases.complete(lease_key, self.node_id)
+                        post['status'] = 'expired'
+                        self._save_scheduled_posts()
+                    continue
                 
-                if new_posts_added > 0:
-                    print(f"[SUCCESS] Added {new_posts_added} new posts to scheduler")
-                    self.scheduled_posts = saved_posts
-                    self._print_active_jobs()
+                print(f"[INFO] Taking over orphaned post {post['id']} from a failed node")
+                self._add_job_for_post(post, current_time)
                 
         except Exception as e:
-            print(f"[WARNING] Error reloading posts: {e}")
-    
+            print(f"[WARNING] Error recovering orphaned jobs: {e}")
+
     def _print_active_jobs(self):
         """Print currently active jobs"""
-        jobs = self.scheduler.get_jobs()
-        if jobs:
-            print(f"[INFO] Active scheduled posts: {len(jobs)}")
-            for job in jobs:
-                print(f"   - {job.id}: {job.next_run_time}")
+        count = self._job_count()
+        if count:
+            print(f"[INFO] Active scheduled posts: {count}")
+            for job_id, run_time in self._upcoming_jobs(ACTIVE_JOBS_SHOWN):
+                print(f"   - {job_id}: {run_time}")
+            if count > ACTIVE_JOBS_SHOWN:
+                print(f"   ... and {count - ACTIVE_JOBS_SHOWN} more")
         else:
             print("[INFO] No active posts in scheduler")
     
@@ -363,12 +1119,17 @@ class CustomPostScheduler:
             self.scheduler.start()
         
         self.running = True
+        self._materialize_recurring_posts()
         
         # Set up signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
         
         print("[SUCCESS] Background scheduler started")
+        self.control_server.start()
+        if self.metrics_server:
+            self.metrics_server.start()
+        self.heartbeat.start()
         self._print_active_jobs()
         
         print("\n[INFO] Scheduler Features:")
@@ -382,6 +1143,11 @@ class CustomPostScheduler:
             while self.running:
                 # Check for new posts every 30 seconds
                 self._reload_posts_if_changed()
+                self._arm_due_posts()
+                self._materialize_recurring_posts()
+                self._recover_orphaned_jobs()
+                self._expire_overdue_posts()
+                self._archive_finished_posts()
                 
                 # Show status every 5 minutes
                 if not hasattr(self, '_last_status_time'):
@@ -401,18 +1167,32 @@ class CustomPostScheduler:
     
     def _show_status(self):
         """Show current scheduler status"""
-        jobs = self.scheduler.get_jobs()
-        current_time = datetime.now()
+        next_job = self._next_job()
+        current_time = self.clock.now()
         
         print(f"\n[STATUS] Status Update - {current_time.strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"[INFO] Active posts: {len(jobs)}")
+        print(f"[INFO] Active posts: {self._job_count()}")
         
-        if jobs:
+        if next_job:
             # Show next upcoming post
-            next_job = min(jobs, key=lambda j: j.next_run_time)
-            time_until = next_job.next_run_time - current_time
+            run_time = next_job[1]
+            time_until = run_time - (datetime.now(run_time.tzinfo) if run_time.tzinfo else self.clock.now())
             print(f"[INFO] Next post: {self._format_time_remaining(time_until)}")
         
+        pool = self.worker_pool.snapshot()
+        print(f"[INFO] Executor queue: {pool['jobs_waiting']} waiting, {pool['jobs_running']} running "
+              f"(limit {self.config['max_concurrent_jobs']})")
+        for stage, stage_stats in pool['stages'].items():
+            print(f"[INFO]   {stage}: {stage_stats['active']}/{stage_stats['limit']} active, "
+                  f"{stage_stats['queued']} queued")
+        print(f"[INFO] Fire lag: last {pool['lag_last']:.1f}s, avg {pool['lag_avg']:.1f}s, "
+              f"max {pool['lag_max']:.1f}s")
+        if pool['jobs_timed_out']:
+            print(f"[WARNING] Jobs timed out: {pool['jobs_timed_out']}")
+        log_stats = self.log_writer.stats()
+        if log_stats['dropped']:
+            print(f"[WARNING] Log entries dropped (queue full): {log_stats['dropped']}")
+        
         print("[INFO] Monitoring for new posts...")
     
     def _signal_handler(self, signum, frame):
@@ -424,44 +1204,49 @@ class CustomPostScheduler:
         """Shutdown the scheduler gracefully"""
         print("[INFO] Shutting down scheduler...")
         self.running = False
+        self.control_server.stop()
+        self.heartbeat.stop()
+        if self.metrics_server:
+            self.metrics_server.stop()
         
         if self.scheduler.running:
             self.scheduler.shutdown(wait=True)
+        self.worker_pool.shutdown(wait=False)
+        self.log_writer.close()
         
         print("[SUCCESS] Scheduler stopped gracefully")
         print("[INFO] All scheduled posts have been saved")
     
-    def _log_post_success(self, topic, content_data):
+    def _log_post_success(self, topic, content_data, post_id=None, durations=None):
         """Log successful post"""
         log_entry = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': self.clock.now().isoformat(),
             'status': 'success',
+            'post_id': post_id,
+            'node': self.node_id,
             'topic': topic,
+            'publish_path': content_data.get('publish_path'),
+            'durations': durations or {},
             'content_preview': content_data['content'][:100] + '...'
         }
         self._write_log('posts', log_entry)
     
-    def _log_post_failure(self, topic, error):
+    def _log_post_failure(self, topic, error, post_id=None, stage=None, durations=None, publish_path=None):
         """Log failed post"""
         log_entry = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': self.clock.now().isoformat(),
             'status': 'failed',
+            'post_id': post_id,
+            'node': self.node_id,
             'topic': topic,
+            'stage': stage,
+            'publish_path': publish_path,
+            'durations': durations or {},
             'error': error
         }
         self._write_log('errors', log_entry)
     
     def _write_log(self, log_type, entry):
-        """Write log entry to file"""
-        try:
-            import os
-            log_dir = f"logs/{log_type}"
-            if not os.path.exists(log_dir):
-                os.makedirs(log_dir, exist_ok=True)
-            
-            log_file = f"{log_dir}/{datetime.now().strftime('%Y-%m-%d')}.log"
-            with open(log_file, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(entry) + '\n')
-        except Exception as e:
-            print(f"[WARNING] Could not write log: {e}")
+        """Hand a log entry to the background writer (never blocks the job thread)"""
+        self.log_writer.write(log_type, entry)
 
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Pidfile and heartbeat snapshots for running schedulers
+Each scheduler process keeps <run dir>/<node>.pid and a <node>.json snapshot
+that it rewrites every few seconds, so `status` and the dashboard can report
+on it by reading a couple of small files instead of scanning the process table
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+RUN_DIR_NAME = 'scheduler_run'
+
+
+def default_run_dir(posts_file: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(posts_file)), RUN_DIR_NAME)
+
+
+def _node_file_name(node_id: str) -> str:
+    return ''.join(c if c.isalnum() or c in '-_.' else '_' for c in node_id)
+
+
+def _write_atomic(path: str, data: str):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _pid_exists(pid: int) -> bool:
+    import psutil  # only needed for stale heartbeats; os.kill(pid, 0) does not work on Windows
+    return psutil.pid_exists(pid)
+
+
+class HeartbeatWriter:
+    """Writes the pidfile once and the snapshot every interval seconds"""
+
+    def __init__(self, run_dir: str, node_id: str, snapshot: Callable[[], Dict], interval: float = 10):
+        self.run_dir = run_dir
+        self.node_id = node_id
+        self.snapshot = snapshot
+        self.interval = interval
+        name = _node_file_name(node_id)
+        self.pid_path = os.path.join(run_dir, f"{name}.pid")
+        self.heartbeat_path = os.path.join(run_dir, f"{name}.json")
+        self.started_at = datetime.now()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        os.makedirs(self.run_dir, exist_ok=True)
+        _write_atomic(self.pid_path, f"{os.getpid()}\n")
+        self.beat()
+        self._thread = threading.Thread(target=self._run, name='heartbeat', daemon=True)
+        self._thread.start()
+
+    def beat(self):
+        """Write one snapshot now"""
+        now = datetime.now()
+        try:
+            snapshot = dict(self.snapshot())
+            snapshot.update({
+                'node_id': self.node_id,
+                'pid': os.getpid(),
+                'host': socket.gethostname(),
+                'started_at': self.started_at.isoformat(),
+                'updated_at': now.isoformat(),
+                'uptime_seconds': round((now - self.started_at).total_seconds()),
+                'interval': self.interval
+            })
+            _write_atomic(self.heartbeat_path, json.dumps(snapshot, default=str, indent=2))
+        except Exception as e:
+            print(f"[WARNING] Could not write heartbeat: {e}")
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.beat()
+
+    def stop(self):
+        """Stop beating and remove this node's files"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for path in (self.heartbeat_path, self.pid_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def read_heartbeats(run_dir: str, stale_factor: float = 3) -> List[Dict]:
+    """
+    Load every scheduler snapshot in run_dir
+
+    Each snapshot gets 'age_seconds' and 'state': 'running' when it was
+    refreshed within stale_factor intervals, otherwise 'stopped' if its
+    process is gone or 'unresponsive' if the process exists but stopped beating.
+    """
+    if not os.path.isdir(run_dir):
+        return []
+
+    heartbeats = []
+    now = time.time()
+    hostname = socket.gethostname()
+    for name in sorted(os.listdir(run_dir)):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(run_dir, name), 'r', encoding='utf-8') as f:
+                heartbeat = json.load(f)
+        except (OSError, ValueError):
+            continue  # removed or being replaced mid-read
+
+        heartbeat['age_seconds'] = round(now - datetime.fromisoformat(heartbeat['updated_at']).timestamp(), 1)
+        if heartbeat['age_seconds'] <= heartbeat.get('interval', 10) * stale_factor:
+            heartbeat['state'] = 'running'
+        elif heartbeat.get('host') == hostname and not _pid_exists(heartbeat['pid']):
+            heartbeat['state'] = 'stopped'
+        else:
+            heartbeat['state'] = 'unresponsive'
+        heartbeats.append(heartbeat)
+    return heartbeats
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Lease-based job ownership for running several schedulers on one post store
+A node must hold a time-bounded lease on a post before executing it; leases
+of nodes that die mid-run expire and the post is picked up by another node
+"""
+
+import importlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import closing
+from typing import List, Optional
+
+
+def default_node_id() -> str:
+    """Identify this scheduler process across the cluster"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaseBackend(ABC):
+    """Interface for lease storage; subclass to plug in another backend"""
+
+    @abstractmethod
+    def acquire(self, job_id: str, owner: str, ttl: float) -> bool:
+        """Claim job_id for owner unless another live node holds it or it is done"""
+
+    @abstractmethod
+    def renew(self, job_id: str, owner: str, ttl: float) -> bool:
+        """Extend a lease still held by owner"""
+
+    @abstractmethod
+    def complete(self, job_id: str, owner: str):
+        """Mark the job as handled so no node runs it again"""
+
+    @abstractmethod
+    def state(self, job_id: str) -> Optional[str]:
+        """Return 'running', 'done' or None when the job was never claimed"""
+
+    @abstractmethod
+    def expired(self) -> List[str]:
+        """Job ids whose owner stopped renewing before completing them"""
+
+
+class NullLeaseBackend(LeaseBackend):
+    """Single-node mode: every claim succeeds and nothing is recorded"""
+
+    def acquire(self, job_id, owner, ttl):
+        return True
+
+    def renew(self, job_id, owner, ttl):
+        return True
+
+    def complete(self, job_id, owner):
+        pass
+
+    def state(self, job_id):
+        return None
+
+    def expired(self):
+        return []
+
+
+class SQLiteLeaseBackend(LeaseBackend):
+    """Leases in a local SQLite file shared by every scheduler on the host"""
+
+    def __init__(self, path: str = 'scheduler_leases.db'):
+        self.path = path
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                " job_id TEXT PRIMARY KEY,"
+                " owner TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " state TEXT NOT NULL,"
+                " claims INTEGER NOT NULL DEFAULT 1)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS leases_state_expiry ON leases (state, expires_at)")
+
+    def _connect(self):
+        # A short-lived connection per call keeps the backend thread-safe
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def acquire(self, job_id, owner, ttl):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO leases (job_id, owner, expires_at, state) VALUES (?, ?, ?, 'running') "
+                "ON CONFLICT(job_id) DO UPDATE SET owner = excluded.owner, "
+                " expires_at = excluded.expires_at, claims = claims + 1 "
+                "WHERE leases.state = 'running' AND (leases.expires_at < ? OR leases.owner = excluded.owner)",
+                (job_id, owner, now + ttl, now)
+            )
+            row = conn.execute("SELECT owner, state FROM leases WHERE job_id = ?", (job_id,)).fetchone()
+            conn.execute("COMMIT")
+            return row is not None and row[0] == owner and row[1] == 'running'
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def renew(self, job_id, owner, ttl):
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE leases SET expires_at = ? WHERE job_id = ? AND owner = ? AND state = 'running'",
+                (time.time() + ttl, job_id, owner)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id, owner):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE leases SET state = 'done' WHERE job_id = ? AND owner = ?",
+                (job_id, owner)
+            )
+
+    def state(self, job_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT state FROM leases WHERE job_id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def expired(self):
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT job_id FROM leases WHERE state = 'running' AND expires_at < ?",
+                (time.time(),)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+
+LEASE_BACKENDS = {
+    'none': NullLeaseBackend,
+    'sqlite': SQLiteLeaseBackend
+}
+
+
+def create_lease_backend(name: str = 'sqlite', path: str = 'scheduler_leases.db') -> LeaseBackend:
+    """
+    Build the configured lease backend
+
+    Args:
+        name (str): 'sqlite', 'none', or 'package.module:ClassName' for a custom backend
+        path (str): storage location passed to backends that take one
+    """
+    if ':' in name:
+        module_name, class_name = name.split(':', 1)
+        backend_class = getattr(importlib.import_module(module_name), class_name)
+    elif name in LEASE_BACKENDS:
+        backend_class = LEASE_BACKENDS[name]
+    else:
+        raise ValueError(f"Unknown lease backend: {name}")
+
+    if backend_class is NullLeaseBackend:
+        return backend_class()
+    return backend_class(path)
+
+
+class LeaseKeeper:
+    """Renews a held lease in the background while a job runs"""
+
+    def __init__(self, backend: LeaseBackend, job_id: str, owner: str, ttl: float):
+        self.backend = backend
+        self.job_id = job_id
+        self.owner = owner
+        self.ttl = ttl
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{job_id}", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stopped.set()
+        self._thread.join()
+        return False
+
+    def _run(self):
+        while not self._stopped.wait(self.ttl / 3):
+            try:
+                if not self.backend.renew(self.job_id, self.owner, self.ttl):
+                    print(f"[WARNING] Lost lease on {self.job_id}")
+                    return
+            except Exception as e:
+                print(f"[WARNING] Could not renew lease on {self.job_id}: {e}")
@@ -1,3 +1,21 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import DraftJob, Post
+
+
+@admin.register(Post)
+class PostAdmin(admin.ModelAdmin):
+    list_display = ('post_id', 'topic', 'status', 'schedule_time', 'completed_at', 'attempts')
+    list_filter = ('status', 'archive_segment')
+    search_fields = ('post_id', 'topic')
+    ordering = ('-schedule_time',)
+    # Rows are mirrored from scheduled_posts.json; edits belong in the dashboard or CLI
+    readonly_fields = [field.name for field in Post._meta.fields]
+
+
+@admin.register(DraftJob)
+class DraftJobAdmin(admin.ModelAdmin):
+    list_display = ('job_id', 'topic', 'status', 'with_image', 'created_at', 'post_id')
+    list_filter = ('status',)
+    search_fields = ('topic',)
+    ordering = ('-created_at',)
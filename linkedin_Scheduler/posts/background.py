@@ -0,0 +1,34 @@
+"""
+Background work for the dashboard
+
+Views hand anything slow to a single worker thread so request threads only
+validate and write. Failures are logged; they never reach the request.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+
+_executor = None
+_lock = threading.Lock()
+
+
+def submit(fn, *args, **kwargs):
+    """Queue fn(*args, **kwargs) on the dashboard's background worker"""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dashboard-bg')
+    return _executor.submit(_run, fn, args, kwargs)
+
+
+def _run(fn, args, kwargs):
+    try:
+        return fn(*args, **kwargs)
+    except Exception as e:
+        print(f"[ERROR] Background job {getattr(fn, '__name__', fn)} failed: {e}")
+        raise
+    finally:
+        # The worker thread keeps its own database connection between jobs
+        close_old_connections()
@@ -0,0 +1,71 @@
+"""
+Draft generation jobs
+
+ContentGenerator calls take 10-60 s (more with an image), so the dashboard
+records a DraftJob, returns its id at once and generates on a small thread
+pool of its own; clients poll the job until it is done or failed.
+"""
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from .models import DraftJob
+
+CONFIG_FILE = os.path.join(BASE_DIR, 'config.json')
+MAX_WORKERS = 2  # concurrent generations; more only queue at the OpenAI rate limit
+
+_executor = None
+_generator = None
+_lock = threading.Lock()
+
+
+def submit_draft(topic, with_image=False):
+    """Record a draft job and queue its generation; returns the DraftJob"""
+    global _executor
+    job = DraftJob.objects.create(topic=topic, with_image=with_image)
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='draft-gen')
+    _executor.submit(_generate, job.pk)
+    return job
+
+
+def _content_generator():
+    """Shared ContentGenerator, imported on first use so the dashboard starts without OpenAI"""
+    global _generator
+    with _lock:
+        if _generator is None:
+            from content_generator import ContentGenerator
+            _generator = ContentGenerator(CONFIG_FILE)
+        return _generator
+
+
+def _generate(pk):
+    try:
+        DraftJob.objects.filter(pk=pk).update(status='running')
+        job = DraftJob.objects.get(pk=pk)
+        try:
+            draft = _content_generator().generate_post(job.topic, job.with_image)
+        except Exception as e:
+            print(f"[ERROR] Draft {job.job_id} failed: {e}")
+            DraftJob.objects.filter(pk=pk).update(status='failed', error=str(e), finished_at=timezone.now())
+            return
+        DraftJob.objects.filter(pk=pk).update(status='done', draft=draft, image_path=draft.get('image_path'),
+                                              finished_at=timezone.now())
+    finally:
+        close_old_connections()
+
+
+def draft_text(draft):
+    """Post text for a generated draft: the content followed by its hashtags"""
+    hashtags = ' '.join(draft.get('hashtags') or [])
+    return f"{draft['content']}\n\n{hashtags}" if hashtags else draft['content']
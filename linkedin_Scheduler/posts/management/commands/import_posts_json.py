@@ -0,0 +1,29 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import Post
+from posts.sync import POSTS_FILE, ensure_synced
+
+
+class Command(BaseCommand):
+    help = 'Import scheduled_posts.json and the post archive into the Post table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=POSTS_FILE,
+                            help='Posts file to import (its post_archive/ directory is imported too)')
+
+    def handle(self, *args, **options):
+        posts_file = os.path.abspath(options['file'])
+        if not os.path.exists(posts_file):
+            raise CommandError(f"Posts file not found: {posts_file}")
+
+        started = time.perf_counter()
+        result = ensure_synced(posts_file, force=True)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"[SUCCESS] Imported {result['live']} live and {result['archive']} archived posts "
+            f"in {elapsed:.1f}s ({Post.objects.count()} posts in the database)"
+        ))
@@ -0,0 +1,32 @@
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from metrics import REGISTRY
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'linkedin_dashboard_request_seconds', 'Dashboard request latency', ('view', 'method', 'status'),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+
+
+class RequestMetricsMiddleware:
+    """Record the latency of every dashboard request by view name"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            view=match.url_name if match and match.url_name else 'unmatched',
+            method=request.method,
+            status=response.status_code
+        )
+        return response
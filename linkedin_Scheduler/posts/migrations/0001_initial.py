@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Post',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_id', models.CharField(max_length=200, unique=True)),
+                ('topic', models.CharField(max_length=500)),
+                ('content', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('scheduled', 'Scheduled'), ('retrying', 'Retrying'), ('completed', 'Completed'), ('failed', 'Failed'), ('error', 'Error'), ('expired', 'Expired'), ('cancelled', 'Cancelled'), ('dead_letter', 'Dead letter'), ('unknown', 'Unknown')], max_length=20)),
+                ('account', models.CharField(blank=True, max_length=100, null=True)),
+                ('schedule_time', models.DateTimeField(null=True)),
+                ('next_attempt_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('archive_segment', models.CharField(blank=True, max_length=7, null=True)),
+                ('created_at', models.DateTimeField(blank=True, null=True)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'schedule_time'], name='post_status_schedule_idx'), models.Index(fields=['archive_segment', 'finished_at'], name='post_archive_finished_idx'), models.Index(fields=['status', 'finished_at'], name='post_status_finished_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_draftjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='draftjob',
+            name='image_path',
+            field=models.CharField(blank=True, max_length=500, null=True),
+        ),
+    ]
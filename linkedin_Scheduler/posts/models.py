@@ -1,3 +1,128 @@
+import uuid
+
 from django.db import models
 
-# Create your models here.
+
+class Post(models.Model):
+    """
+    Dashboard copy of a scheduled post
+
+    scheduled_posts.json (written by the scheduler and CLI) and the post
+    archive stay the source of truth; posts.sync mirrors them into this table
+    so the dashboard can answer listings and statistics with indexed queries.
+    """
+
+    STATUS_CHOICES = [
+        ('scheduled', 'Scheduled'),
+        ('retrying', 'Retrying'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+        ('error', 'Error'),
+        ('expired', 'Expired'),
+        ('cancelled', 'Cancelled'),
+        ('dead_letter', 'Dead letter'),
+        ('unknown', 'Unknown'),
+    ]
+
+    post_id = models.CharField(max_length=200, unique=True)
+    topic = models.CharField(max_length=500)
+    content = models.TextField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    account = models.CharField(max_length=100, null=True, blank=True)
+    schedule_time = models.DateTimeField(null=True)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    # completed_at, or schedule_time for posts that never ran; orders the history
+    finished_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(null=True, blank=True)
+    # Monthly archive segment (YYYY-MM) once the post has left the live file
+    archive_segment = models.CharField(max_length=7, null=True, blank=True)
+    created_at = models.DateTimeField(null=True, blank=True)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'schedule_time'], name='post_status_schedule_idx'),
+            models.Index(fields=['archive_segment', 'finished_at'], name='post_archive_finished_idx'),
+            models.Index(fields=['status', 'finished_at'], name='post_status_finished_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} ({self.status})"
+
+    def to_dict(self):
+        """The stored (JSON) shape of the post, times in the scheduler's local time"""
+        def local(value):
+            return value.astimezone().replace(tzinfo=None).isoformat() if value else None
+
+        post = {
+            'id': self.post_id,
+            'topic': self.topic,
+            'schedule_time': local(self.schedule_time),
+            'content': self.content,
+            'status': self.status,
+        }
+        if self.account:
+            post['account'] = self.account
+        if self.attempts:
+            post['attempts'] = self.attempts
+        for field in ('next_attempt_at', 'completed_at', 'created_at'):
+            value = getattr(self, field)
+            if value:
+                post[field] = local(value)
+        if self.last_error:
+            post['last_error'] = self.last_error
+        return post
+
+
+class DraftJob(models.Model):
+    """
+    A request to generate a post draft (text, hashtags, optional image)
+
+    posts.drafts runs the generation on a background thread and stores the
+    result here, so any dashboard process can answer status polls.
+    """
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    job_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    topic = models.CharField(max_length=500)
+    with_image = models.BooleanField(default=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    draft = models.JSONField(null=True, blank=True)
+    # Local file of the generated image, published with the draft
+    image_path = models.CharField(max_length=500, null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    # Set once the draft has been scheduled
+    post_id = models.CharField(max_length=200, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.job_id} ({self.status})"
+
+    def to_dict(self):
+        job = {
+            'job_id': str(self.job_id),
+            'topic': self.topic,
+            'with_image': self.with_image,
+            'status': self.status,
+            'created_at': self.created_at.isoformat(),
+        }
+        if self.draft is not None:
+            job['draft'] = self.draft
+        if self.image_path:
+            job['image_path'] = self.image_path
+        if self.error:
+            job['error'] = self.error
+        if self.post_id:
+            job['post_id'] = self.post_id
+        if self.finished_at:
+            job['finished_at'] = self.finished_at.isoformat()
+        return job
@@ -0,0 +1,246 @@
+"""
+Mirror scheduled_posts.json and the post archive into the Post table
+
+The scheduler and CLI keep writing the JSON file and the archive; the
+dashboard calls sync_in_background() before reading, which costs two stat()
+calls when nothing changed. When a file did change the sync runs on the
+background worker and requests keep serving the previous generation of the
+table until it finishes; only the first sync in a process blocks. From the
+live file only posts whose contents changed are upserted (each post's hash is
+kept from the last sync), and only the archive segments whose counts differ
+from the table are decompressed, importing just their new rows.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from post_archive import PostArchive, default_archive_dir
+from post_record import PostRecord, iter_post_dicts
+
+from . import background
+from .models import Post
+
+POSTS_FILE = settings.POSTS_FILE
+BATCH_SIZE = 1000
+
+_UPDATE_FIELDS = ['topic', 'content', 'status', 'account', 'schedule_time', 'next_attempt_at',
+                  'completed_at', 'finished_at', 'attempts', 'last_error', 'archive_segment', 'created_at']
+
+_lock = threading.Lock()
+_signatures = {}  # path -> (mtime_ns, size) at the last sync in this process
+_row_hashes = {}  # posts file -> {post_id: hash of the stored post} at its last sync
+_generation = 0  # bumped whenever a sync changed the table
+_view_cache = {}  # name -> (generation, value)
+_queue_lock = threading.Lock()
+_queued = set()  # posts files with a background sync waiting to start
+
+
+def _aware(value):
+    """Stored times are naive local times; Django keeps aware UTC"""
+    return value.astimezone() if value is not None else None
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _to_model(record, archive_segment=None):
+    created_at = (record.extra or {}).get('created_at')
+    try:
+        created_at = datetime.fromisoformat(created_at) if created_at else None
+    except ValueError:
+        created_at = None
+    return Post(
+        post_id=record.id,
+        topic=record.topic or '',
+        content=record.content,
+        status=record.status.value,
+        account=record.account,
+        schedule_time=_aware(record.schedule_time),
+        next_attempt_at=_aware(record.next_attempt_at),
+        completed_at=_aware(record.completed_at),
+        finished_at=_aware(record.completed_at or record.schedule_time),
+        attempts=record.attempts or 0,
+        last_error=record.last_error,
+        archive_segment=archive_segment,
+        created_at=_aware(created_at),
+    )
+
+
+def _upsert(models):
+    for start in range(0, len(models), BATCH_SIZE):
+        Post.objects.bulk_create(
+            models[start:start + BATCH_SIZE],
+            update_conflicts=True,
+            unique_fields=['post_id'],
+            update_fields=_UPDATE_FIELDS,
+        )
+
+
+def _row_hash(post):
+    return hashlib.sha1(json.dumps(post, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def sync_live(posts_file=POSTS_FILE, full=False):
+    """
+    Upsert the posts of the live file that changed since the last sync and
+    drop live rows for posts it no longer has (every post and a table-wide
+    check the first time, or if full)
+    """
+    previous = None if full else _row_hashes.get(posts_file)
+    hashes = {}
+    models = []
+    for post in iter_post_dicts(posts_file) if os.path.exists(posts_file) else ():
+        row_hash = hashes[post.get('id')] = _row_hash(post)
+        if previous is None or previous.get(post.get('id')) != row_hash:
+            models.append(_to_model(PostRecord.from_dict(post)))
+
+    with transaction.atomic():
+        _upsert(models)
+        # Gone from the live file without reaching the archive: deleted
+        if previous is None:
+            stale = [post_id for post_id in Post.objects.filter(archive_segment__isnull=True)
+                     .values_list('post_id', flat=True) if post_id not in hashes]
+        else:
+            stale = [post_id for post_id in previous if post_id not in hashes]
+        for start in range(0, len(stale), BATCH_SIZE):
+            Post.objects.filter(post_id__in=stale[start:start + BATCH_SIZE],
+                                archive_segment__isnull=True).delete()
+    _row_hashes[posts_file] = hashes
+    return len(models)
+
+
+def sync_archive(archive_dir, full=False):
+    """Import archive segments whose post counts differ from the table (all of them if full)"""
+    archive = PostArchive(archive_dir)
+    segments = archive.segments()
+    if not segments:
+        return 0
+
+    imported = {} if full else dict(Post.objects.filter(archive_segment__isnull=False)
+                                     .values_list('archive_segment').annotate(count=Count('pk')))
+    total = 0
+    for segment, entry in segments.items():
+        if imported.get(segment) == entry['count']:
+            continue
+        # Segments are append-only, so rows past the imported count are the new ones
+        rows = archive.read_segment(segment)[imported.get(segment, 0):]
+        models = [_to_model(PostRecord.from_dict(post), segment) for post in rows]
+        with transaction.atomic():
+            _upsert(models)
+        total += len(models)
+    return total
+
+
+def ensure_synced(posts_file=POSTS_FILE, force=False):
+    """
+    Bring the Post table up to date with the files if either changed
+
+    Runs in the caller's thread; request paths use sync_in_background().
+
+    Returns:
+        dict: rows upserted from the 'archive' and 'live' file (0 when unchanged)
+    """
+    global _generation
+    archive_dir = default_archive_dir(posts_file)
+    index_path = PostArchive(archive_dir).index_path
+    result = {'archive': 0, 'live': 0}
+
+    with _lock:
+        # Archive first: posts it took over must be marked archived before
+        # the live pass treats their absence from the live file as a delete
+        changed = False
+        signature = _signature(index_path)
+        if force or signature != _signatures.get(index_path):
+            result['archive'] = sync_archive(archive_dir, full=force)
+            _signatures[index_path] = signature
+            changed = True
+
+        signature = _signature(posts_file)
+        if force or signature != _signatures.get(posts_file):
+            result['live'] = sync_live(posts_file, full=force)
+            _signatures[posts_file] = signature
+            changed = True
+
+        if changed:
+            _generation += 1
+    return result
+
+
+def sync_in_background(posts_file=POSTS_FILE):
+    """
+    Queue ensure_synced() on the background worker if either file changed
+
+    Callers go on reading the table as it is, the previous generation, until
+    the sync finishes. The first sync in a process runs here and now, so a
+    fresh process never serves an empty table.
+    """
+    if posts_file not in _row_hashes:
+        ensure_synced(posts_file)
+        return
+
+    index_path = PostArchive(default_archive_dir(posts_file)).index_path
+    if all(_signature(path) == _signatures.get(path) for path in (index_path, posts_file)):
+        return
+    with _queue_lock:
+        if posts_file in _queued:
+            return
+        _queued.add(posts_file)
+    background.submit(_queued_sync, posts_file)
+
+
+def _queued_sync(posts_file):
+    # Cleared before the sync starts: a change made while it runs queues the next one
+    with _queue_lock:
+        _queued.discard(posts_file)
+    ensure_synced(posts_file)
+
+
+def cached_view(name, build, posts_file=POSTS_FILE):
+    """
+    Value derived from the Post table, rebuilt only after the files change
+
+    Dashboard polls between changes cost the two stat() calls of
+    sync_in_background(); build() runs once per generation in this process.
+    """
+    sync_in_background(posts_file)
+    generation = _generation
+    hit = _view_cache.get(name)
+    if hit is not None and hit[0] == generation:
+        return hit[1]
+    value = build()
+    _view_cache[name] = (generation, value)
+    return value
+
+
+def current_generation(posts_file=POSTS_FILE):
+    """Queue a sync if the files changed and return the generation the table is at"""
+    sync_in_background(posts_file)
+    return _generation
+
+
+def synced_modified(posts_file=POSTS_FILE):
+    """
+    Latest modification time (epoch seconds) of the posts file and archive
+    index as of the last sync, i.e. of what the table holds rather than of
+    files it may not have caught up with yet
+    """
+    index_path = PostArchive(default_archive_dir(posts_file)).index_path
+    mtimes = [_signatures[path][0] / 1e9 for path in (posts_file, index_path) if _signatures.get(path)]
+    return max(mtimes, default=0)
@@ -1,3 +1,344 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from unittest import mock
+
 from django.test import TestCase
+from django.urls import reverse
+
+from . import drafts, sync, views
+from .models import DraftJob, Post
+
+
+def _post(post_id, status='scheduled', **extra):
+    post = {'id': post_id, 'topic': f"Topic {post_id}", 'schedule_time': '2030-01-01T09:00:00',
+            'content': None, 'status': status}
+    post.update(extra)
+    return post
+
+
+class DashboardTestCase(TestCase):
+    """Points the views at a throwaway posts file, archive and config"""
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='dashboard-test-')
+        self.addCleanup(shutil.rmtree, self.work_dir, ignore_errors=True)
+        self.posts_file = os.path.join(self.work_dir, 'scheduled_posts.json')
+        config_file = os.path.join(self.work_dir, 'config.json')
+        with open(config_file, 'w', encoding='utf-8') as f:
+            json.dump({'scheduler': {'slot_policy': 'off'}}, f)
+        self.store = views.PostStore(self.posts_file, config_file=config_file)
+
+        for name, value in (('POSTS_FILE', self.posts_file), ('STORE', self.store),
+                            ('ARCHIVE', views.PostArchive(views.default_archive_dir(self.posts_file))),
+                            ('RUN_DIR', os.path.join(self.work_dir, 'scheduler_run'))):
+            patcher = mock.patch.object(views, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Syncs queued by a request finish before the next request
+        patcher = mock.patch.object(sync.background, 'submit', lambda fn, *args: fn(*args))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(sync._row_hashes.pop, self.posts_file, None)
+        self.addCleanup(sync._signatures.pop, self.posts_file, None)
+        self.addCleanup(sync._view_cache.clear)
+        output = contextlib.redirect_stdout(io.StringIO())
+        output.__enter__()
+        self.addCleanup(output.__exit__, None, None, None)
+
+    def post_json(self, url, body):
+        return self.client.post(url, json.dumps(body), content_type='application/json')
+
+
+class _FakeGenerator:
+    def __init__(self, error=None):
+        self.error = error
+
+    def generate_post(self, topic, with_image=False):
+        if self.error:
+            raise RuntimeError(self.error)
+        draft = {'content': f"About {topic}", 'hashtags': ['#one'], 'topic': topic}
+        if with_image:
+            draft['image_path'] = '/tmp/draft.png'
+        return draft
+
+
+class _InlineExecutor:
+    """Runs draft generation in the request, so the test sees the finished job"""
+
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+class DraftTest(DashboardTestCase):
+    def setUp(self):
+        super().setUp()
+        for name, value in (('_executor', _InlineExecutor()), ('_generator', _FakeGenerator())):
+            patcher = mock.patch.object(drafts, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def request_draft(self, **body):
+        response = self.post_json(reverse('api_drafts'), {'topic': 'Testing', **body})
+        self.assertEqual(response.status_code, 202)
+        return response.json()['job_id']
+
+    def test_draft_is_generated_and_can_be_polled(self):
+        job_id = self.request_draft(with_image=True)
+        job = self.client.get(reverse('api_draft', args=[job_id])).json()
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(job['draft']['content'], 'About Testing')
+        self.assertEqual(job['image_path'], '/tmp/draft.png')
+
+        listed = self.client.get(reverse('api_drafts')).json()['jobs']
+        self.assertEqual([job['job_id'] for job in listed], [job_id])
+
+    def test_failed_generation_is_reported(self):
+        drafts._generator.error = 'quota exceeded'
+        job_id = self.request_draft()
+        job = self.client.get(reverse('api_draft', args=[job_id])).json()
+        self.assertEqual((job['status'], job['error']), ('failed', 'quota exceeded'))
+
+    def test_topic_is_required(self):
+        self.assertEqual(self.post_json(reverse('api_drafts'), {'topic': ' '}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('api_draft', args=[uuid.uuid4()])).status_code, 404)
+
+    def test_scheduled_draft_carries_its_image(self):
+        job_id = self.request_draft(with_image=True)
+        url = reverse('api_draft_schedule', args=[job_id])
+        response = self.post_json(url, {'schedule_time': '2099-01-01 09:00'})
+        self.assertEqual(response.status_code, 200)
+
+        post = self.store.load()[0]
+        self.assertEqual(post['id'], response.json()['post_id'])
+        self.assertEqual(post['content'], 'About Testing\n\n#one')
+        self.assertEqual(post['image_path'], '/tmp/draft.png')
+        self.assertEqual(DraftJob.objects.get(job_id=job_id).post_id, post['id'])
+        # A second click does not schedule it again
+        self.assertEqual(self.post_json(url, {'schedule_time': '2099-01-02 09:00'}).status_code, 409)
+        self.assertEqual(len(self.store.load()), 1)
+
+    def test_unfinished_and_failed_drafts_cannot_be_scheduled(self):
+        queued = DraftJob.objects.create(topic='Later')
+        drafts._generator.error = 'quota exceeded'
+        failed = self.request_draft()
+        for job_id, status in ((queued.job_id, 'queued'), (failed, 'failed')):
+            response = self.post_json(reverse('api_draft_schedule', args=[job_id]),
+                                      {'schedule_time': '2099-01-01 09:00'})
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(response.json()['error'], f'Draft is {status}')
+        self.assertEqual(self.store.load(), [])
+
+    def test_rejected_time_releases_the_draft(self):
+        job_id = self.request_draft()
+        url = reverse('api_draft_schedule', args=[job_id])
+        self.assertEqual(self.post_json(url, {'schedule_time': '2000-01-01 09:00'}).status_code, 400)
+        self.assertIsNone(DraftJob.objects.get(job_id=job_id).post_id)
+        self.assertEqual(self.post_json(url, {'schedule_time': '2099-01-01 09:00'}).status_code, 200)
+
+
+class PostsApiTest(DashboardTestCase):
+    def setUp(self):
+        super().setUp()
+        self.store.save([
+            _post('a', schedule_time='2030-01-01T09:00:00', topic='Weekly AI roundup'),
+            _post('b', schedule_time='2030-01-02T09:00:00'),
+            _post('c', status='retrying', schedule_time='2030-01-03T09:00:00', next_attempt_at='2030-01-03T10:00:00'),
+            _post('d', schedule_time='2030-01-04T09:00:00', topic='AI ethics'),
+            _post('done', status='completed', schedule_time='2029-12-01T09:00:00', completed_at='2029-12-01T09:00:05'),
+            _post('late', schedule_time='2000-01-01T09:00:00'),
+        ])
+
+    def get(self, **params):
+        return self.client.get(reverse('api_posts'), params)
+
+    def ids(self, **params):
+        response = self.get(**params)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        return [post['id'] for post in body['posts']], body['next_cursor']
+
+    def test_pending_posts_page_oldest_first(self):
+        self.assertEqual(self.ids(), (['a', 'b', 'c', 'd'], None))
+        first, cursor = self.ids(limit=3)
+        self.assertEqual(first, ['a', 'b', 'c'])
+        self.assertEqual(self.ids(limit=3, cursor=cursor), (['d'], None))
+
+    def test_filters(self):
+        self.assertEqual(self.ids(status='retrying')[0], ['c'])
+        self.assertEqual(self.ids(q='ai')[0], ['a', 'd'])
+        self.assertEqual(self.ids(**{'from': '2030-01-02', 'to': '2030-01-03'})[0], ['b', 'c'])
+        for params in ({'status': 'bogus'}, {'cursor': 'not-a-cursor'}, {'limit': '0'}, {'from': 'soon'}):
+            self.assertEqual(self.get(**params).status_code, 400)
+
+    def test_history_lists_every_post_newest_first(self):
+        views.ARCHIVE.archive([_post('old', status='failed', schedule_time='2029-06-01T09:00:00',
+                                     completed_at='2029-06-01T09:00:05')])
+        ids, cursor = self.ids(history=1, limit=4)
+        self.assertEqual(ids, ['d', 'c', 'b', 'a'])
+        self.assertEqual(self.ids(history=1, limit=4, cursor=cursor), (['done', 'old', 'late'], None))
+        self.assertEqual(self.ids(history=1, status='failed')[0], ['old'])
+
+    def test_unchanged_page_is_not_modified(self):
+        response = self.get()
+        etag = response['ETag']
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        self.assertEqual(self.client.get(reverse('api_posts'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(reverse('api_posts'), HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+                         .status_code, 304)
+
+        self.store.update(lambda posts: posts + [_post('e', schedule_time='2030-01-05T09:00:00')])
+        modified = sync.synced_modified(self.posts_file)
+        os.utime(self.posts_file, (modified + 5, modified + 5))
+        response = self.client.get(reverse('api_posts'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['posts'][-1]['id'], 'e')
+
+
+class BatchApiTest(DashboardTestCase):
+    def setUp(self):
+        super().setUp()
+        self.store.save([_post('a'), _post('b', schedule_time='2030-01-02T09:00:00')])
+
+    def batch(self, operations, **options):
+        return self.post_json(reverse('api_batch'), {'operations': operations, **options})
+
+    def test_operations_are_applied_in_one_write(self):
+        response = self.batch([
+            {'op': 'create', 'topic': 'New', 'schedule_time': '2030-01-03 09:00'},
+            {'op': 'update', 'post_id': 'a', 'topic': 'Renamed'},
+            {'op': 'reschedule', 'post_id': 'b', 'schedule_time': '2030-01-05 09:00'},
+            {'op': 'delete', 'post_id': 'a'},
+        ])
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((body['success'], body['committed'], body['applied']), (True, True, 4))
+        self.assertEqual(self.store.version(), 2)
+        posts = {post['id']: post for post in self.store.load()}
+        self.assertEqual(sorted(posts), sorted(['b', body['results'][0]['post_id']]))
+        self.assertEqual(posts['b']['schedule_time'], '2030-01-05T09:00:00')
+
+    def test_one_failure_rejects_the_batch_unless_partial(self):
+        operations = [{'op': 'delete', 'post_id': 'a'}, {'op': 'update', 'post_id': 'missing', 'topic': 'X'}]
+        body = self.batch(operations).json()
+        self.assertEqual((body['success'], body['committed'], body['rejected']), (False, False, 1))
+        self.assertIn('not found', body['results'][1]['error'])
+        self.assertEqual(len(self.store.load()), 2)
+
+        self.assertFalse(self.batch(operations, dry_run=True, allow_partial=True).json()['committed'])
+        self.assertEqual(len(self.store.load()), 2)
+
+        body = self.batch(operations, allow_partial=True).json()
+        self.assertEqual((body['committed'], body['applied']), (True, 1))
+        self.assertEqual([post['id'] for post in self.store.load()], ['b'])
+
+    def test_malformed_requests_are_refused(self):
+        self.assertEqual(self.client.get(reverse('api_batch')).status_code, 405)
+        self.assertEqual(self.client.post(reverse('api_batch'), 'not json', content_type='application/json')
+                         .status_code, 400)
+        self.assertEqual(self.batch([]).status_code, 400)
+        too_many = [{'op': 'delete', 'post_id': 'a'}] * (views.BATCH_MAX_OPERATIONS + 1)
+        self.assertEqual(self.batch(too_many).status_code, 400)
+
+    def test_running_scheduler_applies_the_batch(self):
+        report = {'committed': True, 'applied': 1, 'rejected': 0, 'results': [{'ok': True}]}
+        with mock.patch.object(views, 'send_control_request', return_value={'ok': True, 'result': report}) as send:
+            body = self.batch([{'op': 'delete', 'post_id': 'a'}]).json()
+        send.assert_called_once_with(self.posts_file, 'batch', operations=[{'op': 'delete', 'post_id': 'a'}],
+                                     allow_partial=False, dry_run=False)
+        self.assertEqual(body['applied'], 1)
+        self.assertEqual(len(self.store.load()), 2)
+
+        with mock.patch.object(views, 'send_control_request', return_value={'ok': False, 'error': 'busy'}):
+            self.assertEqual(self.batch([{'op': 'delete', 'post_id': 'a'}]).status_code, 502)
+
+
+class StatsTest(DashboardTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(views, '_last_overdue_sweep', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store.save([_post('a'), _post('b', status='retrying', next_attempt_at='2030-01-01T10:00:00'),
+                         _post('c', status='completed'), _post('missed', schedule_time='2000-01-01T09:00:00')])
+        views.ARCHIVE.archive([_post('old', status='failed', completed_at='2029-06-01T09:00:05'),
+                               _post('older', status='completed', completed_at='2029-05-01T09:00:05')])
+
+    def stats(self):
+        body = self.client.get(reverse('api_stats')).json()
+        return body['scheduled_count'], body['completed_count'], body['failed_count']
+
+    def test_counts_combine_the_store_and_the_archive(self):
+        with mock.patch.object(views, 'read_heartbeats', return_value=[{'state': 'running'}]):
+            self.assertEqual(self.stats(), (3, 2, 1))
+            self.assertEqual(self.stats(), (3, 2, 1))
+        # A running scheduler sweeps its own posts
+        self.assertEqual(self.store.load()[3]['status'], 'scheduled')
+
+    def test_missed_posts_are_expired_when_no_scheduler_runs(self):
+        self.assertEqual(self.stats(), (3, 2, 1))
+        self.assertEqual(self.store.load()[3]['status'], 'expired')
+        self.assertEqual(self.stats(), (2, 2, 2))
+
+
+class SyncTest(TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='dashboard-sync-test-')
+        self.posts_file = os.path.join(self.work_dir, 'scheduled_posts.json')
+        self.addCleanup(shutil.rmtree, self.work_dir, ignore_errors=True)
+        self.addCleanup(sync._row_hashes.pop, self.posts_file, None)
+        self.addCleanup(sync._signatures.pop, self.posts_file, None)
+
+    def write(self, posts):
+        with open(self.posts_file, 'w', encoding='utf-8') as f:
+            json.dump(posts, f)
+
+    def upserted_ids(self, full=False):
+        with mock.patch.object(sync, '_upsert', wraps=sync._upsert) as upsert:
+            sync.sync_live(self.posts_file, full=full)
+        return sorted(model.post_id for model in upsert.call_args.args[0])
+
+    def test_only_changed_posts_are_upserted(self):
+        self.write([_post('a'), _post('b'), _post('c')])
+        self.assertEqual(self.upserted_ids(), ['a', 'b', 'c'])
+
+        self.write([_post('a'), _post('b', status='cancelled'), _post('c'), _post('d')])
+        self.assertEqual(self.upserted_ids(), ['b', 'd'])
+        self.assertEqual(Post.objects.get(post_id='b').status, 'cancelled')
+        self.assertEqual(self.upserted_ids(), [])
+        self.assertEqual(self.upserted_ids(full=True), ['a', 'b', 'c', 'd'])
+
+    def test_removed_posts_are_deleted_unless_archived(self):
+        self.write([_post('a'), _post('b'), _post('c')])
+        sync.sync_live(self.posts_file)
+        Post.objects.filter(post_id='c').update(archive_segment='2030-01')
+
+        self.write([_post('a')])
+        sync.sync_live(self.posts_file)
+        self.assertEqual(sorted(Post.objects.values_list('post_id', flat=True)), ['a', 'c'])
+
+    def test_reads_queue_one_sync_and_serve_the_previous_generation(self):
+        self.write([_post('a')])
+        with mock.patch.object(sync.background, 'submit') as submit:
+            generation = sync.current_generation(self.posts_file)  # the first sync blocks
+            submit.assert_not_called()
+            self.assertTrue(Post.objects.filter(post_id='a').exists())
+            modified = sync.synced_modified(self.posts_file)
+
+            self.write([_post('a'), _post('b')])
+            os.utime(self.posts_file, (modified + 5, modified + 5))
+            self.assertEqual(sync.current_generation(self.posts_file), generation)
+            self.assertEqual(sync.current_generation(self.posts_file), generation)
+            submit.assert_called_once_with(sync._queued_sync, self.posts_file)
+            self.assertFalse(Post.objects.filter(post_id='b').exists())
+            self.assertEqual(sync.synced_modified(self.posts_file), modified)
 
-# Create your tests here.
+        sync._queued_sync(self.posts_file)
+        self.assertEqual(sync.current_generation(self.posts_file), generation + 1)
+        self.assertTrue(Post.objects.filter(post_id='b').exists())
+        self.assertEqual(sync.synced_modified(self.posts_file), modified + 5)
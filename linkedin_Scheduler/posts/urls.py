@@ -24,5 +24,13 @@ urlpatterns = [
     path('api/delete-post/', views.api_delete_post, name='api_delete_post'),
     path('api/update-post/', views.api_update_post, name='api_update_post'),
     path('api/reschedule-post/', views.api_reschedule_post, name='api_reschedule_post'),
+    path('api/batch/', views.api_batch, name='api_batch'),
+    path('api/drafts/', views.api_drafts, name='api_drafts'),
+    path('api/drafts/<uuid:job_id>/', views.api_draft, name='api_draft'),
+    path('api/drafts/<uuid:job_id>/schedule/', views.api_draft_schedule, name='api_draft_schedule'),
     path('api/stats/', views.api_get_stats, name='api_stats'),
+    path('api/events/', views.api_events, name='api_events'),
+    path('api/history/', views.api_get_history, name='api_history'),
+    path('api/scheduler-status/', views.api_scheduler_status, name='api_scheduler_status'),
+    path('metrics/', views.metrics, name='metrics'),
 ]
@@ -1,11 +1,24 @@
 import os
 import sys
-import subprocess
 import json
-from datetime import datetime
+import time
+import asyncio
+import hashlib
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+from django.conf import settings
 from django.shortcuts import render, redirect
+from django.urls import reverse
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 
 # Add the parent directory to sys.path to import our custom scheduler
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -13,10 +26,40 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__fil
 
 sys.path.append(BASE_DIR)
 
-try:
-    from custom_scheduler import CustomPostScheduler
-except ImportError:
-    CustomPostScheduler = None
+from control_socket import send_control_request
+from post_store import PostStore
+from post_record import PostStatus
+from post_archive import PostArchive, default_archive_dir
+from metrics import REGISTRY, CONTENT_TYPE
+from heartbeat import read_heartbeats, default_run_dir
+
+from . import background
+from .drafts import submit_draft, draft_text
+from .models import DraftJob, Post
+from .sync import ensure_synced, sync_in_background, cached_view, current_generation, synced_modified
+
+POSTS_FILE = settings.POSTS_FILE
+FAILED_STATUSES = [status.value for status in PostStatus if status.is_failed]
+STORE = PostStore(POSTS_FILE, config_file=os.path.join(BASE_DIR, 'config.json'))
+ARCHIVE = PostArchive(default_archive_dir(POSTS_FILE))
+RUN_DIR = default_run_dir(POSTS_FILE)
+
+# Dashboard event stream: how often the store is checked, how long an idle
+# connection waits before a keepalive comment, and how long one stream lives
+# before the browser reconnects (bounds the threads held under runserver/WSGI)
+EVENT_POLL_SECONDS = 2
+EVENT_KEEPALIVE_SECONDS = 15
+EVENT_STREAM_SECONDS = 300
+EVENT_RETRY_MS = 3000
+
+POSTS_PAGE_SIZE = 100
+POSTS_PAGE_MAX = 500
+BATCH_MAX_OPERATIONS = 5000
+DRAFTS_LISTED = 20
+DRAFT_SCHEDULING = 'scheduling'  # placeholder post_id while a draft is being scheduled
+OVERDUE_SWEEP_SECONDS = 30  # at most one overdue sweep per interval from stats polls
+
+_last_overdue_sweep = None  # time.monotonic() of the last sweep request
 
 def home(request):
     """Display the home page with scheduling form and stats"""
@@ -59,148 +102,246 @@ def schedule_post(request):
             messages.error(request, 'Invalid date/time format!')
             return redirect('home')
         
-        # Try Method 1: Use CustomPostScheduler directly
-        success = False
-        
-        if CustomPostScheduler:
-            try:
-                scheduler = CustomPostScheduler()
-                success = scheduler.add_post(
-                    topic=topic,
-                    schedule_time=schedule_datetime,
-                    content=content if content else None
-                )
-                
-                if success:
-                    messages.success(request, f'✅ Post scheduled successfully for {scheduled_dt.strftime("%Y-%m-%d at %H:%M")}!')
-                else:
-                    messages.error(request, '❌ Failed to schedule post. Please try again.')
-                    
-            except Exception as e:
-                print(f"Error with CustomPostScheduler: {e}")
-                success = False
-        
-        # Method 2: Fallback to subprocess call
-        if not success:
-            try:
-                # Build command
-                cmd = [
-                    sys.executable,
-                    os.path.join(BASE_DIR, 'schedule_post.py'),
-                    'add',
-                    '--topic', topic,
-                    '--time', schedule_datetime
-                ]
-                
-                if content:
-                    cmd.extend(['--content', content])
-                
-                # Execute command
-                result = subprocess.run(
-                    cmd,
-                    cwd=BASE_DIR,
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
-                
-                if result.returncode == 0:
-                    messages.success(request, f'✅ Post scheduled successfully for {scheduled_dt.strftime("%Y-%m-%d at %H:%M")}!')
-                    success = True
-                else:
-                    messages.error(request, f'❌ Error scheduling post: {result.stderr}')
-                    
-            except subprocess.TimeoutExpired:
-                messages.error(request, '❌ Scheduling timeout. Please try again.')
-            except Exception as e:
-                messages.error(request, f'❌ Unexpected error: {str(e)}')
-        
-        # Method 3: Direct JSON file manipulation as last resort
-        if not success:
-            try:
-                success = add_post_to_json(topic, schedule_datetime, content)
-                if success:
-                    messages.success(request, f'✅ Post added to schedule for {scheduled_dt.strftime("%Y-%m-%d at %H:%M")}!')
-                else:
-                    messages.error(request, '❌ Failed to save post to schedule.')
-            except Exception as e:
-                messages.error(request, f'❌ Final attempt failed: {str(e)}')
+        try:
+            post = _hand_off_post(topic, schedule_datetime, content or None)
+            scheduled_dt = datetime.fromisoformat(post['schedule_time'])
+            messages.success(request, f'✅ Post scheduled successfully for {scheduled_dt.strftime("%Y-%m-%d at %H:%M")}!')
+        except ValueError as e:
+            messages.error(request, f'❌ {str(e)}')
+        except Exception as e:
+            messages.error(request, f'❌ Could not save the post: {str(e)}')
     
     return redirect('home')
 
-def add_post_to_json(topic, schedule_time, content=None):
-    """Directly add post to scheduled_posts.json file"""
-    try:
-        posts_file = os.path.join(BASE_DIR, 'scheduled_posts.json')
-        
-        # Load existing posts
-        if os.path.exists(posts_file):
-            with open(posts_file, 'r', encoding='utf-8') as f:
-                posts = json.load(f)
-        else:
-            posts = []
-        
-        # Create new post
-        import time as time_module
-        post_id = f"web_post_{len(posts)}_{int(time_module.time())}"
-        
-        # Parse schedule time to ISO format
-        dt = datetime.strptime(schedule_time, '%Y-%m-%d %H:%M')
-        
-        new_post = {
-            'id': post_id,
-            'topic': topic,
-            'schedule_time': dt.isoformat(),
-            'content': content,
-            'status': 'scheduled'
-        }
-        
-        posts.append(new_post)
-        
-        # Save back to file
-        with open(posts_file, 'w', encoding='utf-8') as f:
-            json.dump(posts, f, indent=2, ensure_ascii=False)
-        
-        return True
-        
-    except Exception as e:
-        print(f"Error adding post to JSON: {e}")
-        return False
+def _hand_off_post(topic, schedule_time, content=None, image_path=None):
+    """
+    Hand a post to the running scheduler over its control socket, or append
+    it to the store for the scheduler's next reload. Both are quick; content
+    generation happens when the post runs, not here.
+    
+    Returns:
+        dict: 'id' and 'schedule_time' (ISO) of the new post
+    
+    Raises:
+        ValueError: if the scheduler or the store rejects the post
+    """
+    response = send_control_request(
+        POSTS_FILE, 'add',
+        topic=topic,
+        schedule_time=schedule_time,
+        content=content,
+        image_path=image_path
+    )
+    if response is not None:
+        if not response['ok']:
+            raise ValueError(f'Scheduler rejected the post: {response["error"]}')
+        post = {'id': response['result']['post_id'], 'schedule_time': response['result']['schedule_time']}
+    else:
+        post = STORE.add(topic, schedule_time, content, id_prefix='web_post', image_path=image_path)
+    
+    # Queue a sync of the Post table off the request thread. Until it lands,
+    # reads serve the previous sync, so the redirected page may not list the
+    # new post yet; open event streams pick it up once the sync finishes
+    sync_in_background(POSTS_FILE)
+    return post
 
 def api_get_scheduled_posts(request):
-    """API endpoint to get scheduled posts for dashboard"""
+    """
+    API endpoint to list posts for the dashboard
+    
+    Query parameters:
+        status: comma-separated statuses to keep
+        from, to: schedule time range (ISO date or datetime; a date-only 'to' includes that day)
+        q: case-insensitive topic search
+        history: 1 to list every post (archived included), newest first,
+            instead of the upcoming and retrying ones
+        cursor, limit: keyset pagination; pass back next_cursor for the next page
+    
+    Responses carry an ETag and Last-Modified, and conditional requests
+    get 304 Not Modified while the page is unchanged.
+    """
     try:
-        posts_file = os.path.join(BASE_DIR, 'scheduled_posts.json')
-        
-        if not os.path.exists(posts_file):
-            return JsonResponse({'posts': []})
-        
-        with open(posts_file, 'r', encoding='utf-8') as f:
-            posts = json.load(f)
-        
-        # Filter and format posts
-        current_time = datetime.now()
-        scheduled_posts = []
-        
-        for post in posts:
-            if post.get('status') == 'scheduled':
-                try:
-                    post_time = datetime.fromisoformat(post['schedule_time'])
-                    if post_time > current_time:
-                        scheduled_posts.append({
-                            'id': post['id'],
-                            'topic': post['topic'],
-                            'schedule_time': post_time.strftime('%Y-%m-%d %H:%M'),
-                            'time_remaining': str(post_time - current_time).split('.')[0]
-                        })
-                except:
-                    pass
+        query = _parse_posts_query(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': f'Invalid query: {e}'}, status=400)
+    
+    try:
+        # Read before the page: a sync finishing meanwhile must not give a
+        # stale body the time of files it has not caught up with
+        sync_in_background(POSTS_FILE)
+        modified = synced_modified(POSTS_FILE)
+        if query['history']:
+            posts, next_cursor = _history_page(query)
+        else:
+            posts, next_cursor, dropped_at = _pending_page(query)
+            # A scheduled post leaving the list at its due time changes it too
+            modified = max(modified, dropped_at)
         
-        return JsonResponse({'posts': scheduled_posts})
+        body = json.dumps({'posts': posts, 'next_cursor': next_cursor}).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        response = get_conditional_response(request, etag=etag, last_modified=int(modified))
+        if response is None:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(modified)
+        # Let browsers keep the body but revalidate on every request
+        response['Cache-Control'] = 'private, no-cache'
+        return response
         
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+def _parse_posts_query(params):
+    """
+    Raises:
+        ValueError: for unknown statuses, bad dates, cursors or limits
+    """
+    statuses = [status for status in params.get('status', '').split(',') if status]
+    known = {value for value, _ in Post.STATUS_CHOICES}
+    for status in statuses:
+        if status not in known:
+            raise ValueError(f"unknown status '{status}'")
+    
+    date_from = params.get('from')
+    date_to = params.get('to')
+    date_from = datetime.fromisoformat(date_from).timestamp() if date_from else None
+    if date_to:
+        end = datetime.fromisoformat(date_to)
+        if len(date_to) == 10:
+            end += timedelta(days=1)
+        date_to = end.timestamp()
+    
+    limit = int(params.get('limit', POSTS_PAGE_SIZE))
+    if not 1 <= limit <= POSTS_PAGE_MAX:
+        raise ValueError(f"limit must be between 1 and {POSTS_PAGE_MAX}")
+    
+    return {
+        'statuses': set(statuses),
+        'from': date_from,
+        'to': date_to,
+        'q': params.get('q', '').strip(),
+        'history': params.get('history') in ('1', 'true'),
+        'cursor': _decode_cursor(params['cursor']) if params.get('cursor') else None,
+        'limit': limit,
+    }
+
+def _encode_cursor(schedule_ts, post_id):
+    return urlsafe_b64encode(json.dumps([schedule_ts, post_id]).encode()).decode().rstrip('=')
+
+def _decode_cursor(cursor):
+    try:
+        schedule_ts, post_id = json.loads(urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return float(schedule_ts), str(post_id)
+    except Exception:
+        raise ValueError('malformed cursor')
+
+def _pending_page(query):
+    """
+    One page of upcoming and retrying posts, oldest first, from the cached list
+    
+    Returns:
+        tuple: (posts, next_cursor, epoch time the latest due scheduled post left the list)
+    """
+    pending = cached_view('pending_posts', _build_pending_posts, POSTS_FILE)
+    now = time.time()
+    start = bisect_right(pending, query['cursor'], key=lambda row: row[:2]) if query['cursor'] else 0
+    dropped_at = 0
+    posts = []
+    next_cursor = None
+    
+    for schedule_ts, post_id, post in islice(pending, start, None):
+        if post['status'] == 'scheduled' and schedule_ts <= now:
+            dropped_at = schedule_ts
+            continue
+        if not _matches(query, post, schedule_ts):
+            continue
+        if len(posts) == query['limit']:
+            next_cursor = _encode_cursor(*last)
+            break
+        posts.append(post)
+        last = (schedule_ts, post_id)
+    
+    # Posts due before the cursor may have dropped out as well
+    for schedule_ts, _, post in islice(pending, 0, start):
+        if schedule_ts > now:
+            break
+        if post['status'] == 'scheduled':
+            dropped_at = schedule_ts
+    return posts, next_cursor, dropped_at
+
+def _matches(query, post, schedule_ts):
+    if query['statuses'] and post['status'] not in query['statuses']:
+        return False
+    if query['from'] is not None and schedule_ts < query['from']:
+        return False
+    if query['to'] is not None and schedule_ts >= query['to']:
+        return False
+    return not query['q'] or query['q'].lower() in post['topic'].lower()
+
+def _history_page(query):
+    """One page of every post (archived included), newest first"""
+    sync_in_background(POSTS_FILE)
+    # Posts without a schedule time cannot be placed in the keyset order
+    posts = Post.objects.filter(schedule_time__isnull=False)
+    if query['statuses']:
+        posts = posts.filter(status__in=query['statuses'])
+    if query['from'] is not None:
+        posts = posts.filter(schedule_time__gte=datetime.fromtimestamp(query['from'], dt_timezone.utc))
+    if query['to'] is not None:
+        posts = posts.filter(schedule_time__lt=datetime.fromtimestamp(query['to'], dt_timezone.utc))
+    if query['q']:
+        posts = posts.filter(topic__icontains=query['q'])
+    if query['cursor']:
+        schedule_ts, post_id = query['cursor']
+        schedule_time = datetime.fromtimestamp(schedule_ts, dt_timezone.utc)
+        posts = posts.filter(Q(schedule_time__lt=schedule_time) | Q(schedule_time=schedule_time, post_id__lt=post_id))
+    
+    page = list(posts.order_by('-schedule_time', '-post_id')[:query['limit'] + 1])
+    next_cursor = None
+    if len(page) > query['limit']:
+        page = page[:query['limit']]
+        next_cursor = _encode_cursor(page[-1].schedule_time.timestamp(), page[-1].post_id)
+    return [_post_summary(post) for post in page], next_cursor
+
+def get_scheduled_posts(limit=POSTS_PAGE_SIZE):
+    """First page of upcoming and retrying posts, as pushed to the dashboard"""
+    posts, next_cursor, _ = _pending_page({
+        'statuses': set(), 'from': None, 'to': None, 'q': '', 'cursor': None, 'limit': limit
+    })
+    return posts, next_cursor
+
+def _post_summary(post):
+    """
+    Listing shape of a post; schedule_ts (epoch seconds) lets the page
+    count down on its own, so the summary does not change with time
+    """
+    def local(value):
+        return value.astimezone().strftime('%Y-%m-%d %H:%M') if value else None
+    
+    summary = {
+        'id': post.post_id,
+        'topic': post.topic,
+        'status': post.status,
+        'schedule_time': local(post.schedule_time),
+        'schedule_ts': post.schedule_time.timestamp(),
+    }
+    if post.status == 'retrying':
+        summary['next_attempt_at'] = local(post.next_attempt_at)
+    if post.status != 'scheduled':
+        summary['attempts'] = post.attempts
+        summary['last_error'] = post.last_error
+    if post.completed_at:
+        summary['completed_at'] = local(post.completed_at)
+    return summary
+
+def _build_pending_posts():
+    """Upcoming and retrying posts as (schedule_ts, post_id, summary), built once per change of the posts files"""
+    pending = Post.objects.filter(
+        Q(status='scheduled', schedule_time__gt=timezone.now()) | Q(status='retrying'),
+        schedule_time__isnull=False
+    ).order_by('schedule_time', 'post_id')
+    return [(post.schedule_time.timestamp(), post.post_id, _post_summary(post)) for post in pending]
+
 def api_delete_post(request):
     """API endpoint to delete a scheduled post"""
     if request.method == 'POST':
@@ -212,34 +353,19 @@ def api_delete_post(request):
             if not post_id:
                 return JsonResponse({'success': False, 'error': 'Post ID required'})
             
-            posts_file = os.path.join(BASE_DIR, 'scheduled_posts.json')
+            # Let the running scheduler drop the job and the post together
+            response = send_control_request(POSTS_FILE, 'delete', post_id=post_id)
+            if response is not None:
+                if response['ok']:
+                    return JsonResponse({'success': True, 'message': 'Post deleted successfully'})
+                return JsonResponse({'success': False, 'error': response['error']})
             
-            if not os.path.exists(posts_file):
+            if not os.path.exists(POSTS_FILE):
                 return JsonResponse({'success': False, 'error': 'No posts file found'})
             
-            # Load posts
-            with open(posts_file, 'r', encoding='utf-8') as f:
-                posts = json.load(f)
-            
-            # Find and remove the post
-            original_count = len(posts)
-            posts = [post for post in posts if post['id'] != post_id]
-            
-            if len(posts) == original_count:
+            if not STORE.delete(post_id):
                 return JsonResponse({'success': False, 'error': 'Post not found'})
             
-            # Save updated posts
-            with open(posts_file, 'w', encoding='utf-8') as f:
-                json.dump(posts, f, indent=2, ensure_ascii=False)
-            
-            # Try to remove from scheduler if it's running
-            try:
-                if CustomPostScheduler:
-                    scheduler = CustomPostScheduler()
-                    scheduler.cancel_post(post_id)
-            except Exception as e:
-                print(f"Warning: Could not remove from scheduler: {e}")
-            
             return JsonResponse({'success': True, 'message': 'Post deleted successfully'})
             
         except Exception as e:
@@ -267,30 +393,15 @@ def api_update_post(request):
             except ValueError:
                 return JsonResponse({'success': False, 'error': 'Invalid time format'})
             
-            posts_file = os.path.join(BASE_DIR, 'scheduled_posts.json')
-            
-            if not os.path.exists(posts_file):
-                return JsonResponse({'success': False, 'error': 'No posts file found'})
-            
-            # Load posts
-            with open(posts_file, 'r', encoding='utf-8') as f:
-                posts = json.load(f)
-            
-            # Find and update the post
-            post_found = False
-            for post in posts:
-                if post['id'] == post_id:
-                    post['schedule_time'] = new_datetime.isoformat()
-                    post_found = True
-                    break
+            response = send_control_request(POSTS_FILE, 'reschedule', post_id=post_id, schedule_time=new_time)
+            if response is not None:
+                if response['ok']:
+                    return JsonResponse({'success': True, 'message': 'Post time updated successfully'})
+                return JsonResponse({'success': False, 'error': response['error']})
             
-            if not post_found:
+            if not STORE.reschedule(post_id, new_datetime):
                 return JsonResponse({'success': False, 'error': 'Post not found'})
             
-            # Save updated posts
-            with open(posts_file, 'w', encoding='utf-8') as f:
-                json.dump(posts, f, indent=2, ensure_ascii=False)
-            
             return JsonResponse({'success': True, 'message': 'Post time updated successfully'})
             
         except Exception as e:
@@ -318,34 +429,15 @@ def api_reschedule_post(request):
             except ValueError:
                 return JsonResponse({'success': False, 'error': 'Invalid time format'})
             
-            posts_file = os.path.join(BASE_DIR, 'scheduled_posts.json')
-            
-            if not os.path.exists(posts_file):
-                return JsonResponse({'success': False, 'error': 'No posts file found'})
-            
-            # Load posts
-            with open(posts_file, 'r', encoding='utf-8') as f:
-                posts = json.load(f)
-            
-            # Find and update the post
-            post_found = False
-            for post in posts:
-                if post['id'] == post_id:
-                    post['schedule_time'] = new_datetime.isoformat()
-                    post['status'] = 'scheduled'  # Reset status to scheduled
-                    # Remove completion timestamp if it exists
-                    if 'completed_at' in post:
-                        del post['completed_at']
-                    post_found = True
-                    break
+            response = send_control_request(POSTS_FILE, 'reschedule', post_id=post_id, schedule_time=new_time)
+            if response is not None:
+                if response['ok']:
+                    return JsonResponse({'success': True, 'message': 'Post rescheduled successfully'})
+                return JsonResponse({'success': False, 'error': response['error']})
             
-            if not post_found:
+            if not STORE.reschedule(post_id, new_datetime):
                 return JsonResponse({'success': False, 'error': 'Post not found'})
             
-            # Save updated posts
-            with open(posts_file, 'w', encoding='utf-8') as f:
-                json.dump(posts, f, indent=2, ensure_ascii=False)
-            
             return JsonResponse({'success': True, 'message': 'Post rescheduled successfully'})
             
         except Exception as e:
@@ -353,49 +445,307 @@ def api_reschedule_post(request):
     
     return JsonResponse({'success': False, 'error': 'Invalid request method'})
 
-def get_post_statistics():
-    """Get statistics from scheduled_posts.json"""
+def api_batch(request):
+    """
+    API endpoint to apply many create/update/reschedule/delete operations at once
+    
+    Body: {"operations": [{"op": "create", "topic": ..., "schedule_time": ...},
+                          {"op": "reschedule", "post_id": ..., "schedule_time": ...}, ...],
+           "allow_partial": false, "dry_run": false}
+    
+    The batch is all-or-nothing unless allow_partial is set, and is written
+    with one save; the response lists the outcome of every operation.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=405)
+    
     try:
-        posts_file = os.path.join(BASE_DIR, 'scheduled_posts.json')
-        
-        if not os.path.exists(posts_file):
-            return {'scheduled': 0, 'completed': 0, 'failed': 0}
-        
-        with open(posts_file, 'r', encoding='utf-8') as f:
-            posts = json.load(f)
+        data = json.loads(request.body)
+        operations = data.get('operations')
+        if not isinstance(operations, list) or not operations:
+            return JsonResponse({'success': False, 'error': 'operations must be a non-empty list'}, status=400)
+        if len(operations) > BATCH_MAX_OPERATIONS:
+            return JsonResponse({'success': False, 'error': f'At most {BATCH_MAX_OPERATIONS} operations per batch'}, status=400)
+        options = {'allow_partial': bool(data.get('allow_partial')), 'dry_run': bool(data.get('dry_run'))}
+    except (ValueError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Invalid JSON body'}, status=400)
+    
+    try:
+        # The running scheduler applies the batch to its live jobs as well
+        response = send_control_request(POSTS_FILE, 'batch', operations=operations, **options)
+        if response is not None:
+            if not response['ok']:
+                return JsonResponse({'success': False, 'error': response['error']}, status=502)
+            report = response['result']
+        else:
+            report = STORE.apply_batch(operations, **options)
         
-        stats = {'scheduled': 0, 'completed': 0, 'failed': 0}
+        if report['committed']:
+            sync_in_background(POSTS_FILE)
+        return JsonResponse({'success': report['rejected'] == 0, **report})
         
-        for post in posts:
-            status = post.get('status', 'unknown')
-            if status == 'scheduled':
-                # Check if still in future
-                try:
-                    post_time = datetime.fromisoformat(post['schedule_time'])
-                    if post_time > datetime.now():
-                        stats['scheduled'] += 1
-                except:
-                    pass
-            elif status == 'completed':
-                stats['completed'] += 1
-            elif status in ['failed', 'error', 'expired']:
-                stats['failed'] += 1
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+def api_drafts(request):
+    """
+    API endpoint to request a generated draft
+    
+    POST {"topic": ..., "with_image": false} answers 202 with the job id at
+    once; generation runs in the background (see posts.drafts). GET lists
+    the most recent jobs.
+    """
+    if request.method == 'GET':
+        jobs = DraftJob.objects.order_by('-created_at')[:DRAFTS_LISTED]
+        return JsonResponse({'success': True, 'jobs': [job.to_dict() for job in jobs]})
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=405)
+    
+    try:
+        data = json.loads(request.body)
+        topic = (data.get('topic') or '').strip()
+        with_image = bool(data.get('with_image'))
+    except (ValueError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Invalid JSON body'}, status=400)
+    if not topic:
+        return JsonResponse({'success': False, 'error': 'Topic required'}, status=400)
+    
+    job = submit_draft(topic, with_image)
+    return JsonResponse({
+        'success': True,
+        **job.to_dict(),
+        'status_url': reverse('api_draft', args=[job.job_id])
+    }, status=202)
+
+def api_draft(request, job_id):
+    """API endpoint to poll a draft job"""
+    job = DraftJob.objects.filter(job_id=job_id).first()
+    if job is None:
+        return JsonResponse({'success': False, 'error': 'Draft not found'}, status=404)
+    return JsonResponse({'success': True, **job.to_dict()})
+
+def api_draft_schedule(request, job_id):
+    """
+    API endpoint to schedule a finished draft
+    
+    POST {"schedule_time": "YYYY-MM-DD HH:MM", "content": optional edited text};
+    without content the draft's text and hashtags are posted as generated.
+    A generated image is posted with it.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=405)
+    
+    job = DraftJob.objects.filter(job_id=job_id).first()
+    if job is None:
+        return JsonResponse({'success': False, 'error': 'Draft not found'}, status=404)
+    if job.status != 'done':
+        return JsonResponse({'success': False, 'error': f'Draft is {job.status}'}, status=409)
+    if job.post_id:
+        return JsonResponse({'success': False, 'error': f'Draft already scheduled as {job.post_id}'}, status=409)
+    
+    try:
+        data = json.loads(request.body)
+        schedule_time = data.get('schedule_time')
+        content = data.get('content') or draft_text(job.draft)
+    except (ValueError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Invalid JSON body'}, status=400)
+    if not schedule_time:
+        return JsonResponse({'success': False, 'error': 'schedule_time required'}, status=400)
+    
+    # Claim the draft first so two clicks cannot schedule it twice
+    if not DraftJob.objects.filter(pk=job.pk, post_id__isnull=True).update(post_id=DRAFT_SCHEDULING):
+        return JsonResponse({'success': False, 'error': 'Draft already scheduled'}, status=409)
+    try:
+        post = _hand_off_post(job.draft.get('topic') or job.topic, schedule_time, content, job.image_path)
+    except Exception as e:
+        DraftJob.objects.filter(pk=job.pk).update(post_id=None)
+        return JsonResponse({'success': False, 'error': str(e)}, status=400 if isinstance(e, ValueError) else 500)
+    
+    DraftJob.objects.filter(pk=job.pk).update(post_id=post['id'])
+    return JsonResponse({'success': True, 'post_id': post['id'], 'schedule_time': post['schedule_time']})
+
+def get_post_statistics():
+    """Get statistics for live and archived posts from the store's status counters"""
+    try:
+        by_status, next_due = cached_view('status_summary', _build_status_summary, POSTS_FILE)
+        # Scheduled posts count until they miss their run time; the sweep then expires them
+        if next_due is not None and next_due < time.time() - STORE.misfire_grace():
+            _request_overdue_sweep()
         
-        return stats
+        return {
+            'scheduled': by_status.get('scheduled', 0) + by_status.get('retrying', 0),
+            'completed': by_status.get('completed', 0),
+            'failed': sum(by_status.get(status, 0) for status in FAILED_STATUSES)
+        }
         
     except Exception as e:
         print(f"Error getting statistics: {e}")
         return {'scheduled': 0, 'completed': 0, 'failed': 0}
 
+def _build_status_summary():
+    """
+    Counts per status plus the earliest scheduled time (epoch seconds)
+    
+    Live counts come from the counters every store save records, archived
+    ones from the archive index, so neither the posts nor the table are scanned.
+    """
+    live = STORE.summary()
+    by_status = dict(ARCHIVE.counts())
+    for status, count in live['counts'].items():
+        by_status[status] = by_status.get(status, 0) + count
+    next_due = datetime.fromisoformat(live['next_due']).timestamp() if live['next_due'] else None
+    return by_status, next_due
+
+def _request_overdue_sweep():
+    """Expire missed posts in the background, at most once per OVERDUE_SWEEP_SECONDS"""
+    global _last_overdue_sweep
+    if _last_overdue_sweep is not None and time.monotonic() - _last_overdue_sweep < OVERDUE_SWEEP_SECONDS:
+        return
+    _last_overdue_sweep = time.monotonic()
+    background.submit(_sweep_overdue_posts)
+
+def _sweep_overdue_posts():
+    # A running scheduler sweeps its own posts and knows which ones are mid-run
+    if any(hb['state'] == 'running' for hb in read_heartbeats(RUN_DIR)):
+        return
+    if STORE.expire_overdue():
+        ensure_synced(POSTS_FILE)
+
 def api_get_stats(request):
     """API endpoint to get updated statistics"""
     try:
-        stats = get_post_statistics()
+        return JsonResponse(_stats_payload())
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+def _stats_payload():
+    stats = get_post_statistics()
+    return {
+        'success': True,
+        'scheduled_count': stats['scheduled'],
+        'completed_count': stats['completed'],
+        'failed_count': stats['failed']
+    }
+
+def api_events(request):
+    """
+    Server-Sent Events stream of dashboard updates
+    
+    Sends a 'stats' event whenever the counters change and a 'posts' event
+    whenever the set of upcoming posts changes, instead of every open tab
+    polling /api/stats/ and /api/posts/. Checking the store costs two stat()
+    calls per tick; the browser reconnects after EVENT_STREAM_SECONDS.
+    """
+    # Under ASGI an async iterator keeps the connection off the thread pool;
+    # WSGI servers need a plain generator
+    stream = _async_event_stream() if isinstance(request, ASGIRequest) else _event_stream()
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # stop nginx from buffering the stream
+    return response
+
+def _changed_events(state):
+    """SSE text for whatever changed since the last call with this state ('' if nothing)"""
+    chunks = []
+    generation = current_generation(POSTS_FILE)
+    
+    stats = _stats_payload()
+    if stats != state.get('stats'):
+        state['stats'] = stats
+        chunks.append(_sse('stats', stats))
+    
+    # The page counts down from schedule_ts itself, so only a change of post
+    # ids or of the store is worth a push
+    posts, next_cursor = get_scheduled_posts()
+    post_ids = [post['id'] for post in posts]
+    if generation != state.get('generation') or post_ids != state.get('post_ids'):
+        state['generation'] = generation
+        state['post_ids'] = post_ids
+        chunks.append(_sse('posts', {'posts': posts, 'next_cursor': next_cursor}))
+    return ''.join(chunks)
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _event_stream():
+    state = {}
+    yield f"retry: {EVENT_RETRY_MS}\n\n"
+    started = last_sent = time.monotonic()
+    while time.monotonic() - started < EVENT_STREAM_SECONDS:
+        try:
+            chunk = _changed_events(state)
+        except Exception as e:
+            chunk = _sse('error', {'error': str(e)})
+        if chunk:
+            yield chunk
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= EVENT_KEEPALIVE_SECONDS:
+            yield ": keepalive\n\n"
+            last_sent = time.monotonic()
+        time.sleep(EVENT_POLL_SECONDS)
+
+async def _async_event_stream():
+    state = {}
+    changed_events = sync_to_async(_changed_events)
+    yield f"retry: {EVENT_RETRY_MS}\n\n"
+    started = last_sent = time.monotonic()
+    while time.monotonic() - started < EVENT_STREAM_SECONDS:
+        try:
+            chunk = await changed_events(state)
+        except Exception as e:
+            chunk = _sse('error', {'error': str(e)})
+        if chunk:
+            yield chunk
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= EVENT_KEEPALIVE_SECONDS:
+            yield ": keepalive\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(EVENT_POLL_SECONDS)
+
+def api_get_history(request):
+    """API endpoint to page through archived (finished) posts"""
+    try:
+        page = int(request.GET.get('page', 1))
+        page_size = min(int(request.GET.get('page_size', 20)), 100)
+        status = request.GET.get('status') or None
+        if page < 1 or page_size < 1:
+            raise ValueError(page)
+        
+        sync_in_background(POSTS_FILE)
+        archived = Post.objects.filter(archive_segment__isnull=False)
+        if status is not None:
+            archived = archived.filter(status=status)
+        
+        total = archived.count()
+        start = (page - 1) * page_size
+        posts = archived.order_by('-finished_at', '-pk')[start:start + page_size]
         return JsonResponse({
             'success': True,
-            'scheduled_count': stats['scheduled'],
-            'completed_count': stats['completed'],
-            'failed_count': stats['failed']
+            'posts': [post.to_dict() for post in posts],
+            'page': page,
+            'page_size': page_size,
+            'total': total,
+            'pages': (total + page_size - 1) // page_size
         })
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid page parameters'}, status=400)
     except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)})
\ No newline at end of file
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+
+def api_scheduler_status(request):
+    """API endpoint to report running schedulers from their heartbeat files"""
+    try:
+        heartbeats = read_heartbeats(RUN_DIR)
+        return JsonResponse({
+            'success': True,
+            'running': any(hb['state'] == 'running' for hb in heartbeats),
+            'schedulers': heartbeats
+        })
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+
+def metrics(request):
+    """Prometheus metrics for the dashboard process (the scheduler serves its own on metrics_port)"""
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
@@ -1,13 +1,19 @@
 import requests
 import json
 import os
+import threading
+import time
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
+from metrics import LINKEDIN_REQUEST_SECONDS, PUBLISH_TOTAL
 
 load_dotenv()
 
+# Seconds a whole post_content call (every API call and fallback) may take
+DEFAULT_PUBLISH_TIMEOUT = 60
+
 class LinkedInPoster:
-    def __init__(self):
+    def __init__(self, publish_timeout: float = DEFAULT_PUBLISH_TIMEOUT):
         self.access_token = os.getenv('LINKEDIN_ACCESS_TOKEN')
         self.user_id = os.getenv('LINKEDIN_USER_ID')
         self.person_urn = os.getenv('LINKEDIN_PERSON_URN', f"urn:li:person:{self.user_id}")
@@ -19,21 +25,64 @@ class LinkedInPoster:
             'X-Restli-Protocol-Version': '2.0.0',
             'LinkedIn-Version': '202405'  # Use latest API version
         }
+        self.publish_timeout = publish_timeout
+        # Status codes and deadline of the current post_content call;
+        # thread-local because one poster is shared by the publish workers
+        self._attempts = threading.local()
+    
+    def _call_timeout(self) -> float:
+        """Seconds left for the next API call of the current post_content call"""
+        deadline = getattr(self._attempts, 'deadline', None)
+        if deadline is None:
+            return self.publish_timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise requests.Timeout(f"publishing took longer than {self.publish_timeout}s")
+        return remaining
+    
+    def _request(self, endpoint: str, method: str, url: str, **kwargs) -> requests.Response:
+        """Issue a LinkedIn API call and record its latency"""
+        started = time.perf_counter()
+        status = 'error'
+        try:
+            # Without a timeout a stalled connection holds a publish worker forever
+            kwargs.setdefault('timeout', self._call_timeout())
+            response = requests.request(method, url, **kwargs)
+            status = str(response.status_code)
+            return response
+        finally:
+            LINKEDIN_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, status=status)
+            statuses = getattr(self._attempts, 'statuses', None)
+            if statuses is not None:
+                statuses.append(status)
     
     def post_content(self, content_data: Dict[str, str]) -> bool:
         """Post content to LinkedIn with optional image using Posts API"""
+        success = False
         try:
+            # Each posting method records which endpoint finally accepted the post
+            content_data['publish_path'] = None
+            self._attempts.statuses = []
+            self._attempts.deadline = time.monotonic() + self.publish_timeout
+            
             # Check if image is included
             has_image = 'image_path' in content_data and content_data['image_path']
             
             if has_image:
-                return self._post_with_image_new_api(content_data)
+                success = self._post_with_image_new_api(content_data)
             else:
-                return self._post_text_only_new_api(content_data)
+                success = self._post_text_only_new_api(content_data)
+            return success
                 
         except Exception as e:
             print(f"❌ Error posting to LinkedIn: {e}")
             return False
+        finally:
+            # Lets the scheduler tell rate limits / outages from rejected posts
+            content_data['publish_statuses'] = getattr(self._attempts, 'statuses', None) or []
+            self._attempts.statuses = None
+            self._attempts.deadline = None
+            PUBLISH_TOTAL.inc(path=(content_data.get('publish_path') or 'unknown') if success else 'failed')
     
     def _post_with_image_new_api(self, content_data: Dict[str, str]) -> bool:
         """Post content with image using new Posts API"""
@@ -65,7 +114,7 @@ class LinkedInPoster:
             }
             
             # Use REST endpoint
-            response = requests.post(
+            response = self._request('posts', 'POST',
                 f"{self.base_url}/rest/posts",
                 headers=self.headers,
                 data=json.dumps(posts_payload)
@@ -73,6 +122,7 @@ class LinkedInPoster:
             
             if response.status_code in [200, 201]:
                 print(f"✅ Successfully posted with image: {content_data['topic']}")
+                content_data['publish_path'] = 'posts_api_image'
                 return True
             else:
                 print(f"❌ Failed to post with image. Status: {response.status_code}")
@@ -107,7 +157,7 @@ class LinkedInPoster:
                 }
             }
             
-            register_response = requests.post(
+            register_response = self._request('image_register', 'POST',
                 f"{self.base_url}/v2/assets?action=registerUpload",
                 headers=self.headers,
                 data=json.dumps(register_payload)
@@ -127,7 +177,7 @@ class LinkedInPoster:
                     'Authorization': f'Bearer {self.access_token}'
                 }
                 
-                upload_response = requests.put(
+                upload_response = self._request('image_upload', 'PUT',
                     upload_url,
                     headers=upload_headers,
                     data=image_file.read()
@@ -182,7 +232,7 @@ class LinkedInPoster:
                 }
             }
             
-            response = requests.post(
+            response = self._request('ugc', 'POST',
                 f"{self.base_url}/v2/ugcPosts",
                 headers=self.headers,
                 data=json.dumps(ugc_payload)
@@ -190,6 +240,7 @@ class LinkedInPoster:
             
             if response.status_code == 201:
                 print(f"✅ Successfully posted with UGC fallback: {content_data['topic']}")
+                content_data['publish_path'] = 'ugc_image'
                 return True
             else:
                 print(f"❌ UGC fallback also failed. Status: {response.status_code}")
@@ -218,7 +269,7 @@ class LinkedInPoster:
                 "visibility": "PUBLIC"
             }
             
-            response = requests.post(
+            response = self._request('posts', 'POST',
                 f"{self.base_url}/rest/posts",
                 headers=self.headers,
                 data=json.dumps(posts_payload)
@@ -226,6 +277,7 @@ class LinkedInPoster:
             
             if response.status_code in [200, 201]:
                 print(f"✅ Successfully posted: {content_data['topic']}")
+                content_data['publish_path'] = 'posts_api_text'
                 return True
             else:
                 print(f"❌ Failed to post. Status: {response.status_code}")
@@ -264,7 +316,7 @@ class LinkedInPoster:
                 }
             }
             
-            response = requests.post(
+            response = self._request('ugc', 'POST',
                 f"{self.base_url}/v2/ugcPosts",
                 headers=self.headers,
                 data=json.dumps(ugc_payload)
@@ -272,6 +324,7 @@ class LinkedInPoster:
             
             if response.status_code == 201:
                 print(f"✅ Successfully posted with UGC fallback: {content_data['topic']}")
+                content_data['publish_path'] = 'ugc_text'
                 return True
             else:
                 print(f"❌ UGC fallback also failed. Status: {response.status_code}")
@@ -380,7 +433,8 @@ class LinkedInPoster:
             # Try userinfo endpoint first
             response = requests.get(
                 'https://api.linkedin.com/v2/userinfo',
-                headers={'Authorization': f'Bearer {self.access_token}'}
+                headers={'Authorization': f'Bearer {self.access_token}'},
+                timeout=10
             )
             
             if response.status_code == 200:
@@ -389,7 +443,8 @@ class LinkedInPoster:
             # Fallback to people endpoint
             response = requests.get(
                 f"{self.base_url}/v2/people/(id:{self.user_id})?projection=(id,localizedFirstName,localizedLastName)",
-                headers=self.headers
+                headers=self.headers,
+                timeout=10
             )
             
             if response.status_code == 200:
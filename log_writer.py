@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Background writer for the scheduler's JSON-lines audit logs
+Job threads only enqueue entries; a single writer thread batches them into
+logs/<type>/<YYYY-MM-DD>.log, rotating by day and size and gzipping rotated
+files, so publishing never waits on log file I/O
+
+Several scheduler nodes may share one logs/ directory. Each writer holds a
+shared flock on the file it appends to; a size rotation renames the file to
+<day>.<n>.log.closing and writers that still have it open move to a fresh
+file after their next write. A closing file, or one from an earlier day, is
+gzipped only once no writer holds it, so nothing appended late is lost.
+Without fcntl (Windows) only one writer per directory is supported.
+"""
+
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_STOP = object()
+ROTATE_LOCK_NAME = '.rotate.lock'
+CLOSING_SUFFIX = '.log.closing'
+
+
+@contextmanager
+def _unheld(path: str):
+    """
+    Yield True while holding an exclusive lock on path if no writer holds it,
+    otherwise yield False at once
+    """
+    if fcntl is None:
+        yield True
+        return
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        yield False
+        return
+    try:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield False
+            return
+        yield True
+    finally:
+        f.close()
+
+
+@contextmanager
+def _rotate_lock(type_dir: str):
+    """Serialize renames and compression between writers sharing type_dir"""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(type_dir, ROTATE_LOCK_NAME), 'a') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        yield
+
+
+class BufferedLogWriter:
+    def __init__(self, log_dir: str = 'logs', max_bytes: int = 10 * 1024 * 1024,
+                 queue_size: int = 10000, batch_size: int = 500, flush_interval: float = 1.0):
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Bounded so a stuck disk cannot grow memory without limit; overflow is counted
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._files = {}  # log_type -> (day, open file)
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+            self._thread.start()
+        return self
+
+    def write(self, log_type: str, entry: Dict) -> bool:
+        """Queue one entry without blocking; returns False if it was dropped"""
+        self.start()
+        try:
+            self._queue.put_nowait((log_type, entry))
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Block until everything queued so far is on disk"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """Flush remaining entries and stop the writer thread"""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'written': self.written, 'dropped': self.dropped, 'queued': self._queue.qsize()}
+
+    def _run(self):
+        while True:
+            batch: List = []
+            markers: List = []
+            stopping = False
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            # Drain whatever else is already waiting, up to one batch
+            while True:
+                if item is _STOP:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+                if stopping or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            self._write_batch(batch)
+            for marker in markers:
+                marker.set()
+            if stopping:
+                self._close_files()
+                return
+
+    def _write_batch(self, batch: List):
+        if not batch:
+            return
+        by_type: Dict[str, List[str]] = {}
+        for log_type, entry in batch:
+            by_type.setdefault(log_type, []).append(json.dumps(entry, default=str, ensure_ascii=False) + '\n')
+
+        for log_type, lines in by_type.items():
+            try:
+                f = self._file_for(log_type)
+                f.write(''.join(lines))
+                f.flush()
+                with self._lock:
+                    self.written += len(lines)
+                if f.tell() >= self.max_bytes:
+                    self._rotate(log_type)
+                elif self._moved(f):
+                    # Another writer rotated it; our lines are in the closing file
+                    self._release(log_type)
+            except Exception as e:
+                print(f"[WARNING] Could not write {log_type} log: {e}")
+
+    def _file_for(self, log_type: str):
+        today = datetime.now().strftime('%Y-%m-%d')
+        current = self._files.get(log_type)
+        if current and current[0] == today:
+            return current[1]
+        if current:
+            self._release(log_type)
+
+        type_dir = os.path.join(self.log_dir, log_type)
+        os.makedirs(type_dir, exist_ok=True)
+        while True:
+            f = open(os.path.join(type_dir, f"{today}.log"), 'a', encoding='utf-8')
+            if fcntl is None:
+                break
+            # Held while the file is open, so nobody compresses it under us
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH)
+            if not self._moved(f):
+                break
+            f.close()  # rotated between our open and our lock
+        self._files[log_type] = (today, f)
+        self._compress_leftovers(type_dir, today)
+        return f
+
+    @staticmethod
+    def _moved(f) -> bool:
+        """True if f is no longer the file at its path (renamed by a rotation)"""
+        try:
+            return os.stat(f.name).st_ino != os.fstat(f.fileno()).st_ino
+        except OSError:
+            return True
+
+    def _release(self, log_type: str):
+        """Close the active file (dropping its lock) and compress what nobody holds"""
+        day, f = self._files.pop(log_type)
+        f.close()
+        self._compress_leftovers(os.path.dirname(f.name), datetime.now().strftime('%Y-%m-%d'))
+
+    def _rotate(self, log_type: str):
+        """Rename the full active file to a closing name and move on to a fresh one"""
+        day, f = self._files[log_type]
+        path = f.name
+        with _rotate_lock(os.path.dirname(path)):
+            # Another writer may have rotated it between our write and now
+            if not self._moved(f):
+                n = 1
+                while os.path.exists(f"{path[:-4]}.{n}.log.gz") or os.path.exists(f"{path[:-4]}.{n}{CLOSING_SUFFIX}"):
+                    n += 1
+                os.rename(path, f"{path[:-4]}.{n}{CLOSING_SUFFIX}")
+        self._release(log_type)
+
+    def _compress_leftovers(self, type_dir: str, today: str):
+        """Gzip rotated files and files from earlier days once no writer holds them"""
+        with _rotate_lock(type_dir):
+            for name in os.listdir(type_dir):
+                path = os.path.join(type_dir, name)
+                if name.endswith(CLOSING_SUFFIX):
+                    target = path[:-len(CLOSING_SUFFIX)] + '.log.gz'
+                elif name.endswith('.log') and name != f"{today}.log":
+                    target = path + '.gz'
+                else:
+                    continue
+                with _unheld(path) as free:
+                    if free:
+                        self._compress(path, target)
+
+    @staticmethod
+    def _compress(path: str, target: str):
+        try:
+            # Appending a gzip member keeps anything already compressed to target
+            with open(path, 'rb') as src, gzip.open(target, 'ab') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(path)
+        except OSError as e:
+            print(f"[WARNING] Could not compress {path}: {e}")
+
+    def _close_files(self):
+        for log_type in list(self._files):
+            self._release(log_type)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+In-process metrics in the Prometheus text format
+Counters, gauges and latency histograms shared by the scheduler, content
+generator and poster; the scheduler serves them on a local HTTP port and the
+Django dashboard exposes its own process at /metrics/
+"""
+
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    kind = 'untyped'
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return '\n'.join(lines)
+
+    @abstractmethod
+    def _samples(self):
+        """Yield the metric's sample lines"""
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, callback: Callable[[], Dict[Tuple[str, ...], float]]):
+        """Read values at scrape time; callback returns {label values tuple: value}"""
+        self._callback = callback
+
+    def _samples(self):
+        if self._callback is not None:
+            try:
+                items = sorted(self._callback().items())
+            except Exception:
+                items = []
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            inf = 'le="+Inf"'
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, key, inf)} {series[-1]}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series[-2])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing  # modules re-imported under Django autoreload
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help_text, labelnames=()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# Content generation (OpenAI)
+OPENAI_REQUEST_SECONDS = REGISTRY.histogram(
+    'linkedin_openai_request_seconds', 'OpenAI call latency', ('kind',))
+GENERATION_FALLBACK_TOTAL = REGISTRY.counter(
+    'linkedin_generation_fallback_total', 'Generation steps that fell back to static output', ('kind',))
+
+# Publishing (LinkedIn API)
+LINKEDIN_REQUEST_SECONDS = REGISTRY.histogram(
+    'linkedin_api_request_seconds', 'LinkedIn API call latency', ('endpoint', 'status'))
+PUBLISH_TOTAL = REGISTRY.counter(
+    'linkedin_publish_total', 'Publish attempts by the endpoint that accepted them', ('path',))
+
+# Scheduler jobs
+JOB_LAG_SECONDS = REGISTRY.histogram(
+    'linkedin_job_lag_seconds', 'Delay between schedule_time and the job being submitted',
+    buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 900))
+JOB_STAGE_SECONDS = REGISTRY.histogram(
+    'linkedin_job_stage_seconds', 'Time spent in each job stage', ('stage',))
+JOBS_TOTAL = REGISTRY.counter(
+    'linkedin_jobs_total', 'Scheduled jobs by outcome', ('outcome',))
+JOB_QUEUE_DEPTH = REGISTRY.gauge(
+    'linkedin_job_queue_depth', 'Jobs waiting or running, overall and per stage', ('stage', 'state'))
+
+# Control socket clients (CLI / dashboard)
+CONTROL_REQUEST_SECONDS = REGISTRY.histogram(
+    'linkedin_control_request_seconds', 'Round trip of requests to the scheduler control socket',
+    ('op', 'outcome'), buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes would otherwise flood the scheduler console
+
+
+class MetricsServer:
+    """Serves GET /metrics on a local port from a daemon thread"""
+
+    def __init__(self, port: int, host: str = '127.0.0.1', registry: MetricsRegistry = REGISTRY):
+        self.port = port
+        self.host = host
+        self.registry = registry
+        self._server = None
+
+    def start(self) -> bool:
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), _MetricsHandler)
+        except OSError as e:
+            print(f"[WARNING] Metrics endpoint not started on {self.host}:{self.port}: {e}")
+            return False
+        self._server.daemon_threads = True
+        self._server.registry = self.registry
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+        print(f"[SUCCESS] Metrics available at http://{self.host}:{self.port}/metrics")
+        return True
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Compressed archive for finished posts
+Completed / failed / expired / cancelled posts are moved out of the live
+posts file into monthly gzip JSONL segments with a small JSON index, so the
+live store only holds active posts while history stays browsable page by page
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+ARCHIVABLE_STATUSES = ('completed', 'failed', 'error', 'expired', 'cancelled', 'dead_letter')
+ARCHIVE_DIR_NAME = 'post_archive'
+INDEX_FILE = 'index.json'
+
+
+def default_archive_dir(posts_file: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(posts_file)), ARCHIVE_DIR_NAME)
+
+
+def _finished_at(post: Dict) -> str:
+    return post.get('completed_at') or post['schedule_time']
+
+
+class PostArchive:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.index_path = os.path.join(directory, INDEX_FILE)
+
+    def _load_index(self) -> Dict:
+        if not os.path.exists(self.index_path):
+            return {'segments': {}}
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_index(self, index: Dict):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def archive(self, posts: Iterable[Dict]) -> int:
+        """Append posts to their month's segment; returns how many were archived"""
+        by_segment: Dict[str, List[Dict]] = {}
+        for post in posts:
+            segment = _finished_at(post)[:7]  # YYYY-MM
+            by_segment.setdefault(segment, []).append(post)
+
+        if not by_segment:
+            return 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        index = self._load_index()
+        archived = 0
+
+        for segment, segment_posts in by_segment.items():
+            entry = index['segments'].setdefault(segment, {
+                'file': f"posts-{segment}.jsonl.gz",
+                'count': 0,
+                'statuses': {},
+                'first': None,
+                'last': None
+            })
+
+            # Each call appends a new gzip member; readers see one continuous stream
+            with gzip.open(os.path.join(self.directory, entry['file']), 'at', encoding='utf-8') as f:
+                for post in segment_posts:
+                    f.write(json.dumps(post, ensure_ascii=False) + '\n')
+
+            for post in segment_posts:
+                finished = _finished_at(post)
+                entry['count'] += 1
+                entry['statuses'][post['status']] = entry['statuses'].get(post['status'], 0) + 1
+                entry['first'] = min(filter(None, [entry['first'], finished]))
+                entry['last'] = max(filter(None, [entry['last'], finished]))
+            archived += len(segment_posts)
+
+        index['updated_at'] = datetime.now().isoformat()
+        self._save_index(index)
+        return archived
+
+    def counts(self) -> Dict[str, int]:
+        """Archived posts per status, answered from the index alone"""
+        totals: Dict[str, int] = {}
+        for entry in self._load_index()['segments'].values():
+            for status, count in entry['statuses'].items():
+                totals[status] = totals.get(status, 0) + count
+        return totals
+
+    def segments(self) -> Dict[str, Dict]:
+        """Index entries (file, count, statuses, first, last) keyed by YYYY-MM"""
+        return self._load_index()['segments']
+
+    def read_segment(self, segment: str) -> List[Dict]:
+        """All posts of one monthly segment"""
+        return self._read_segment(self.segments()[segment])
+
+    def _read_segment(self, entry: Dict) -> List[Dict]:
+        with gzip.open(os.path.join(self.directory, entry['file']), 'rt', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def page(self, page: int = 1, page_size: int = 20, status: Optional[str] = None) -> Dict:
+        """
+        Return one page of archived posts, newest segment first
+
+        Only the segments overlapping the requested page are decompressed;
+        the rest are skipped using the counts kept in the index.
+        """
+        page = max(1, page)
+        segments = sorted(self._load_index()['segments'].items(), reverse=True)
+
+        def matching(entry):
+            return entry['count'] if status is None else entry['statuses'].get(status, 0)
+
+        total = sum(matching(entry) for _, entry in segments)
+        start = (page - 1) * page_size
+        end = start + page_size
+
+        posts: List[Dict] = []
+        offset = 0
+        for _, entry in segments:
+            size = matching(entry)
+            if size == 0 or offset + size <= start:
+                offset += size
+                continue
+            if offset >= end:
+                break
+
+            rows = self._read_segment(entry)
+            if status is not None:
+                rows = [row for row in rows if row['status'] == status]
+            rows.sort(key=_finished_at, reverse=True)
+
+            posts.extend(rows[max(0, start - offset):end - offset])
+            offset += size
+
+        return {
+            'posts': posts,
+            'page': page,
+            'page_size': page_size,
+            'total': total,
+            'pages': (total + page_size - 1) // page_size
+        }
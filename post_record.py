@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Compact read-side view of stored posts
+PostRecord keeps one post in __slots__ with its timestamps parsed once and its
+status as an enum, and iter_post_dicts / iter_records decode the posts file
+one object at a time, so read-only callers (stats, listings, the dashboard)
+can scan a large file without building the whole list of dicts first
+"""
+
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Iterator, Optional
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+class PostStatus(str, Enum):
+    SCHEDULED = 'scheduled'
+    RETRYING = 'retrying'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    ERROR = 'error'
+    EXPIRED = 'expired'
+    CANCELLED = 'cancelled'
+    DEAD_LETTER = 'dead_letter'
+    UNKNOWN = 'unknown'
+
+    @classmethod
+    def _missing_(cls, value):
+        return cls.UNKNOWN
+
+    @property
+    def is_pending(self) -> bool:
+        return self in (PostStatus.SCHEDULED, PostStatus.RETRYING)
+
+    @property
+    def is_failed(self) -> bool:
+        """Counted as failed on the dashboard (expired included)"""
+        return self in (PostStatus.FAILED, PostStatus.ERROR, PostStatus.EXPIRED, PostStatus.DEAD_LETTER)
+
+
+_STATUSES = {status.value: status for status in PostStatus}
+
+
+def _parse_datetime(value) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class PostRecord:
+    __slots__ = ('id', 'topic', 'content', 'status', 'schedule_time', 'account',
+                 'attempts', 'next_attempt_at', 'completed_at', 'last_error', 'extra')
+
+    _FIELDS = frozenset(('id', 'topic', 'content', 'status', 'schedule_time', 'account',
+                         'attempts', 'next_attempt_at', 'completed_at', 'last_error'))
+
+    def __init__(self, id: str, topic: str, schedule_time: Optional[datetime],
+                 status: PostStatus = PostStatus.SCHEDULED, content: Optional[str] = None,
+                 account: Optional[str] = None, attempts: int = 0,
+                 next_attempt_at: Optional[datetime] = None, completed_at: Optional[datetime] = None,
+                 last_error: Optional[str] = None, extra: Optional[Dict] = None):
+        self.id = id
+        self.topic = topic
+        self.content = content
+        self.status = status
+        self.schedule_time = schedule_time
+        self.account = account
+        self.attempts = attempts
+        self.next_attempt_at = next_attempt_at
+        self.completed_at = completed_at
+        self.last_error = last_error
+        self.extra = extra  # any other stored keys, kept for to_dict()
+
+    @classmethod
+    def from_dict(cls, post: Dict) -> 'PostRecord':
+        extra = {key: value for key, value in post.items() if key not in cls._FIELDS}
+        return cls(
+            id=post.get('id'),
+            topic=post.get('topic'),
+            schedule_time=_parse_datetime(post.get('schedule_time')),
+            status=_STATUSES.get(post.get('status'), PostStatus.UNKNOWN),
+            content=post.get('content'),
+            account=post.get('account'),
+            attempts=post.get('attempts', 0),
+            next_attempt_at=_parse_datetime(post.get('next_attempt_at')),
+            completed_at=_parse_datetime(post.get('completed_at')),
+            last_error=post.get('last_error'),
+            extra=extra or None
+        )
+
+    def to_dict(self) -> Dict:
+        """The stored (JSON) form of the post"""
+        post = {
+            'id': self.id,
+            'topic': self.topic,
+            'schedule_time': self.schedule_time.isoformat() if self.schedule_time else None,
+            'content': self.content,
+            'status': self.status.value
+        }
+        if self.account is not None:
+            post['account'] = self.account
+        if self.attempts:
+            post['attempts'] = self.attempts
+        for key in ('next_attempt_at', 'completed_at'):
+            value = getattr(self, key)
+            if value is not None:
+                post[key] = value.isoformat()
+        if self.last_error is not None:
+            post['last_error'] = self.last_error
+        if self.extra:
+            post.update(self.extra)
+        return post
+
+    @property
+    def due_time(self) -> Optional[datetime]:
+        """When the post next runs: the retry time while retrying, otherwise schedule_time"""
+        if self.status is PostStatus.RETRYING and self.next_attempt_at:
+            return self.next_attempt_at
+        return self.schedule_time
+
+    def is_upcoming(self, now: Optional[datetime] = None) -> bool:
+        """Scheduled for the future, or waiting for a retry"""
+        if self.status is PostStatus.RETRYING:
+            return True
+        return (self.status is PostStatus.SCHEDULED and self.schedule_time is not None
+                and self.schedule_time > (now or datetime.now()))
+
+    def __repr__(self) -> str:
+        return f"PostRecord(id={self.id!r}, status={self.status.value!r}, schedule_time={self.schedule_time!r})"
+
+
+def iter_post_dicts(path: str, chunk_size: int = 64 * 1024) -> Iterator[Dict]:
+    """
+    Yield the posts of a JSON array file one at a time
+
+    Reads the file in chunks and decodes each array element as soon as it is
+    complete, so memory is bounded by the largest post rather than the file.
+
+    Raises:
+        ValueError: if the file is not a JSON array of objects
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_size)
+        pos = _skip(buffer, 0)
+        if pos >= len(buffer):
+            return  # empty file
+        if buffer[pos] != '[':
+            raise ValueError(f"{path} does not contain a JSON array")
+        pos += 1
+        eof = False
+        expect_value = True
+
+        while True:
+            pos = _skip(buffer, pos)
+            if pos < len(buffer):
+                char = buffer[pos]
+                if char == ']':
+                    return
+                if not expect_value:
+                    if char != ',':
+                        raise ValueError(f"{path} is missing a ',' between posts")
+                    pos += 1
+                    expect_value = True
+                    continue
+                try:
+                    post, end = _DECODER.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    # A complete object can only be decoded once its closing brace is in the buffer
+                    if not isinstance(post, dict):
+                        raise ValueError(f"{path} contains a non-object post")
+                    yield post
+                    pos = end
+                    expect_value = False
+                    continue
+            elif eof:
+                raise ValueError(f"{path} ended before the closing ']'")
+
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+
+def iter_records(path: str, chunk_size: int = 64 * 1024) -> Iterator[PostRecord]:
+    """Stream the posts file as PostRecords"""
+    for post in iter_post_dicts(path, chunk_size):
+        yield PostRecord.from_dict(post)
+
+
+def _skip(buffer: str, pos: int) -> int:
+    while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+        pos += 1
+    return pos
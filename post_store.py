@@ -0,0 +1,541 @@
+#!/usr/bin/env python3
+"""
+File-backed store for scheduled posts
+Shared by the scheduler, the CLI and the Django dashboard so that simple
+edits and read-only commands do not need a full CustomPostScheduler.
+Writers serialize on a lock file next to the posts file, saves replace the
+file atomically, and a version sidecar lets writers detect that someone
+else saved since they read
+"""
+
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from post_record import PostRecord, PostStatus, iter_records
+from slot_allocator import SlotAllocator
+
+DEFAULT_POSTS_FILE = 'scheduled_posts.json'
+UPDATE_RETRIES = 5
+MISFIRE_GRACE_SECONDS = 300  # scheduler default; config.json scheduler.misfire_grace_time overrides
+
+
+class ConcurrentUpdate(RuntimeError):
+    """The posts file was saved by someone else since it was read"""
+
+
+class _FileLock:
+    """
+    Exclusive lock on a lock file, shared by every PostStore on the same
+    path in this process and re-entrant within a thread
+    """
+
+    _registry: Dict[str, '_FileLock'] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    @classmethod
+    def for_path(cls, path: str) -> '_FileLock':
+        path = os.path.abspath(path)
+        with cls._registry_lock:
+            lock = cls._registry.get(path)
+            if lock is None:
+                lock = cls._registry[path] = cls(path)
+            return lock
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._file = open(self.path, 'a+b')
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+                else:
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+                else:
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            finally:
+                self._file.close()
+                self._file = None
+        self._thread_lock.release()
+
+
+def parse_schedule_time(schedule_time: str, now: Optional[datetime] = None) -> datetime:
+    """Parse 'HH:MM' (today), 'YYYY-MM-DD' (09:00) or 'YYYY-MM-DD HH:MM'"""
+    try:
+        # If only time provided (HH:MM), use today's date
+        if ':' in schedule_time and len(schedule_time) <= 5:
+            today = (now or datetime.now()).date()
+            time_part = datetime.strptime(schedule_time, '%H:%M').time()
+            return datetime.combine(today, time_part)
+
+        # Full datetime (YYYY-MM-DD HH:MM)
+        elif len(schedule_time) > 10:
+            return datetime.strptime(schedule_time, '%Y-%m-%d %H:%M')
+
+        # Date only (YYYY-MM-DD), use 09:00 as default
+        else:
+            date_part = datetime.strptime(schedule_time, '%Y-%m-%d').date()
+            default_time = datetime.strptime('09:00', '%H:%M').time()
+            return datetime.combine(date_part, default_time)
+
+    except ValueError:
+        raise ValueError("Invalid time format. Use 'HH:MM', 'YYYY-MM-DD', or 'YYYY-MM-DD HH:MM'")
+
+
+def format_time_remaining(time_delta) -> str:
+    """Format time remaining in a readable way"""
+    if time_delta.days > 0:
+        return f"{time_delta.days} days, {time_delta.seconds // 3600} hours"
+    elif time_delta.seconds > 3600:
+        return f"{time_delta.seconds // 3600} hours, {(time_delta.seconds % 3600) // 60} minutes"
+    elif time_delta.seconds > 60:
+        return f"{time_delta.seconds // 60} minutes"
+    else:
+        return "less than 1 minute"
+
+
+def print_post_listing(posts: Iterable[Union[Dict, PostRecord]]):
+    """Print upcoming, completed and failed posts (stored dicts or PostRecords)"""
+    print("\n[INFO] Scheduled Posts:")
+    print("=" * 60)
+
+    # Separate posts by status
+    scheduled_posts, completed_posts, retrying_posts, failed_posts = [], [], [], []
+    by_status = {
+        PostStatus.SCHEDULED: scheduled_posts,
+        PostStatus.COMPLETED: completed_posts,
+        PostStatus.RETRYING: retrying_posts,
+        PostStatus.FAILED: failed_posts,
+        PostStatus.ERROR: failed_posts,
+        PostStatus.DEAD_LETTER: failed_posts
+    }
+    total = 0
+    for post in posts:
+        record = post if isinstance(post, PostRecord) else PostRecord.from_dict(post)
+        total += 1
+        group = by_status.get(record.status)
+        if group is not None:
+            group.append(record)
+
+    if not total:
+        print("No posts found.")
+        return
+
+    if scheduled_posts:
+        print("UPCOMING POSTS:")
+        for i, post in enumerate(scheduled_posts, 1):
+            time_remaining = post.schedule_time - datetime.now()
+
+            if time_remaining.total_seconds() > 0:
+                print(f"{i}. Topic: {post.topic}")
+                print(f"   Time: {post.schedule_time.strftime('%Y-%m-%d %H:%M:%S')}")
+                print(f"   In: {format_time_remaining(time_remaining)}")
+                print(f"   ID: {post.id}")
+                print("-" * 40)
+
+    if retrying_posts:
+        print(f"\nRETRYING POSTS ({len(retrying_posts)}):")
+        for i, post in enumerate(retrying_posts, 1):
+            print(f"{i}. Topic: {post.topic}")
+            print(f"   Next attempt: {post.next_attempt_at.strftime('%Y-%m-%d %H:%M:%S')} (after {post.attempts} failed)")
+            print(f"   Last error: {post.last_error or 'Unknown'}")
+            print(f"   ID: {post.id}")
+            print("-" * 20)
+
+    if completed_posts:
+        print(f"\nCOMPLETED POSTS ({len(completed_posts)}):")
+        for i, post in enumerate(completed_posts, 1):
+            print(f"{i}. Topic: {post.topic}")
+            print(f"   Scheduled: {post.schedule_time.strftime('%Y-%m-%d %H:%M:%S')}")
+            if post.completed_at:
+                print(f"   Completed: {post.completed_at.strftime('%Y-%m-%d %H:%M:%S')}")
+            print(f"   Status: {post.status.value}")
+            print("-" * 20)
+
+    if failed_posts:
+        print(f"\nFAILED POSTS ({len(failed_posts)}):")
+        for i, post in enumerate(failed_posts, 1):
+            print(f"{i}. Topic: {post.topic}")
+            print(f"   Time: {post.schedule_time.strftime('%Y-%m-%d %H:%M:%S')}")
+            print(f"   Status: {post.status.value}")
+            if post.last_error:
+                print(f"   Last error: {post.last_error}")
+            print("-" * 20)
+
+
+def new_post_id(prefix: str = 'custom_post') -> str:
+    """A post id that stays unique across writers, deletions and restarts"""
+    return f"{prefix}_{uuid.uuid4().hex}"
+
+
+def summarize_posts(posts: Iterable[Dict]) -> Dict:
+    """Posts per status and the earliest 'scheduled' time (ISO string, or None)"""
+    counts: Dict[str, int] = {}
+    next_due = None
+    for post in posts:
+        status = post.get('status', 'unknown')
+        counts[status] = counts.get(status, 0) + 1
+        # Stored times are isoformat strings, which sort chronologically
+        if status == 'scheduled' and (next_due is None or post['schedule_time'] < next_due):
+            next_due = post['schedule_time']
+    return {'counts': counts, 'next_due': next_due}
+
+
+def expire_overdue_posts(posts: Iterable[Dict], cutoff: datetime,
+                         skip: Optional[Callable[[Dict], bool]] = None) -> List[Dict]:
+    """Mark 'scheduled' posts due before cutoff as expired (unless skip(post)); returns them"""
+    expired = []
+    for post in posts:
+        if (post['status'] == 'scheduled' and datetime.fromisoformat(post['schedule_time']) < cutoff
+                and not (skip and skip(post))):
+            post['status'] = 'expired'
+            expired.append(post)
+    return expired
+
+
+class PostStore:
+    def __init__(self, path: str = DEFAULT_POSTS_FILE, config_file: str = 'config.json'):
+        self.path = path
+        self.config_file = config_file
+        self.version_path = path + '.version'
+        self._file_lock = _FileLock.for_path(path + '.lock')
+
+    @contextmanager
+    def lock(self):
+        """Hold the store's write lock (across processes; re-entrant per thread)"""
+        self._file_lock.acquire()
+        try:
+            yield self
+        finally:
+            self._file_lock.release()
+
+    def load(self) -> List[Dict]:
+        """Return all stored posts (empty list if the file does not exist yet)"""
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def version(self) -> int:
+        """
+        Save counter of the posts file; 0 before the first versioned save
+
+        A file changed by a writer that did not record a version (an older
+        process, a manual edit) counts as one version newer than recorded.
+        """
+        recorded = self._read_sidecar()
+        version = recorded.get('version', 0)
+        if recorded.get('signature') != self._signature():
+            version += 1
+        return version
+
+    def summary(self) -> Dict:
+        """
+        Posts per status ('counts') and the earliest scheduled time ('next_due')
+
+        Every save records them in the version sidecar, so this reads one small
+        file instead of the posts; a file saved without them is counted here.
+        """
+        recorded = self._read_sidecar()
+        if 'counts' in recorded and recorded.get('signature') == self._signature():
+            return {'counts': recorded['counts'], 'next_due': recorded.get('next_due')}
+        return summarize_posts(self.load())
+
+    def load_versioned(self) -> Tuple[List[Dict], int]:
+        """Posts and the version they were read at"""
+        while True:
+            version = self.version()
+            posts = self.load()
+            if self.version() == version:
+                return posts, version
+
+    def records(self) -> Iterator[PostRecord]:
+        """Stream stored posts as PostRecords without loading the whole file"""
+        if not os.path.exists(self.path):
+            return iter(())
+        return iter_records(self.path)
+
+    def save(self, posts: List[Dict], expected_version: Optional[int] = None) -> int:
+        """
+        Replace the stored posts atomically; returns the new version
+
+        Raises:
+            ConcurrentUpdate: if expected_version is given and the file has
+                been saved since that version was read
+        """
+        with self.lock():
+            version = self.version()
+            if expected_version is not None and version != expected_version:
+                raise ConcurrentUpdate(f"{self.path} changed (version {expected_version} -> {version})")
+
+            # Readers see the old file or the new one, never a partial write
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(posts, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+            version += 1
+            tmp_path = f"{self.version_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': version, 'signature': self._signature(), **summarize_posts(posts)}, f)
+            os.replace(tmp_path, self.version_path)
+            return version
+
+    def update(self, mutator: Callable[[List[Dict]], Optional[List[Dict]]],
+               retries: int = UPDATE_RETRIES) -> Optional[List[Dict]]:
+        """
+        Read-modify-write with optimistic versioning
+
+        mutator gets the current posts and returns the posts to save, or None
+        to leave the file alone. It runs outside the lock and is re-run on
+        fresh posts if another writer saved in between; the last attempt
+        holds the lock throughout, so the update always lands.
+
+        Returns:
+            list: the saved posts, or None if the mutator made no change
+        """
+        for attempt in range(retries + 1):
+            if attempt == retries:
+                with self.lock():
+                    posts = mutator(self.load())
+                    if posts is not None:
+                        self.save(posts)
+                    return posts
+
+            posts, version = self.load_versioned()
+            posts = mutator(posts)
+            if posts is None:
+                return None
+            try:
+                self.save(posts, expected_version=version)
+                return posts
+            except ConcurrentUpdate:
+                continue
+
+    def _read_sidecar(self) -> Dict:
+        try:
+            with open(self.version_path, 'r', encoding='utf-8') as f:
+                recorded = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return recorded if isinstance(recorded, dict) else {}
+
+    def _signature(self) -> Optional[List[int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def slot_allocator(self, posts: List[Dict]) -> SlotAllocator:
+        """Slot index over the given posts, using the config.json slot settings"""
+        allocator = SlotAllocator.from_config_file(self.config_file)
+        allocator.rebuild(posts)
+        return allocator
+
+    def add(self, topic: str, schedule_time: str, content: Optional[str] = None,
+            id_prefix: str = 'custom_post', image_path: Optional[str] = None) -> Dict:
+        """
+        Append a scheduled post; the running scheduler picks it up on its next reload
+
+        Raises:
+            ValueError: if the time cannot be parsed or is not in the future
+            SlotConflict: if the time is too close to another post (slot_policy 'reject')
+        """
+        post_datetime = parse_schedule_time(schedule_time)
+        if post_datetime <= datetime.now():
+            raise ValueError(f"Schedule time {schedule_time} is in the past!")
+
+        added = {}
+
+        def append(posts):
+            placed = self.slot_allocator(posts).place(post_datetime, not_before=datetime.now())
+            added['post'] = {
+                'id': new_post_id(id_prefix),
+                'topic': topic,
+                'schedule_time': placed.isoformat(),
+                'content': content,
+                'status': 'scheduled'
+            }
+            if image_path:
+                added['post']['image_path'] = image_path
+            posts.append(added['post'])
+            return posts
+
+        self.update(append)
+        return added['post']
+
+    def bulk_add(self, rows, allow_partial: bool = False, dry_run: bool = False) -> Dict:
+        """
+        Validate (line, row) pairs and append them all in a single write
+
+        Args:
+            allow_partial (bool): commit the valid rows even if some are rejected
+            dry_run (bool): validate only
+
+        Returns:
+            dict: import report (see bulk_import.build_report)
+        """
+        from bulk_import import validate_rows, allocate_slots, make_posts, build_report
+
+        rows = list(rows)
+        report = {}
+
+        def append(posts):
+            entries, errors = validate_rows(rows)
+            entries, slot_errors = allocate_slots(entries, self.slot_allocator(posts))
+            errors.extend(slot_errors)
+            if dry_run or not entries or (errors and not allow_partial):
+                report.update(build_report(entries, errors, [], committed=False))
+                return None
+
+            new_posts = make_posts(entries)
+            report.update(build_report(entries, errors, new_posts, committed=True))
+            return posts + new_posts
+
+        self.update(append)
+        return report
+
+    def apply_batch(self, operations: List[Dict], allow_partial: bool = False, dry_run: bool = False) -> Dict:
+        """
+        Apply create/update/reschedule/delete operations with a single write
+
+        Args:
+            operations (list): dicts with 'op' and its fields, see batch_ops
+            allow_partial (bool): commit the operations that succeeded even if some failed
+            dry_run (bool): validate only
+
+        Returns:
+            dict: batch report with per-operation results
+        """
+        from batch_ops import apply_operations, build_batch_report, should_commit
+
+        report = {}
+
+        def apply(posts):
+            posts, results = apply_operations(posts, operations, self.slot_allocator(posts), id_prefix='web_post')
+            committed = should_commit(results, allow_partial, dry_run)
+            report.update(build_batch_report(results, committed))
+            return posts if committed else None
+
+        self.update(apply)
+        return report
+
+    def misfire_grace(self) -> float:
+        """Seconds past its time a post can still fire (config.json scheduler.misfire_grace_time)"""
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                return float(json.load(f).get('scheduler', {}).get('misfire_grace_time', MISFIRE_GRACE_SECONDS))
+        except (OSError, ValueError, TypeError, AttributeError):
+            return MISFIRE_GRACE_SECONDS
+
+    def expire_overdue(self, grace_seconds: Optional[float] = None, now: Optional[datetime] = None) -> int:
+        """
+        Mark scheduled posts more than grace_seconds (default: the misfire
+        grace) past their time as expired; the scheduler can no longer run them
+
+        Returns:
+            int: number of posts expired
+        """
+        grace = self.misfire_grace() if grace_seconds is None else grace_seconds
+        cutoff = (now or datetime.now()) - timedelta(seconds=grace)
+        # Cheap check first: nothing to do unless the earliest scheduled post is overdue
+        next_due = self.summary()['next_due']
+        if next_due is None or datetime.fromisoformat(next_due) >= cutoff:
+            return 0
+
+        expired = []
+
+        def expire(posts):
+            expired[:] = expire_overdue_posts(posts, cutoff)
+            return posts if expired else None
+
+        self.update(expire)
+        return len(expired)
+
+    def cancel(self, post_id: str) -> bool:
+        """Mark a pending post cancelled; returns False if it does not exist or already finished"""
+        def mark_cancelled(posts):
+            for post in posts:
+                if post['id'] == post_id:
+                    if not PostStatus(post['status']).is_pending:
+                        return None
+                    post['status'] = 'cancelled'
+                    return posts
+            return None
+
+        return self.update(mark_cancelled) is not None
+
+    def delete(self, post_id: str) -> bool:
+        """Remove a post entirely; returns False if it does not exist"""
+        def remove(posts):
+            remaining = [post for post in posts if post['id'] != post_id]
+            return remaining if len(remaining) != len(posts) else None
+
+        return self.update(remove) is not None
+
+    def reschedule(self, post_id: str, new_datetime: datetime) -> Optional[Dict]:
+        """
+        Move a post to a new time and make it eligible to run again
+
+        Returns:
+            dict: the updated post (its time may be shifted by the slot policy),
+                  or None if it does not exist
+
+        Raises:
+            SlotConflict: if the time is too close to another post (slot_policy 'reject')
+        """
+        moved = {}
+
+        def move(posts):
+            post = next((p for p in posts if p['id'] == post_id), None)
+            if post is None:
+                return None
+
+            allocator = self.slot_allocator(posts)
+            allocator.release(post_id)
+            placed = allocator.place(new_datetime, post.get('account'), not_before=datetime.now())
+
+            post['schedule_time'] = placed.isoformat()
+            post['status'] = 'scheduled'
+            for key in ('completed_at', 'attempts', 'next_attempt_at', 'last_error'):
+                post.pop(key, None)
+            moved['post'] = post
+            return posts
+
+        self.update(move)
+        return moved.get('post')
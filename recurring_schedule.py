@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Recurring post schedule engine
+Turns the post_schedule rules in config.json into concrete scheduled posts,
+materializing only the next few occurrences of each rule at a time.
+The latest occurrence materialized per rule is kept beside the posts file,
+so an occurrence that was deleted is never materialized again.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from apscheduler.triggers.cron import CronTrigger
+
+from post_record import PostStatus
+
+WEEKDAYS = {
+    'monday': 'mon', 'tuesday': 'tue', 'wednesday': 'wed', 'thursday': 'thu',
+    'friday': 'fri', 'saturday': 'sat', 'sunday': 'sun'
+}
+
+
+class RecurringRule:
+    """A single post_schedule entry: either time + days or a crontab expression"""
+
+    def __init__(self, time: str = None, days: List[str] = None, topic: str = None,
+                 cron: str = None, account: str = None, content: str = None, name: str = None):
+        self.time = time
+        self.days = days or []
+        self.topic = topic
+        self.cron = cron
+        self.account = account
+        self.content = content
+        self.name = name
+        self.trigger = self._build_trigger()
+
+    @classmethod
+    def from_config(cls, entry: Dict) -> 'RecurringRule':
+        return cls(
+            time=entry.get('time'),
+            days=entry.get('days'),
+            topic=entry.get('topic'),
+            cron=entry.get('cron'),
+            account=entry.get('account'),
+            content=entry.get('content'),
+            name=entry.get('name')
+        )
+
+    def _build_trigger(self) -> CronTrigger:
+        if self.cron:
+            return CronTrigger.from_crontab(self.cron)
+        if not self.time:
+            raise ValueError("Recurring rule needs either 'time' or 'cron'")
+
+        hour, minute = datetime.strptime(self.time, '%H:%M').timetuple()[3:5]
+        if self.days:
+            try:
+                day_of_week = ','.join(WEEKDAYS[day.strip().lower()] for day in self.days)
+            except KeyError as e:
+                raise ValueError(f"Unknown weekday in recurring rule: {e}")
+        else:
+            day_of_week = '*'
+        return CronTrigger(day_of_week=day_of_week, hour=hour, minute=minute)
+
+    @property
+    def key(self) -> str:
+        """Stable identifier; editing a rule produces a new key"""
+        if self.name:
+            return "".join(c if c.isalnum() or c in '-_' else '_' for c in self.name)
+        fingerprint = json.dumps(
+            [self.time, sorted(self.days), self.topic, self.cron, self.account, self.content]
+        )
+        return hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()[:10]
+
+    def next_occurrences(self, after: datetime, count: int) -> List[datetime]:
+        """Return the next `count` fire times strictly after `after` (naive local time)"""
+        occurrences = []
+        now = after.astimezone()
+        previous = None
+        while len(occurrences) < count:
+            fire_time = self.trigger.get_next_fire_time(previous, now)
+            if fire_time is None:
+                break
+            if fire_time > now:
+                occurrences.append(fire_time.replace(tzinfo=None))
+            previous = fire_time
+            now = fire_time
+        return occurrences
+
+    def occurrence_id(self, fire_time: datetime) -> str:
+        return f"recurring_{self.key}_{fire_time.strftime('%Y%m%d%H%M')}"
+
+
+def default_state_path(posts_file: str) -> str:
+    return posts_file + '.recurring'
+
+
+class RecurringScheduleEngine:
+    def __init__(self, config_file: str = 'config.json', horizon: int = 3, state_file: str = None):
+        self.config_file = config_file
+        self.horizon = horizon
+        self.state_file = state_file
+        self.rules: List[RecurringRule] = []
+        self._config_mtime: Optional[float] = None
+
+    def reload_if_changed(self) -> bool:
+        """Re-read post_schedule rules when config.json has been modified"""
+        try:
+            mtime = os.path.getmtime(self.config_file)
+        except OSError:
+            return False
+
+        if mtime == self._config_mtime:
+            return False
+
+        self._config_mtime = mtime
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get('post_schedule', [])
+        except Exception as e:
+            print(f"[WARNING] Could not read recurring schedule: {e}")
+            return False
+
+        rules = []
+        for entry in entries:
+            try:
+                rules.append(RecurringRule.from_config(entry))
+            except Exception as e:
+                print(f"[WARNING] Skipping invalid recurring rule {entry}: {e}")
+
+        self.rules = rules
+        print(f"[INFO] Loaded {len(rules)} recurring schedule rules")
+        return True
+
+    def _load_marks(self) -> Dict[str, str]:
+        """Rule key -> schedule_time of the latest occurrence materialized for it"""
+        if not self.state_file or not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"[WARNING] Could not read recurring schedule state: {e}")
+            return {}
+
+    def record(self, new_posts: List[Dict]):
+        """
+        Remember the occurrences materialize() returned once they are saved;
+        call it under the posts file lock so nodes do not lose each other's marks
+        """
+        if not self.state_file or not new_posts:
+            return
+        marks = self._load_marks()
+        for post in new_posts:
+            key = post['recurring_rule']
+            marks[key] = max(marks.get(key, ''), post['schedule_time'])
+
+        tmp_path = f"{self.state_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(marks, f, indent=2)
+        os.replace(tmp_path, self.state_file)
+
+    def materialize(self, posts: List[Dict], now: datetime = None) -> Tuple[List[Dict], List[str]]:
+        """
+        Work out which recurring occurrences need to be added or withdrawn
+
+        Occurrences at or before a rule's recorded mark were materialized
+        already; if they are no longer in posts they were deleted, so they are
+        not added again.
+
+        Args:
+            posts (list): current post store contents
+            now (datetime, optional): reference time, defaults to datetime.now()
+
+        Returns:
+            tuple: (new post dicts to schedule, ids of pending occurrences
+                    whose rule no longer exists)
+        """
+        now = now or datetime.now()
+        existing_ids = {post['id'] for post in posts}
+        active_keys = {rule.key for rule in self.rules}
+        marks = self._load_marks()
+
+        new_posts = []
+        for rule in self.rules:
+            for fire_time in rule.next_occurrences(now, self.horizon):
+                post_id = rule.occurrence_id(fire_time)
+                if post_id in existing_ids or fire_time.isoformat() <= marks.get(rule.key, ''):
+                    continue
+                new_posts.append({
+                    'id': post_id,
+                    'topic': rule.topic,
+                    'schedule_time': fire_time.isoformat(),
+                    'content': rule.content,
+                    'status': 'scheduled',
+                    'recurring_rule': rule.key,
+                    'account': rule.account
+                })
+                existing_ids.add(post_id)
+
+        orphaned = [
+            post['id'] for post in posts
+            if post.get('recurring_rule') and post['recurring_rule'] not in active_keys
+            and PostStatus(post['status']).is_pending
+        ]
+        return new_posts, orphaned
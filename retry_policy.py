@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Retry policy for failed publishes
+Decides whether a failed attempt is worth repeating (rate limits, server
+errors and network failures are; other client errors are not) and how long
+to back off before the next attempt
+"""
+
+import random
+from typing import Dict, Iterable, Optional
+
+RETRYABLE_STATUS_CODES = {408, 425, 429}
+NETWORK_ERROR = 'error'  # recorded instead of a status code when no response arrived
+
+
+def is_retryable_status(status) -> bool:
+    if status == NETWORK_ERROR:
+        return True
+    try:
+        code = int(status)
+    except (TypeError, ValueError):
+        return True
+    return code in RETRYABLE_STATUS_CODES or code >= 500
+
+
+def is_retryable(statuses: Optional[Iterable]) -> bool:
+    """
+    Classify a failed publish from the status codes of its API calls
+
+    The poster falls through several endpoints, so a single transient
+    response anywhere makes the whole attempt worth repeating; a failure
+    with no recorded response (timeout, crash) is also treated as transient.
+    Only attempts rejected entirely with client errors are permanent.
+    """
+    statuses = [status for status in (statuses or []) if not str(status).startswith('2')]
+    if not statuses:
+        return True
+    return any(is_retryable_status(status) for status in statuses)
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = 4, base_delay: float = 60, max_delay: float = 3600,
+                 jitter: float = 0.5):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'RetryPolicy':
+        """Build from the 'scheduler' section of config.json"""
+        return cls(
+            max_attempts=config.get('retry_max_attempts', 4),
+            base_delay=config.get('retry_base_delay', 60),
+            max_delay=config.get('retry_max_delay', 3600),
+            jitter=config.get('retry_jitter', 0.5)
+        )
+
+    def should_retry(self, attempts_made: int) -> bool:
+        return attempts_made < self.max_attempts
+
+    def delay(self, attempts_made: int) -> float:
+        """Seconds to wait after the given number of failed attempts"""
+        delay = min(self.max_delay, self.base_delay * (2 ** max(0, attempts_made - 1)))
+        # Spread retries of posts that failed together (e.g. one rate-limit burst)
+        return delay * (1 - self.jitter * random.random())
@@ -7,7 +7,8 @@ import argparse
 import sys
 import os
 from datetime import datetime, timedelta
-from custom_scheduler import CustomPostScheduler
+from post_store import PostStore, DEFAULT_POSTS_FILE, parse_schedule_time, print_post_listing
+from control_socket import send_control_request
 
 def main():
     parser = argparse.ArgumentParser(description='Schedule LinkedIn Posts at Custom Times')
@@ -20,8 +21,19 @@ def main():
     add_parser.add_argument('--time', required=True, help='Schedule time (HH:MM, YYYY-MM-DD, or YYYY-MM-DD HH:MM)')
     add_parser.add_argument('--content', help='Pre-written content (optional)')
     
+    # Bulk import command
+    bulk_parser = subparsers.add_parser('bulk', help='Schedule many posts from a CSV or JSONL file')
+    bulk_parser.add_argument('--file', required=True, help="CSV/JSONL file with topic,time[,content] ('-' for stdin)")
+    bulk_parser.add_argument('--format', choices=['csv', 'jsonl'], help='Input format (default: from file extension)')
+    bulk_parser.add_argument('--allow-partial', action='store_true', help='Schedule valid rows even if some rows are invalid')
+    bulk_parser.add_argument('--dry-run', action='store_true', help='Validate without scheduling')
+    
     # List posts command
     list_parser = subparsers.add_parser('list', help='List scheduled posts')
+    list_parser.add_argument('--history', action='store_true', help='Page through archived posts instead')
+    list_parser.add_argument('--page', type=int, default=1, help='Archive page number (newest first)')
+    list_parser.add_argument('--page-size', type=int, default=20, help='Archived posts per page')
+    list_parser.add_argument('--status', help='Only show archived posts with this status')
     
     # Start scheduler command
     start_parser = subparsers.add_parser('start', help='Start the scheduler')
@@ -30,8 +42,13 @@ def main():
     cancel_parser = subparsers.add_parser('cancel', help='Cancel a scheduled post')
     cancel_parser.add_argument('--id', required=True, help='Job ID to cancel')
     
+    # Reschedule post command
+    reschedule_parser = subparsers.add_parser('reschedule', help='Move a post to a new time')
+    reschedule_parser.add_argument('--id', required=True, help='Job ID to move')
+    reschedule_parser.add_argument('--time', required=True, help='New time (HH:MM, YYYY-MM-DD, or YYYY-MM-DD HH:MM)')
+    
     # Clear completed posts
-    clear_parser = subparsers.add_parser('clear', help='Clear completed/cancelled posts')
+    clear_parser = subparsers.add_parser('clear', help='Move completed/cancelled posts to the archive')
     
     # Add status command
     status_parser = subparsers.add_parser('status', help='Check scheduler status')
@@ -48,8 +65,6 @@ def main():
         parser.print_help()
         return
     
-    scheduler = CustomPostScheduler()
-    
     if args.command == 'add':
         print(f"[SCHEDULE] Scheduling post...")
         print(f"   Topic: {args.topic}")
@@ -57,29 +72,46 @@ def main():
         if args.content:
             print(f"   Content: {args.content[:50]}...")
         
-        success = scheduler.add_post(args.topic, args.time, args.content)
+        success = submit_post(args.topic, args.time, args.content)
         
         if success:
             print("\n[INFO] Next steps:")
             print("1. Run 'python schedule_post.py list' to see all scheduled posts")
             print("2. Run 'python schedule_post.py start' to start the scheduler")
     
+    elif args.command == 'bulk':
+        bulk_import(args.file, args.format, args.allow_partial, args.dry_run)
+    
+    elif args.command == 'list' and args.history:
+        list_archived_posts(args.page, args.page_size, args.status)
+    
     elif args.command == 'list':
-        scheduler.list_scheduled_posts()
+        # Read-only: no scheduler, API clients or .env needed
+        try:
+            print_post_listing(PostStore(DEFAULT_POSTS_FILE).records())
+        except Exception as e:
+            print(f"[ERROR] Could not read posts: {e}")
         print("\n[INFO] Commands:")
         print("- Add post: python schedule_post.py add --topic 'AI trends' --time '14:30'")
         print("- Start scheduler: python schedule_post.py start")
         print("- Cancel post: python schedule_post.py cancel --id JOB_ID")
+        print("- Move post: python schedule_post.py reschedule --id JOB_ID --time '2024-01-15 09:00'")
         print("- Clear old posts: python schedule_post.py clear")
+        print("- Browse history: python schedule_post.py list --history --page 1")
     
     elif args.command == 'start':
         print("[INFO] Checking for scheduled posts...")
+        from custom_scheduler import CustomPostScheduler
+        scheduler = CustomPostScheduler()
         scheduler.list_scheduled_posts()
         print("\nStarting scheduler...")
         scheduler.start_scheduler()
     
     elif args.command == 'cancel':
-        scheduler.cancel_post(args.id)
+        cancel_post(args.id)
+    
+    elif args.command == 'reschedule':
+        reschedule_post(args.id, args.time)
     
     elif args.command == 'status':
         check_scheduler_status()
@@ -91,55 +123,204 @@ def main():
         quick_time = get_quick_time(args.when)
         if quick_time:
             print(f"[SCHEDULE] Quick scheduling for '{args.when}'...")
-            success = scheduler.add_post(args.topic, quick_time)
+            success = submit_post(args.topic, quick_time)
             
             if success:
                 print("\n[SUCCESS] Quick schedule complete!")
                 print("Run 'python schedule_post.py start' to activate scheduler")
 
+def submit_post(topic, schedule_time, content=None):
+    """Schedule through the running scheduler, or write to the store if it is down"""
+    response = send_control_request(DEFAULT_POSTS_FILE, 'add', topic=topic,
+                                    schedule_time=schedule_time, content=content)
+    if response is not None:
+        if response['ok']:
+            result = response['result']
+            print(f"[SUCCESS] Post scheduled on the running scheduler (Job ID: {result['post_id']})")
+            print(f"   Time: {datetime.fromisoformat(result['schedule_time']).strftime('%Y-%m-%d %H:%M')}")
+            return True
+        print(f"[ERROR] Scheduler rejected the post: {response['error']}")
+        return False
+    
+    try:
+        post = PostStore(DEFAULT_POSTS_FILE).add(topic, schedule_time, content)
+    except Exception as e:
+        print(f"[ERROR] Error scheduling post: {e}")
+        return False
+    
+    print(f"[SUCCESS] Post saved (Job ID: {post['id']})")
+    print(f"   Time: {datetime.fromisoformat(post['schedule_time']).strftime('%Y-%m-%d %H:%M')}")
+    print("[INFO] Scheduler is not running; it will pick the post up when started")
+    return True
+
+def cancel_post(post_id):
+    """Cancel on the running scheduler, or mark cancelled in the store if it is down"""
+    response = send_control_request(DEFAULT_POSTS_FILE, 'cancel', post_id=post_id)
+    if response is not None:
+        if response['ok']:
+            print(f"[SUCCESS] Post {post_id} cancelled successfully")
+            return True
+        print(f"[ERROR] Error cancelling post: {response['error']}")
+        return False
+    
+    try:
+        if PostStore(DEFAULT_POSTS_FILE).cancel(post_id):
+            print(f"[SUCCESS] Post {post_id} cancelled successfully")
+            return True
+        print(f"[ERROR] Post {post_id} not found or already finished")
+    except Exception as e:
+        print(f"[ERROR] Error cancelling post: {e}")
+    return False
+
+def reschedule_post(post_id, schedule_time):
+    """Move a post on the running scheduler, or in the store if it is down"""
+    response = send_control_request(DEFAULT_POSTS_FILE, 'reschedule', post_id=post_id,
+                                    schedule_time=schedule_time)
+    if response is not None:
+        if response['ok']:
+            result = response['result']
+            print(f"[SUCCESS] Post {post_id} moved to "
+                  f"{datetime.fromisoformat(result['schedule_time']).strftime('%Y-%m-%d %H:%M')}")
+            return True
+        print(f"[ERROR] Error rescheduling post: {response['error']}")
+        return False
+    
+    try:
+        post = PostStore(DEFAULT_POSTS_FILE).reschedule(post_id, parse_schedule_time(schedule_time))
+    except Exception as e:
+        print(f"[ERROR] Error rescheduling post: {e}")
+        return False
+    
+    if post is None:
+        print(f"[ERROR] Post {post_id} not found")
+        return False
+    print(f"[SUCCESS] Post {post_id} moved to "
+          f"{datetime.fromisoformat(post['schedule_time']).strftime('%Y-%m-%d %H:%M')}")
+    print("[INFO] Scheduler is not running; it will pick the new time up when started")
+    return True
+
+def bulk_import(path, fmt=None, allow_partial=False, dry_run=False):
+    """Validate a content calendar and schedule it in one store write"""
+    from bulk_import import iter_rows
+    
+    fmt = fmt or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+    try:
+        if path == '-':
+            rows = list(iter_rows(sys.stdin, fmt))
+        else:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                rows = list(iter_rows(f, fmt))
+    except Exception as e:
+        print(f"[ERROR] Could not read {path}: {e}")
+        return False
+    
+    print(f"[INFO] Read {len(rows)} rows from {path}")
+    
+    response = send_control_request(DEFAULT_POSTS_FILE, 'bulk', rows=rows,
+                                    allow_partial=allow_partial, dry_run=dry_run)
+    if response is not None:
+        if not response['ok']:
+            print(f"[ERROR] Scheduler rejected the import: {response['error']}")
+            return False
+        report = response['result']
+    else:
+        try:
+            report = PostStore(DEFAULT_POSTS_FILE).bulk_add(rows, allow_partial, dry_run)
+        except Exception as e:
+            print(f"[ERROR] Bulk import failed: {e}")
+            return False
+    
+    for error in report['errors'][:20]:
+        print(f"[WARNING] Line {error['line']}: {error['error']}")
+    if len(report['errors']) > 20:
+        print(f"[WARNING] ... and {len(report['errors']) - 20} more invalid rows")
+    
+    print(f"[INFO] Valid rows: {report['valid']}, rejected rows: {report['rejected']}")
+    if report.get('shifted'):
+        print(f"[INFO] {report['shifted']} rows moved later to keep the minimum posting gap")
+    if report['committed']:
+        print(f"[SUCCESS] Scheduled {report['accepted']} posts")
+    elif dry_run:
+        print("[INFO] Dry run: nothing was scheduled")
+    elif report['rejected']:
+        print("[ERROR] Nothing was scheduled; fix the rows above or use --allow-partial")
+    else:
+        print("[INFO] No posts to schedule")
+    return report['committed']
+
 def clear_completed_posts():
-    """Clear completed, failed, and cancelled posts"""
-    posts_file = 'scheduled_posts.json'
+    """Move completed, failed, expired and cancelled posts into the archive"""
+    from post_archive import PostArchive, ARCHIVABLE_STATUSES, default_archive_dir
+    
+    posts_file = DEFAULT_POSTS_FILE
     
     if not os.path.exists(posts_file):
         print("No posts file found.")
         return
     
     try:
-        import json
-        with open(posts_file, 'r', encoding='utf-8') as f:
-            all_posts = json.load(f)
-        
-        # Keep only scheduled posts
-        scheduled_posts = [p for p in all_posts if p['status'] == 'scheduled']
-        
-        with open(posts_file, 'w', encoding='utf-8') as f:
-            json.dump(scheduled_posts, f, indent=2, ensure_ascii=False)
+        store = PostStore(posts_file)
+        # Hold the store lock so no writer slips in between archiving and saving
+        with store.lock():
+            all_posts = store.load()
+            
+            finished_posts = [p for p in all_posts if p['status'] in ARCHIVABLE_STATUSES]
+            remaining_posts = [p for p in all_posts if p['status'] not in ARCHIVABLE_STATUSES]
+            
+            # Archive first so a failed write never loses history
+            PostArchive(default_archive_dir(posts_file)).archive(finished_posts)
+            store.save(remaining_posts)
         
-        cleared_count = len(all_posts) - len(scheduled_posts)
-        print(f"[SUCCESS] Cleared {cleared_count} completed posts")
-        print(f"[INFO] {len(scheduled_posts)} scheduled posts remaining")
+        print(f"[SUCCESS] Archived {len(finished_posts)} finished posts")
+        print(f"[INFO] {len(remaining_posts)} scheduled posts remaining")
         
     except Exception as e:
         print(f"[ERROR] Error clearing posts: {e}")
 
+def list_archived_posts(page=1, page_size=20, status=None):
+    """Print one page of archived post history"""
+    from post_archive import PostArchive, default_archive_dir
+    
+    try:
+        result = PostArchive(default_archive_dir(DEFAULT_POSTS_FILE)).page(page, page_size, status)
+    except Exception as e:
+        print(f"[ERROR] Could not read archive: {e}")
+        return
+    
+    print(f"\n[INFO] Post History (page {result['page']} of {max(result['pages'], 1)}, {result['total']} posts)")
+    print("=" * 60)
+    
+    if not result['posts']:
+        print("No archived posts found.")
+        return
+    
+    for post in result['posts']:
+        schedule_time = datetime.fromisoformat(post['schedule_time'])
+        print(f"- Topic: {post['topic']}")
+        print(f"  Scheduled: {schedule_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        if post.get('completed_at'):
+            completed_dt = datetime.fromisoformat(post['completed_at'])
+            print(f"  Completed: {completed_dt.strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"  Status: {post['status']}")
+        print(f"  ID: {post['id']}")
+    
+    if result['page'] < result['pages']:
+        print(f"\n[INFO] Next page: python schedule_post.py list --history --page {result['page'] + 1}")
+
 def check_scheduler_status():
-    """Check if scheduler is running and show status"""
-    import psutil
-    import os
+    """Show running schedulers from their heartbeat files and the post queue"""
+    from heartbeat import read_heartbeats, default_run_dir
     
     print("[INFO] Checking scheduler status...")
     
     # Check if scheduled_posts.json exists and has content
-    posts_file = 'scheduled_posts.json'
+    posts_file = DEFAULT_POSTS_FILE
     if os.path.exists(posts_file):
         try:
-            import json
-            with open(posts_file, 'r') as f:
-                posts = json.load(f)
-            
-            scheduled_count = len([p for p in posts if p['status'] == 'scheduled'])
-            total_count = len(posts)
+            # Status counters recorded by the last save; no need to read the posts
+            counts = PostStore(posts_file).summary()['counts']
+            scheduled_count = counts.get('scheduled', 0) + counts.get('retrying', 0)
+            total_count = sum(counts.values())
             
             print(f"[INFO] Posts in queue: {scheduled_count} scheduled, {total_count} total")
             
@@ -153,25 +334,29 @@ def check_scheduler_status():
     else:
         print("[INFO] No posts file found")
     
-    # Check for running Python processes
-    current_pid = os.getpid()
-    scheduler_processes = []
-    
-    try:
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            if (proc.info['name'] and 'python' in proc.info['name'].lower() and
-                proc.info['cmdline'] and len(proc.info['cmdline']) > 1):
-                
-                cmdline = ' '.join(proc.info['cmdline'])
-                if 'schedule_post.py start' in cmdline and proc.info['pid'] != current_pid:
-                    scheduler_processes.append(proc.info)
+    heartbeats = read_heartbeats(default_run_dir(posts_file))
+    running = [hb for hb in heartbeats if hb['state'] == 'running']
     
-    except (psutil.NoSuchProcess, psutil.AccessDenied):
-        pass
+    for hb in heartbeats:
+        if hb['state'] != 'running':
+            print(f"[WARNING] Scheduler {hb['node_id']} is {hb['state']} "
+                  f"(last heartbeat {hb['age_seconds']:.0f}s ago)")
+            continue
+        
+        executor = hb.get('executor', {})
+        print(f"[SUCCESS] Scheduler is running (PID: {hb['pid']}, node {hb['node_id']}, "
+              f"up {timedelta(seconds=hb['uptime_seconds'])})")
+        print(f"   Active jobs: {hb['active_jobs']}, pending posts: {hb.get('pending_posts', 0)}")
+        if hb.get('next_run_time'):
+            print(f"   Next fire: {hb['next_run_time']} ({hb['next_post_id']})")
+        print(f"   Queue: {executor.get('jobs_waiting', 0)} waiting, {executor.get('jobs_running', 0)} running")
+        if hb.get('last_success'):
+            print(f"   Last success: {hb['last_success']['at']} ({hb['last_success']['post_id']})")
+        if hb.get('last_failure'):
+            print(f"   Last failure: {hb['last_failure']['at']} ({hb['last_failure']['post_id']}): "
+                  f"{hb['last_failure']['error']}")
     
-    if scheduler_processes:
-        print(f"[SUCCESS] Scheduler is running (PIDs: {[p['pid'] for p in scheduler_processes]})")
-    else:
+    if not running:
         print("[INFO] Scheduler is not running")
         print("[INFO] Start with: python schedule_post.py start")
 
@@ -213,6 +398,9 @@ def show_examples():
     print("6. Start the scheduler:")
     print("   python schedule_post.py start")
     print()
+    print("7. Import a content calendar (CSV columns: topic,time,content):")
+    print("   python schedule_post.py bulk --file calendar.csv")
+    print()
 
 if __name__ == "__main__":
     if len(sys.argv) == 1:
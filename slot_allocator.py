@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Schedule slot allocation
+Keeps the scheduled times of each account in a sorted index so a new post can
+be checked against its neighbours with a binary search, and either rejected,
+or shifted to the nearest time that keeps the configured minimum gap
+"""
+
+import json
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SLOT_POLICIES = ('off', 'reject', 'shift')
+DEFAULT_ACCOUNT = 'default'
+DEFAULT_MIN_GAP_MINUTES = 5
+DEFAULT_SLOT_POLICY = 'reject'
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _seconds(when: datetime) -> float:
+    return (when - _EPOCH).total_seconds()
+
+
+def _datetime(seconds: float) -> datetime:
+    return _EPOCH + timedelta(seconds=seconds)
+
+
+class SlotConflict(ValueError):
+    """Requested time is closer than the minimum gap to another scheduled post"""
+
+    def __init__(self, requested: datetime, conflicting_id: str, suggestion: datetime, gap_minutes: float):
+        self.requested = requested
+        self.conflicting_id = conflicting_id
+        self.suggestion = suggestion
+        super().__init__(
+            f"{requested.strftime('%Y-%m-%d %H:%M')} is within {gap_minutes:g} minutes of post "
+            f"{conflicting_id}; nearest free slot is {suggestion.strftime('%Y-%m-%d %H:%M')}"
+        )
+
+
+class _AccountSlots:
+    """Sorted (time, post id) pairs for one account"""
+
+    def __init__(self):
+        self.entries: List[Tuple[float, str]] = []
+
+    def add(self, seconds: float, post_id: str):
+        insort(self.entries, (seconds, post_id))
+
+    def remove(self, seconds: float, post_id: str):
+        i = bisect_left(self.entries, (seconds, post_id))
+        if i < len(self.entries) and self.entries[i] == (seconds, post_id):
+            del self.entries[i]
+
+    def conflict(self, seconds: float, gap: float) -> Optional[Tuple[float, str]]:
+        """First entry strictly closer than gap to seconds, if any"""
+        i = bisect_right(self.entries, (seconds - gap, '\uffff'))
+        if i < len(self.entries) and self.entries[i][0] < seconds + gap:
+            return self.entries[i]
+        return None
+
+    def next_free(self, seconds: float, gap: float) -> float:
+        # Each step jumps past one occupied slot, so the cost is bounded by
+        # the length of the cluster the requested time falls into
+        while True:
+            hit = self.conflict(seconds, gap)
+            if hit is None:
+                return seconds
+            seconds = hit[0] + gap
+
+    def previous_free(self, seconds: float, gap: float) -> float:
+        while True:
+            i = bisect_left(self.entries, (seconds + gap, '')) - 1
+            if i >= 0 and self.entries[i][0] > seconds - gap:
+                seconds = self.entries[i][0] - gap
+            else:
+                return seconds
+
+
+class SlotAllocator:
+    def __init__(self, min_gap_minutes: float = DEFAULT_MIN_GAP_MINUTES,
+                 account_gaps: Optional[Dict[str, float]] = None, policy: str = DEFAULT_SLOT_POLICY):
+        if policy not in SLOT_POLICIES:
+            raise ValueError(f"Unknown slot policy: {policy} (expected one of {', '.join(SLOT_POLICIES)})")
+        self.min_gap_minutes = min_gap_minutes
+        self.account_gaps = dict(account_gaps or {})
+        self.policy = policy
+        self._accounts: Dict[str, _AccountSlots] = {}
+        self._reserved: Dict[str, Tuple[str, float]] = {}  # post id -> (account, seconds)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'SlotAllocator':
+        """Build from the 'scheduler' section of config.json"""
+        return cls(
+            min_gap_minutes=config.get('slot_min_gap_minutes', DEFAULT_MIN_GAP_MINUTES),
+            account_gaps=config.get('slot_account_gaps'),
+            policy=config.get('slot_policy', DEFAULT_SLOT_POLICY)
+        )
+
+    @classmethod
+    def from_config_file(cls, config_file: str = 'config.json') -> 'SlotAllocator':
+        """Build from config.json without importing the scheduler (defaults if unreadable)"""
+        try:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                return cls.from_config(json.load(f).get('scheduler', {}))
+        except (OSError, ValueError):
+            return cls()
+
+    def gap_minutes(self, account: Optional[str] = None) -> float:
+        return self.account_gaps.get(account or DEFAULT_ACCOUNT, self.min_gap_minutes)
+
+    def rebuild(self, posts: Iterable[Dict]):
+        """Index every scheduled post, replacing the current contents"""
+        self._accounts.clear()
+        self._reserved.clear()
+        for post in posts:
+            if post.get('status') == 'scheduled':
+                self.reserve(post['id'], datetime.fromisoformat(post['schedule_time']), post.get('account'))
+
+    def reserve(self, post_id: str, when: datetime, account: Optional[str] = None):
+        self.release(post_id)
+        account = account or DEFAULT_ACCOUNT
+        seconds = _seconds(when)
+        self._accounts.setdefault(account, _AccountSlots()).add(seconds, post_id)
+        self._reserved[post_id] = (account, seconds)
+
+    def release(self, post_id: str) -> Optional[datetime]:
+        """Free post_id's slot; returns the time it held, or None if it held none"""
+        slot = self._reserved.pop(post_id, None)
+        if slot is None:
+            return None
+        self._accounts[slot[0]].remove(slot[1], post_id)
+        return _datetime(slot[1])
+
+    def __contains__(self, post_id: str) -> bool:
+        return post_id in self._reserved
+
+    def __len__(self) -> int:
+        return len(self._reserved)
+
+    def conflict(self, when: datetime, account: Optional[str] = None) -> Optional[str]:
+        """Id of a scheduled post closer than the account's minimum gap, if any"""
+        gap = self.gap_minutes(account) * 60
+        slots = self._accounts.get(account or DEFAULT_ACCOUNT)
+        if not gap or slots is None:
+            return None
+        hit = slots.conflict(_seconds(when), gap)
+        return hit[1] if hit else None
+
+    def nearest_free(self, when: datetime, account: Optional[str] = None,
+                     not_before: Optional[datetime] = None) -> datetime:
+        """Closest time to when (earlier or later) that keeps the minimum gap"""
+        gap = self.gap_minutes(account) * 60
+        slots = self._accounts.get(account or DEFAULT_ACCOUNT)
+        if not gap or slots is None:
+            return when
+
+        seconds = _seconds(when)
+        later = slots.next_free(seconds, gap)
+        earlier = slots.previous_free(seconds, gap)
+        if not_before is not None and earlier < _seconds(not_before):
+            return _datetime(later)
+        return _datetime(earlier if seconds - earlier < later - seconds else later)
+
+    def place(self, when: datetime, account: Optional[str] = None,
+              not_before: Optional[datetime] = None) -> datetime:
+        """
+        Apply the slot policy to a requested time
+
+        Returns:
+            datetime: the time to schedule at (moved later under the 'shift' policy)
+
+        Raises:
+            SlotConflict: under the 'reject' policy, with the nearest free slot attached
+        """
+        if self.policy == 'off':
+            return when
+        conflicting_id = self.conflict(when, account)
+        if conflicting_id is None:
+            return when
+        if self.policy == 'shift':
+            gap = self.gap_minutes(account) * 60
+            return _datetime(self._accounts[account or DEFAULT_ACCOUNT].next_free(_seconds(when), gap))
+        raise SlotConflict(when, conflicting_id, self.nearest_free(when, account, not_before),
+                           self.gap_minutes(account))
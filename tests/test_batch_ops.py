@@ -0,0 +1,140 @@
+"""Batched create/update/reschedule/delete operations"""
+
+import os
+import sys
+import unittest
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from batch_ops import apply_operations, build_batch_report, should_commit
+from slot_allocator import SlotAllocator
+
+NOW = datetime(2030, 1, 1, 8, 0)
+
+
+def _posts():
+    return [
+        {'id': 'a', 'topic': 'A', 'schedule_time': '2030-01-01T09:00:00', 'content': None, 'status': 'scheduled'},
+        {'id': 'b', 'topic': 'B', 'schedule_time': '2030-01-01T10:00:00', 'content': None, 'status': 'scheduled'},
+        {'id': 'done', 'topic': 'D', 'schedule_time': '2029-12-31T09:00:00', 'content': 'x',
+         'status': 'completed', 'completed_at': '2029-12-31T09:00:05'},
+    ]
+
+
+def _allocator(posts, policy='reject'):
+    allocator = SlotAllocator(min_gap_minutes=30, policy=policy)
+    allocator.rebuild(posts)
+    return allocator
+
+
+class ApplyOperationsTest(unittest.TestCase):
+    def test_input_posts_are_not_modified(self):
+        posts = _posts()
+        apply_operations(posts, [{'op': 'update', 'post_id': 'a', 'topic': 'New'},
+                                 {'op': 'delete', 'post_id': 'b'}], _allocator(posts), now=NOW)
+        self.assertEqual(posts, _posts())
+
+    def test_operations_apply_in_order(self):
+        posts = _posts()
+        updated, results = apply_operations(posts, [
+            {'op': 'reschedule', 'post_id': 'a', 'schedule_time': '2030-01-02 09:00'},
+            # a's old slot is free again, so b can move next to where a was
+            {'op': 'reschedule', 'post_id': 'b', 'schedule_time': '2030-01-01 09:10'},
+            {'op': 'delete', 'post_id': 'a'},
+            {'op': 'update', 'post_id': 'a', 'topic': 'Gone'},
+        ], _allocator(posts), now=NOW)
+
+        self.assertEqual([result['ok'] for result in results], [True, True, True, False])
+        self.assertIn('not found', results[3]['error'])
+        self.assertEqual({post['id']: post['schedule_time'] for post in updated},
+                         {'b': '2030-01-01T09:10:00', 'done': '2029-12-31T09:00:00'})
+
+    def test_create_places_the_post(self):
+        posts = _posts()
+        updated, results = apply_operations(posts, [
+            {'op': 'create', 'topic': 'New', 'schedule_time': '2030-01-03 09:00', 'account': 'acme'},
+        ], _allocator(posts), now=NOW)
+        created = updated[-1]
+        self.assertTrue(results[0]['ok'])
+        self.assertEqual(results[0]['post_id'], created['id'])
+        self.assertEqual((created['status'], created['schedule_time'], created['account']),
+                         ('scheduled', '2030-01-03T09:00:00', 'acme'))
+
+    def test_failed_reschedule_keeps_the_original_slot(self):
+        posts = _posts()
+        allocator = _allocator(posts)
+        _, results = apply_operations(posts, [
+            {'op': 'reschedule', 'post_id': 'a', 'schedule_time': '2030-01-01 10:10'},
+        ], allocator, now=NOW)
+        self.assertFalse(results[0]['ok'])
+        self.assertIn('a', allocator)
+        self.assertEqual(allocator.conflict(datetime(2030, 1, 1, 9, 5)), 'a')
+
+    def test_failed_reschedule_restores_whatever_slot_was_released(self):
+        posts = _posts()
+        posts[0]['status'] = 'retrying'
+        allocator = _allocator(posts)
+        allocator.reserve('a', datetime(2030, 1, 1, 9, 0))  # the scheduler indexes retrying posts too
+        _, results = apply_operations(posts, [
+            {'op': 'reschedule', 'post_id': 'a', 'schedule_time': '2030-01-01 10:10'},
+            {'op': 'reschedule', 'post_id': 'done', 'schedule_time': '2030-01-01 10:10'},
+        ], allocator, now=NOW)
+        self.assertEqual([result['ok'] for result in results], [False, False])
+        self.assertEqual(allocator.conflict(datetime(2030, 1, 1, 9, 5)), 'a')
+        self.assertNotIn('done', allocator)
+
+    def test_reschedule_revives_a_finished_post(self):
+        posts = _posts()
+        updated, results = apply_operations(posts, [
+            {'op': 'reschedule', 'post_id': 'done', 'schedule_time': '2030-01-05 09:00'},
+        ], _allocator(posts), now=NOW)
+        done = next(post for post in updated if post['id'] == 'done')
+        self.assertTrue(results[0]['ok'])
+        self.assertEqual(done['status'], 'scheduled')
+        self.assertNotIn('completed_at', done)
+
+    def test_invalid_operations_are_reported(self):
+        posts = _posts()
+        _, results = apply_operations(posts, [
+            {'op': 'explode'},
+            'not an object',
+            {'op': 'create', 'schedule_time': '2030-01-03 09:00'},
+            {'op': 'create', 'topic': 'Past', 'schedule_time': '2029-01-01 09:00'},
+            {'op': 'reschedule', 'post_id': 'a'},
+            {'op': 'update', 'post_id': 'done', 'topic': 'Edited'},
+            {'op': 'update', 'post_id': 'a'},
+        ], _allocator(posts), now=NOW)
+        self.assertFalse(any(result['ok'] for result in results))
+        self.assertEqual(results[4]['error'], "Missing field 'schedule_time'")
+        self.assertIn('only pending posts', results[5]['error'])
+
+
+class CommitTest(unittest.TestCase):
+    def setUp(self):
+        posts = _posts()
+        _, self.mixed = apply_operations(posts, [
+            {'op': 'update', 'post_id': 'a', 'topic': 'Edited'},
+            {'op': 'delete', 'post_id': 'missing'},
+        ], _allocator(posts), now=NOW)
+
+    def test_batch_is_all_or_nothing_by_default(self):
+        self.assertFalse(should_commit(self.mixed))
+        report = build_batch_report(self.mixed, committed=False)
+        self.assertEqual((report['applied'], report['rejected']), (0, 1))
+
+    def test_allow_partial_commits_the_successes(self):
+        self.assertTrue(should_commit(self.mixed, allow_partial=True))
+        report = build_batch_report(self.mixed, committed=True)
+        self.assertEqual((report['applied'], report['rejected']), (1, 1))
+
+    def test_dry_run_and_empty_batches_never_commit(self):
+        ok = [result for result in self.mixed if result['ok']]
+        self.assertTrue(should_commit(ok))
+        self.assertFalse(should_commit(ok, dry_run=True))
+        self.assertFalse(should_commit([], allow_partial=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
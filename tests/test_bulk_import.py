@@ -0,0 +1,110 @@
+"""Bulk CSV/JSONL import: parsing, validation and the single-write commit"""
+
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bulk_import import allocate_slots, iter_rows, validate_rows
+from post_store import PostStore
+from slot_allocator import SlotAllocator
+
+NOW = datetime(2030, 1, 1, 8, 0)
+
+CALENDAR = """topic,time,content
+AI trends,2099-01-01 09:00,
+Career tips,2099-01-02,Written already
+,2099-01-03 09:00,
+Old news,2000-01-01 09:00,
+Bad time,next tuesday,
+"""
+
+
+class ParseTest(unittest.TestCase):
+    def test_csv_rows_carry_their_line_numbers(self):
+        rows = list(iter_rows(io.StringIO(CALENDAR), 'csv'))
+        self.assertEqual([line for line, _ in rows], [2, 3, 4, 5, 6])
+        self.assertEqual(rows[1][1]['content'], 'Written already')
+
+    def test_jsonl_skips_blank_lines_and_flags_bad_json(self):
+        stream = io.StringIO('{"topic": "A", "schedule_time": "2099-01-01 09:00"}\n\n{oops\n')
+        rows = list(iter_rows(stream, 'jsonl'))
+        self.assertEqual([line for line, _ in rows], [1, 3])
+        self.assertIn('Invalid JSON', rows[1][1]['_error'])
+
+    def test_unknown_format_is_refused(self):
+        with self.assertRaises(ValueError):
+            list(iter_rows(io.StringIO(''), 'xml'))
+
+
+class ValidateTest(unittest.TestCase):
+    def test_every_bad_row_is_reported_in_one_pass(self):
+        entries, errors = validate_rows(iter_rows(io.StringIO(CALENDAR), 'csv'), now=NOW)
+        self.assertEqual([(entry['line'], entry['topic']) for entry in entries], [(2, 'AI trends'), (3, 'Career tips')])
+        self.assertEqual(entries[1]['schedule_datetime'], datetime(2099, 1, 2, 9, 0))
+        self.assertIsNone(entries[0]['content'])
+        self.assertEqual([error['line'] for error in errors], [4, 5, 6])
+        self.assertEqual(errors[0]['error'], 'Missing topic')
+        self.assertIn('in the past', errors[1]['error'])
+
+    def test_rows_are_spaced_by_the_slot_policy_in_file_order(self):
+        rows = [(1, {'topic': 'A', 'time': '2099-01-01 09:00'}), (2, {'topic': 'B', 'time': '2099-01-01 09:10'})]
+        entries, _ = validate_rows(rows, now=NOW)
+        allocator = SlotAllocator(min_gap_minutes=30, policy='shift')
+        placed, errors = allocate_slots(entries, allocator, now=NOW)
+        self.assertEqual(errors, [])
+        self.assertEqual(placed[1]['schedule_datetime'], datetime(2099, 1, 1, 9, 30))
+        self.assertEqual(placed[1]['shifted_from'], datetime(2099, 1, 1, 9, 10))
+
+        entries, _ = validate_rows(rows, now=NOW)
+        placed, errors = allocate_slots(entries, SlotAllocator(min_gap_minutes=30, policy='reject'), now=NOW)
+        self.assertEqual(([entry['line'] for entry in placed], [error['line'] for error in errors]), ([1], [2]))
+
+
+class BulkAddTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='bulk-import-test-')
+        self.addCleanup(shutil.rmtree, self.work_dir, ignore_errors=True)
+        config_file = os.path.join(self.work_dir, 'config.json')
+        with open(config_file, 'w', encoding='utf-8') as f:
+            json.dump({'scheduler': {'slot_policy': 'shift', 'slot_min_gap_minutes': 30}}, f)
+        self.store = PostStore(os.path.join(self.work_dir, 'scheduled_posts.json'), config_file=config_file)
+
+    def rows(self):
+        return iter_rows(io.StringIO(CALENDAR), 'csv')
+
+    def test_any_invalid_row_commits_nothing_by_default(self):
+        report = self.store.bulk_add(self.rows())
+        self.assertEqual((report['committed'], report['valid'], report['rejected']), (False, 2, 3))
+        self.assertEqual(self.store.load(), [])
+        self.assertEqual(self.store.version(), 0)
+
+    def test_allow_partial_commits_the_valid_rows_in_one_write(self):
+        report = self.store.bulk_add(self.rows(), allow_partial=True)
+        posts = self.store.load()
+        self.assertEqual((report['committed'], report['accepted']), (True, 2))
+        self.assertEqual(report['post_ids'], [post['id'] for post in posts])
+        self.assertEqual([post['topic'] for post in posts], ['AI trends', 'Career tips'])
+        self.assertEqual(self.store.version(), 1)
+
+    def test_dry_run_only_validates(self):
+        report = self.store.bulk_add(self.rows(), allow_partial=True, dry_run=True)
+        self.assertEqual((report['committed'], report['valid'], report['post_ids']), (False, 2, []))
+        self.assertEqual(self.store.load(), [])
+
+    def test_rows_are_spaced_from_posts_already_stored(self):
+        self.store.add('Existing', '2099-01-01 09:00')
+        report = self.store.bulk_add([(2, {'topic': 'New', 'time': '2099-01-01 09:05'})])
+        self.assertEqual(report['shifted'], 1)
+        self.assertEqual(self.store.load()[1]['schedule_time'], '2099-01-01T09:30:00')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""ContentGenerator keeping its OpenAI calls inside the generation timeout"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+try:
+    import openai
+    from content_generator import ContentGenerator
+except ImportError:  # openai / python-dotenv not installed
+    ContentGenerator = None
+
+
+def _reply(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+@unittest.skipIf(ContentGenerator is None, 'generator dependencies are not installed')
+class GenerationTimeoutTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='generator-test-')
+        self.addCleanup(shutil.rmtree, self.work_dir, ignore_errors=True)
+        config_file = os.path.join(self.work_dir, 'config.json')
+        with open(config_file, 'w', encoding='utf-8') as f:
+            json.dump({'include_hashtags': True, 'max_hashtags': 3, 'post_length': 'short'}, f)
+        self.generator = ContentGenerator(config_file, generation_timeout=5)
+        self.timeouts = []
+        output = contextlib.redirect_stdout(io.StringIO())
+        output.__enter__()
+        self.addCleanup(output.__exit__, None, None, None)
+
+    def chat(self, delay=0):
+        def create(**kwargs):
+            self.timeouts.append(kwargs['timeout'])
+            time.sleep(delay)
+            return _reply('#one\n#two\n#three' if kwargs['max_tokens'] == 100 else 'Generated')
+        return mock.patch.object(openai.chat.completions, 'create', create)
+
+    def test_each_call_gets_what_is_left_of_the_deadline(self):
+        with self.chat(delay=0.1):
+            post = self.generator.generate_post('Topic', with_image=False)
+        self.assertEqual((post['content'], post['hashtags']), ('Generated', ['#one', '#two', '#three']))
+        self.assertEqual(len(self.timeouts), 2)
+        self.assertLessEqual(self.timeouts[0], 5)
+        self.assertLess(self.timeouts[1], self.timeouts[0] - 0.05)
+
+    def test_spent_deadline_falls_back_without_calling_openai(self):
+        self.generator.generation_timeout = 0.1
+        with self.chat(delay=0.2):
+            post = self.generator.generate_post('Topic', with_image=False)
+        # The hashtag call is never made; static hashtags stand in
+        self.assertEqual(len(self.timeouts), 1)
+        self.assertEqual(post['content'], 'Generated')
+        self.assertEqual(len(post['hashtags']), 3)
+        self.assertNotIn('#one', post['hashtags'])
+
+    def test_deadline_is_cleared_after_each_post(self):
+        with self.chat():
+            self.generator.generate_post('Topic', with_image=False)
+        self.assertIsNone(self.generator._generation.deadline)
+        self.assertEqual(self.generator._call_timeout(), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""Control socket round trips and the CLI falling back to the store"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import schedule_post
+from control_socket import ControlServer, control_supported, default_socket_path, send_control_request
+from post_store import PostStore
+
+
+class ControlTestCase(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='control-test-')
+        self.addCleanup(shutil.rmtree, self.work_dir, ignore_errors=True)
+        self.posts_file = os.path.join(self.work_dir, 'scheduled_posts.json')
+        self.requests = []
+        output = contextlib.redirect_stdout(io.StringIO())
+        output.__enter__()
+        self.addCleanup(output.__exit__, None, None, None)
+
+    def dispatch(self, request):
+        self.requests.append(request)
+        if request['op'] == 'reschedule' and request['post_id'] == 'missing':
+            raise ValueError('Post not found')
+        return {'post_id': request.get('post_id'), 'schedule_time': '2030-01-02T10:00:00'}
+
+    def serve(self):
+        server = ControlServer(default_socket_path(self.posts_file), self.dispatch)
+        self.assertTrue(server.start())
+        self.addCleanup(server.stop)
+        return server
+
+
+@unittest.skipUnless(control_supported(), 'Unix sockets are not available')
+class ControlSocketTest(ControlTestCase):
+    def test_requests_reach_the_scheduler_and_errors_come_back(self):
+        self.serve()
+        response = send_control_request(self.posts_file, 'reschedule', post_id='a', schedule_time='10:00')
+        self.assertEqual(response, {'ok': True, 'result': {'post_id': 'a', 'schedule_time': '2030-01-02T10:00:00'}})
+        self.assertEqual(self.requests, [{'op': 'reschedule', 'post_id': 'a', 'schedule_time': '10:00'}])
+
+        response = send_control_request(self.posts_file, 'reschedule', post_id='missing', schedule_time='10:00')
+        self.assertEqual(response, {'ok': False, 'error': 'Post not found'})
+
+    def test_no_scheduler_means_use_the_store(self):
+        self.assertIsNone(send_control_request(self.posts_file, 'ping'))
+        # A socket left behind by a crashed scheduler is not mistaken for a live one
+        server = self.serve()
+        server._server.server_close()
+        self.assertIsNone(send_control_request(self.posts_file, 'ping'))
+
+    def test_second_scheduler_does_not_take_over_a_live_socket(self):
+        self.serve()
+        self.assertFalse(ControlServer(default_socket_path(self.posts_file), self.dispatch).start())
+
+
+class RescheduleCommandTest(ControlTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(schedule_post, 'DEFAULT_POSTS_FILE', self.posts_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = PostStore(self.posts_file)
+        self.post = self.store.add('Topic', '2099-01-01 09:00')
+
+    @unittest.skipUnless(control_supported(), 'Unix sockets are not available')
+    def test_running_scheduler_moves_the_post(self):
+        self.serve()
+        self.assertTrue(schedule_post.reschedule_post(self.post['id'], '2099-01-02 10:00'))
+        self.assertEqual(self.requests, [{'op': 'reschedule', 'post_id': self.post['id'],
+                                          'schedule_time': '2099-01-02 10:00'}])
+        self.assertFalse(schedule_post.reschedule_post('missing', '2099-01-02 10:00'))
+
+    def test_store_is_updated_when_no_scheduler_runs(self):
+        self.assertTrue(schedule_post.reschedule_post(self.post['id'], '2099-01-02 10:00'))
+        self.assertEqual(self.store.load()[0]['schedule_time'], datetime(2099, 1, 2, 10).isoformat())
+        self.assertFalse(schedule_post.reschedule_post('missing', '2099-01-02 10:00'))
+        self.assertFalse(schedule_post.reschedule_post(self.post['id'], 'tomorrow'))
+
+    def test_finished_posts_are_not_cancelled(self):
+        self.store.update(lambda posts: [dict(posts[0], status='completed')])
+        self.assertFalse(schedule_post.cancel_post(self.post['id']))
+        self.assertEqual(self.store.load()[0]['status'], 'completed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,399 @@
+"""CustomPostScheduler sharing its posts file with other writers"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from clock import SimulatedClock
+from post_archive import PostArchive, default_archive_dir
+from post_store import PostStore
+from slot_allocator import SlotConflict
+
+try:
+    from custom_scheduler import CustomPostScheduler
+except ImportError:  # APScheduler / OpenAI client not installed
+    CustomPostScheduler = None
+
+POSTS_FILE = 'scheduled_posts.json'
+
+
+def _post(post_id, status='scheduled', hours=24, **extra):
+    when = datetime.now() + timedelta(hours=hours)
+    post = {'id': post_id, 'topic': f"Topic {post_id}", 'schedule_time': when.replace(microsecond=0).isoformat(),
+            'content': f"Content {post_id}", 'status': status}
+    if status not in ('scheduled', 'retrying'):
+        post['completed_at'] = when.isoformat()
+    post.update(extra)
+    return post
+
+
+@unittest.skipIf(CustomPostScheduler is None, 'scheduler dependencies are not installed')
+class SchedulerTestCase(unittest.TestCase):
+    config = {}
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='scheduler-test-')
+        self.original_dir = os.getcwd()
+        os.chdir(self.work_dir)
+        config = {
+            'core': 'wheel',
+            'metrics_port': 0,
+            'recurring_enabled': False,
+            'slot_policy': 'off',
+            'arm_window_hours': 24 * 30,
+            'lease_path': os.path.join(self.work_dir, 'leases.db'),
+            'log_dir': os.path.join(self.work_dir, 'logs')
+        }
+        config.update(self.config)
+        with open('config.json', 'w', encoding='utf-8') as f:
+            json.dump({'scheduler': config}, f)
+        self.store = PostStore(POSTS_FILE)
+        self.schedulers = []
+        self.output = contextlib.redirect_stdout(io.StringIO())
+        self.output.__enter__()
+
+    def tearDown(self):
+        self.output.__exit__(None, None, None)
+        for scheduler in self.schedulers:
+            scheduler.log_writer.close()
+        os.chdir(self.original_dir)
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def scheduler(self):
+        scheduler = CustomPostScheduler()
+        self.schedulers.append(scheduler)
+        return scheduler
+
+    def stored(self):
+        return {post['id']: post for post in self.store.load()}
+
+
+class ArchiveTest(SchedulerTestCase):
+    def test_startup_archives_only_posts_finished_before_the_cutoff(self):
+        self.store.save([_post('old', status='completed', hours=-48), _post('recent', status='failed', hours=-1),
+                         _post('a')])
+        node = self.scheduler()
+        self.assertEqual(sorted(self.stored()), ['a', 'recent'])
+        self.assertEqual(sorted(post['id'] for post in node.scheduled_posts), ['a', 'recent'])
+        archive = PostArchive(default_archive_dir(POSTS_FILE))
+        self.assertEqual(archive.counts(), {'completed': 1})
+        self.assertEqual(archive.page()['posts'][0]['id'], 'old')
+
+
+class ExpireOverdueTest(SchedulerTestCase):
+    def test_sweep_leaves_armed_and_running_posts_alone(self):
+        self.store.save([_post('armed', hours=1), _post('missed', hours=1), _post('running', hours=1)])
+        node = self.scheduler()
+        node._remove_job('missed')
+        node._remove_job('running')
+        post = next(p for p in node.scheduled_posts if p['id'] == 'running')
+        self.assertTrue(node.leases.acquire(node._lease_key(post), 'other-node', 60))
+
+        node.clock = SimulatedClock(datetime.now() + timedelta(hours=2))
+        self.assertEqual(node._expire_overdue_posts(), 1)
+        self.assertEqual({post_id: post['status'] for post_id, post in self.stored().items()},
+                         {'armed': 'scheduled', 'missed': 'expired', 'running': 'scheduled'})
+        self.assertEqual(PostStore(POSTS_FILE).summary()['counts'], {'scheduled': 2, 'expired': 1})
+        self.assertEqual(node._expire_overdue_posts(), 0)
+
+
+class MergeTest(SchedulerTestCase):
+    def test_posts_archived_elsewhere_are_not_written_back(self):
+        from schedule_post import clear_completed_posts
+
+        self.store.save([_post('done1', status='completed', hours=-1), _post('a')])
+        scheduler = self.scheduler()
+        clear_completed_posts()
+
+        scheduler.add_post('new', (datetime.now() + timedelta(days=2)).strftime('%Y-%m-%d %H:%M'))
+        self.assertNotIn('done1', self.stored())
+        self.assertEqual(len(self.stored()), 2)
+
+        scheduler.config['archive_after_hours'] = 0
+        scheduler._archive_finished_posts()
+        self.assertEqual(PostArchive(default_archive_dir(POSTS_FILE)).counts(), {'completed': 1})
+
+    def test_posts_deleted_elsewhere_stay_deleted(self):
+        self.store.save([_post('a'), _post('b')])
+        scheduler = self.scheduler()
+        self.assertTrue(PostStore(POSTS_FILE).delete('a'))
+
+        scheduler.add_post('new', (datetime.now() + timedelta(days=2)).strftime('%Y-%m-%d %H:%M'))
+        self.assertNotIn('a', self.stored())
+        self.assertFalse(scheduler._has_job('a'))
+        self.assertTrue(scheduler._has_job('b'))
+
+    def test_changes_made_elsewhere_survive_our_saves(self):
+        self.store.save([_post('a'), _post('b')])
+        scheduler = self.scheduler()
+        moved = datetime.now().replace(microsecond=0) + timedelta(days=3)
+        PostStore(POSTS_FILE).reschedule('a', moved)
+        PostStore(POSTS_FILE).cancel('b')
+
+        new_id = scheduler.add_post('new', (datetime.now() + timedelta(days=2)).strftime('%Y-%m-%d %H:%M'))
+        stored = self.stored()
+        self.assertEqual(stored['a']['schedule_time'], moved.isoformat())
+        self.assertEqual(stored['b']['status'], 'cancelled')
+        # a's job moved with it and b's was disarmed
+        self.assertEqual(scheduler.scheduler.upcoming(), [(new_id, scheduler.scheduler.next_job()[1]), ('a', moved)])
+
+    def test_our_changes_survive_a_merge(self):
+        self.store.save([_post('a'), _post('b')])
+        scheduler = self.scheduler()
+        PostStore(POSTS_FILE).add('other', (datetime.now() + timedelta(days=4)).strftime('%Y-%m-%d %H:%M'),
+                                  id_prefix='other')
+
+        scheduler.cancel_post('a')
+        stored = self.stored()
+        self.assertEqual(stored['a']['status'], 'cancelled')
+        self.assertEqual(len(stored), 3)
+        other = next(post_id for post_id in stored if post_id.startswith('other'))
+        self.assertTrue(scheduler._has_job(other))
+
+
+class ArmWindowTest(SchedulerTestCase):
+    config = {'arm_window_hours': 24}
+
+    def test_only_posts_inside_the_window_are_armed(self):
+        self.store.save([_post('near', hours=2), _post('far', hours=24 * 10), _post('farther', hours=24 * 20)])
+        scheduler = self.scheduler()
+        self.assertTrue(scheduler._has_job('near'))
+        self.assertFalse(scheduler._has_job('far'))
+        self.assertEqual(scheduler._arm_due_posts(), 0)
+
+        # Later ticks arm posts as the window reaches them
+        scheduler.config['arm_window_hours'] = 24 * 15
+        self.assertEqual(scheduler._arm_due_posts(), 1)
+        self.assertTrue(scheduler._has_job('far'))
+        self.assertFalse(scheduler._has_job('farther'))
+
+    def test_moved_and_cancelled_posts_are_not_armed_from_stale_entries(self):
+        self.store.save([_post('a', hours=24 * 10), _post('b', hours=24 * 10)])
+        scheduler = self.scheduler()
+        moved = (datetime.now() + timedelta(days=20)).strftime('%Y-%m-%d %H:%M')
+        scheduler.reschedule_post('a', moved)
+        scheduler.cancel_post('b')
+
+        scheduler.config['arm_window_hours'] = 24 * 15
+        self.assertEqual(scheduler._arm_due_posts(), 0)
+        self.assertEqual(scheduler.scheduler.upcoming(), [])
+
+        scheduler.config['arm_window_hours'] = 24 * 25
+        self.assertEqual(scheduler._arm_due_posts(), 1)
+        self.assertEqual([job_id for job_id, _ in scheduler.scheduler.upcoming()], ['a'])
+
+
+class FakePoster:
+    def __init__(self):
+        self.published = []
+        self.images = []
+
+    def post_content(self, content_data):
+        self.published.append(content_data['content'])
+        self.images.append(content_data.get('image_path'))
+        return True
+
+
+class MultiNodeTest(SchedulerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.store.save([_post('a'), _post('b')])
+        self.node_a = self.scheduler()
+        self.node_b = self.scheduler()
+        self.node_b.node_id = 'node-b'
+        self.poster = self.node_b.linkedin_poster = FakePoster()
+
+    def run_armed_attempt(self, node, post_id):
+        """Fire the job node armed for post_id, as its scheduler would"""
+        topic, content, _, lease_key = node.scheduler._wheel._entries[post_id].args
+        return node.execute_scheduled_post(topic, content, post_id, lease_key)
+
+    def test_post_cancelled_on_another_node_is_not_published(self):
+        self.node_a.cancel_post('a')
+        self.assertFalse(self.run_armed_attempt(self.node_b, 'a'))
+        self.assertEqual(self.poster.published, [])
+        self.assertEqual(self.stored()['a']['status'], 'cancelled')
+        self.assertFalse(self.node_b._has_job('a'))
+
+    def test_post_deleted_on_another_node_is_not_published(self):
+        self.node_a.delete_post('a')
+        self.assertFalse(self.run_armed_attempt(self.node_b, 'a'))
+        self.assertEqual(self.poster.published, [])
+        self.assertNotIn('a', self.stored())
+
+    def test_rescheduled_post_only_runs_at_its_new_time(self):
+        moved = (datetime.now() + timedelta(days=5)).replace(second=0, microsecond=0)
+        armed = self.node_b.scheduler._wheel._entries['a'].args
+        self.node_a.reschedule_post('a', moved.strftime('%Y-%m-%d %H:%M'))
+
+        self.assertFalse(self.node_b.execute_scheduled_post(armed[0], armed[1], 'a', armed[3]))
+        self.assertEqual(self.poster.published, [])
+        self.assertEqual(dict(self.node_b.scheduler.upcoming())['a'], moved)
+        self.assertEqual(self.stored()['a']['status'], 'scheduled')
+
+    def test_reload_disarms_posts_finished_elsewhere(self):
+        self.node_a.cancel_post('a')
+        self.node_a.delete_post('b')
+        self.node_b._reload_posts_if_changed()
+        self.assertEqual(self.node_b.scheduler.upcoming(), [])
+
+    def test_latest_stored_content_is_published(self):
+        PostStore(POSTS_FILE).apply_batch([{'op': 'update', 'post_id': 'a', 'content': 'Edited'}])
+        self.assertTrue(self.run_armed_attempt(self.node_b, 'a'))
+        self.assertEqual(self.poster.published, ['Edited'])
+        self.assertEqual(self.stored()['a']['status'], 'completed')
+
+    def test_stored_image_is_published_with_the_content(self):
+        when = (datetime.now() + timedelta(days=2)).strftime('%Y-%m-%d %H:%M')
+        post_id = self.node_b._create_post('Drafted', when, 'Drafted text', image_path='draft.png')['id']
+        self.assertTrue(self.run_armed_attempt(self.node_b, post_id))
+        self.assertEqual(self.poster.images, ['draft.png'])
+
+
+class RecurringTest(SchedulerTestCase):
+    config = {'recurring_enabled': True}
+
+    def setUp(self):
+        super().setUp()
+        with open('config.json', 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        config['post_schedule'] = [{'time': '09:00', 'topic': 'Daily', 'name': 'daily'}]
+        with open('config.json', 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+
+    def occurrences(self):
+        return sorted(post_id for post_id in self.stored() if post_id.startswith('recurring_'))
+
+    def test_deleted_occurrences_are_not_materialized_again(self):
+        node = self.scheduler()
+        node._materialize_recurring_posts()
+        first, second, third = self.occurrences()
+
+        PostStore(POSTS_FILE).delete(first)
+        node.delete_post(second)
+        node._materialize_recurring_posts()
+        self.assertEqual(self.occurrences(), [third])
+        self.assertFalse(node._has_job(first))
+
+        # Nor by a restarted or second node
+        other = self.scheduler()
+        other._materialize_recurring_posts()
+        self.assertEqual(self.occurrences(), [third])
+
+    def test_removed_rule_withdraws_every_pending_occurrence(self):
+        self.scheduler()._materialize_recurring_posts()
+        first, second, third = self.occurrences()
+        PostStore(POSTS_FILE).update(lambda posts: [
+            dict(post, status='retrying', next_attempt_at=post['schedule_time']) if post['id'] == first else
+            dict(post, status='completed') if post['id'] == second else post
+            for post in posts])
+
+        with open('config.json', 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        config['post_schedule'] = []
+        with open('config.json', 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+        node = self.scheduler()
+        node._materialize_recurring_posts()
+
+        stored = self.stored()
+        self.assertEqual([stored[post_id]['status'] for post_id in (first, second, third)],
+                         ['cancelled', 'completed', 'cancelled'])
+        self.assertFalse(node._has_job(first))
+
+
+class SlowStage:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.calls = 0
+
+    def __call__(self, *args):
+        self.calls += 1
+        time.sleep(self.seconds)
+        return {'content': 'Generated', 'hashtags': []}
+
+
+class StageTimeoutTest(SchedulerTestCase):
+    config = {'job_timeout': 0.1}
+
+    def setUp(self):
+        super().setUp()
+        self.store.save([_post('a'), _post('b', content=None)])
+        self.node = self.scheduler()
+        self.slow = SlowStage(0.3)
+
+    def fire(self, post_id, content):
+        """Run post_id's attempt as if its job had just come due"""
+        self.node._remove_job(post_id)
+        return self.node.execute_scheduled_post(f"Topic {post_id}", content, post_id)
+
+    def test_publish_timeout_is_not_retried(self):
+        self.node.linkedin_poster = SimpleNamespace(post_content=self.slow)
+        self.assertFalse(self.fire('a', 'Content a'))
+        post = self.stored()['a']
+        self.assertEqual(post['status'], 'error')
+        self.assertIn('may have been published', post['last_error'])
+        self.assertFalse(self.node._has_job('a'))
+        self.assertEqual(self.slow.calls, 1)
+
+    def test_generation_timeout_is_retried(self):
+        self.node.content_generator = SimpleNamespace(generate_post=self.slow)
+        self.assertFalse(self.fire('b', None))
+        self.assertEqual(self.stored()['b']['status'], 'retrying')
+        self.assertTrue(self.node._has_job('b'))
+
+
+class MovePostTest(SchedulerTestCase):
+    config = {'slot_policy': 'reject', 'slot_min_gap_minutes': 30}
+
+    def test_failed_move_restores_whatever_slot_was_released(self):
+        a, b = _post('a', status='retrying'), _post('b', hours=26)
+        a['next_attempt_at'] = a['schedule_time']
+        r = _post('r', status='retrying', hours=30)
+        r['next_attempt_at'] = r['schedule_time']
+        self.store.save([a, b, r, _post('done', status='completed', hours=-1)])
+        node = self.scheduler()
+        a_time = datetime.fromisoformat(a['schedule_time'])
+        node.slots.reserve('a', a_time)  # held since it was scheduled on this node
+
+        clash = (datetime.fromisoformat(b['schedule_time']) + timedelta(minutes=10)).strftime('%Y-%m-%d %H:%M')
+        for post_id in ('a', 'r', 'done'):
+            with self.assertRaises(SlotConflict):
+                node._move_post(post_id, clash)
+        self.assertEqual(node.slots.conflict(a_time + timedelta(minutes=5)), 'a')
+        self.assertNotIn('r', node.slots)
+        self.assertNotIn('done', node.slots)
+        self.assertEqual(self.stored()['a']['status'], 'retrying')
+
+
+class BulkAddTest(SchedulerTestCase):
+    def test_valid_rows_are_armed_and_saved_together(self):
+        node = self.scheduler()
+        rows = [(2, {'topic': 'A', 'time': (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d %H:%M')}),
+                (3, {'topic': 'B', 'time': '2000-01-01 09:00'})]
+
+        report = node.add_posts_bulk(rows)
+        self.assertEqual((report['committed'], report['rejected']), (False, 1))
+        self.assertEqual(self.stored(), {})
+        self.assertEqual(len(node.slots), 0)
+
+        report = node.add_posts_bulk(rows, allow_partial=True)
+        [post_id] = report['post_ids']
+        self.assertEqual(list(self.stored()), [post_id])
+        self.assertTrue(node._has_job(post_id))
+        self.assertIn(post_id, node.slots)
+
+
+if __name__ == '__main__':
+    unittest.main()
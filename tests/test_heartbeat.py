@@ -0,0 +1,94 @@
+"""Scheduler pidfile / heartbeat snapshots and the status command reading them"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import schedule_post
+from heartbeat import HeartbeatWriter, default_run_dir, read_heartbeats
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class HeartbeatTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='heartbeat-test-')
+        self.addCleanup(shutil.rmtree, self.work_dir, ignore_errors=True)
+        self.posts_file = os.path.join(self.work_dir, 'scheduled_posts.json')
+        self.run_dir = default_run_dir(self.posts_file)
+        self.active_jobs = 2
+
+    def writer(self, node_id='host:1'):
+        writer = HeartbeatWriter(self.run_dir, node_id, lambda: {'active_jobs': self.active_jobs}, interval=60)
+        writer.start()
+        self.addCleanup(writer.stop)
+        return writer
+
+    def age(self, writer, seconds, **changes):
+        """Rewrite writer's snapshot as if it was last refreshed seconds ago"""
+        with open(writer.heartbeat_path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        snapshot['updated_at'] = (datetime.now() - timedelta(seconds=seconds)).isoformat()
+        snapshot.update(changes)
+        with open(writer.heartbeat_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+
+    def test_start_writes_the_pidfile_and_a_snapshot(self):
+        writer = self.writer()
+        with open(writer.pid_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(int(f.read()), os.getpid())
+        [heartbeat] = read_heartbeats(self.run_dir)
+        self.assertEqual((heartbeat['node_id'], heartbeat['state'], heartbeat['active_jobs']), ('host:1', 'running', 2))
+
+        self.active_jobs = 5
+        writer.beat()
+        self.assertEqual(read_heartbeats(self.run_dir)[0]['active_jobs'], 5)
+
+    def test_stop_removes_the_node_files(self):
+        writer = self.writer()
+        writer.stop()
+        self.assertEqual(os.listdir(self.run_dir), [])
+        self.assertEqual(read_heartbeats(os.path.join(self.work_dir, 'missing')), [])
+
+    def test_stale_snapshot_of_a_live_process_is_unresponsive(self):
+        writer = self.writer()
+        self.age(writer, 600)
+        self.assertEqual(read_heartbeats(self.run_dir)[0]['state'], 'unresponsive')
+        # On another host the process cannot be checked, so it stays unresponsive
+        self.age(writer, 600, host='elsewhere', pid=2 ** 22 + 1)
+        self.assertEqual(read_heartbeats(self.run_dir)[0]['state'], 'unresponsive')
+
+    @unittest.skipIf(psutil is None, 'psutil is not installed')
+    def test_stale_snapshot_of_a_dead_process_is_stopped(self):
+        writer = self.writer()
+        self.age(writer, 600, pid=2 ** 22 + 1)
+        self.assertEqual(read_heartbeats(self.run_dir)[0]['state'], 'stopped')
+
+    def test_status_command_reports_running_nodes_from_their_snapshots(self):
+        self.writer('host:1')
+        self.age(self.writer('host:2'), 600)
+        output = io.StringIO()
+        with mock.patch.object(schedule_post, 'DEFAULT_POSTS_FILE', self.posts_file), \
+                contextlib.redirect_stdout(output):
+            schedule_post.check_scheduler_status()
+        self.assertIn('Scheduler is running', output.getvalue())
+        self.assertIn('node host:1', output.getvalue())
+        self.assertIn('Scheduler host:2 is unresponsive', output.getvalue())
+        self.assertNotIn('Scheduler is not running', output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+"""LinkedInPoster keeping its API calls inside the publish timeout"""
+
+import os
+import socket
+import sys
+import time
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+try:
+    import requests
+    from linkedin_poster import LinkedInPoster
+except ImportError:  # requests / python-dotenv not installed
+    LinkedInPoster = None
+
+
+@unittest.skipIf(LinkedInPoster is None, 'poster dependencies are not installed')
+class PublishTimeoutTest(unittest.TestCase):
+    def setUp(self):
+        # Accepts connections but never answers, like a stalled API
+        self.server = socket.socket()
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(8)
+        self.poster = LinkedInPoster(publish_timeout=0.3)
+        self.poster.base_url = f"http://127.0.0.1:{self.server.getsockname()[1]}"
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_stalled_api_call_gives_up_at_the_publish_timeout(self):
+        content_data = {'topic': 'Topic', 'content': 'Content', 'hashtags': []}
+        started = time.monotonic()
+        self.assertFalse(self.poster.post_content(content_data))
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(content_data['publish_statuses'], ['error'])
+
+    def test_later_calls_only_get_what_is_left(self):
+        self.poster._attempts.deadline = time.monotonic() + 0.2
+        self.assertLessEqual(self.poster._call_timeout(), 0.2)
+        self.poster._attempts.deadline = time.monotonic() - 1
+        with self.assertRaises(requests.Timeout):
+            self.poster._call_timeout()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""BufferedLogWriter rotation with several writers sharing a log directory"""
+
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import log_writer
+from log_writer import BufferedLogWriter
+
+
+def _on_day(day):
+    """Patch the writer's clock to a fixed day"""
+    return mock.patch.object(log_writer, 'datetime', mock.Mock(now=lambda: datetime.fromisoformat(day)))
+
+
+@unittest.skipIf(log_writer.fcntl is None, 'shared log directories need fcntl')
+class SharedDirectoryTest(unittest.TestCase):
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp(prefix='log-writer-test-')
+        self.type_dir = os.path.join(self.log_dir, 'audit')
+        self.writers = []
+
+    def tearDown(self):
+        for writer in self.writers:
+            writer.close()
+        shutil.rmtree(self.log_dir, ignore_errors=True)
+
+    def writer(self, max_bytes=10 * 1024 * 1024):
+        writer = BufferedLogWriter(self.log_dir, max_bytes=max_bytes, flush_interval=0.05)
+        self.writers.append(writer)
+        return writer
+
+    def write(self, writer, *numbers):
+        for n in numbers:
+            writer.write('audit', {'n': n})
+        self.assertTrue(writer.flush())
+
+    def files(self):
+        return sorted(name for name in os.listdir(self.type_dir) if not name.startswith('.'))
+
+    def entries(self):
+        numbers = []
+        for name in self.files():
+            opener = gzip.open if name.endswith('.gz') else open
+            with opener(os.path.join(self.type_dir, name), 'rt', encoding='utf-8') as f:
+                numbers += [json.loads(line)['n'] for line in f]
+        return sorted(numbers)
+
+    def test_rotated_file_is_kept_open_for_other_writers(self):
+        with _on_day('2030-01-01T09:00:00'):
+            a, b = self.writer(max_bytes=30), self.writer()
+            self.write(b, 1)
+            self.write(a, 2, 3, 4, 5)  # past max_bytes: a renames the shared file
+            self.assertEqual(self.files(), ['2030-01-01.1.log.closing'])
+
+            # b's next lines still land in the renamed file, then b moves on
+            self.write(b, 6)
+            self.write(b, 7)
+            self.assertEqual(self.files(), ['2030-01-01.1.log.gz', '2030-01-01.log'])
+            self.assertEqual(self.entries(), [1, 2, 3, 4, 5, 6, 7])
+
+    def test_earlier_day_is_compressed_once_no_writer_holds_it(self):
+        with _on_day('2030-01-01T23:59:00'):
+            late = self.writer()
+            self.write(late, 1)
+        with _on_day('2030-01-02T00:01:00'):
+            early = self.writer()
+            self.write(early, 2)
+            self.assertEqual(self.files(), ['2030-01-01.log', '2030-01-02.log'])
+
+            # late rolls over on its next write, which frees yesterday's file
+            self.write(late, 3)
+            self.assertEqual(self.files(), ['2030-01-01.log.gz', '2030-01-02.log'])
+            self.assertEqual(self.entries(), [1, 2, 3])
+
+    def test_close_compresses_what_is_left(self):
+        with _on_day('2030-01-01T09:00:00'):
+            a, b = self.writer(max_bytes=30), self.writer()
+            self.write(b, 1)
+            self.write(a, 2, 3, 4, 5)
+            b.close()
+            self.assertEqual(self.files(), ['2030-01-01.1.log.gz'])
+            self.assertEqual(self.entries(), [1, 2, 3, 4, 5])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Prometheus text rendering of the in-process metrics"""
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from metrics import CONTENT_TYPE, MetricsRegistry, MetricsServer
+
+
+class RenderTest(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_and_gauge_samples(self):
+        counter = self.registry.counter('jobs_total', 'Jobs by outcome', ('outcome',))
+        counter.inc(outcome='published')
+        counter.inc(2, outcome='failed')
+        gauge = self.registry.gauge('queue_depth', 'Waiting jobs')
+        gauge.set(1.5)
+
+        self.assertEqual(self.registry.render(), '\n'.join([
+            '# HELP jobs_total Jobs by outcome',
+            '# TYPE jobs_total counter',
+            'jobs_total{outcome="failed"} 2',
+            'jobs_total{outcome="published"} 1',
+            '# HELP queue_depth Waiting jobs',
+            '# TYPE queue_depth gauge',
+            'queue_depth 1.5',
+        ]) + '\n')
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.registry.histogram('call_seconds', 'Call latency', ('kind',), buckets=(0.1, 1))
+        for value in (0.05, 0.5, 0.7, 3):
+            histogram.observe(value, kind='text')
+
+        lines = histogram.render().splitlines()[2:]
+        self.assertEqual(lines, [
+            'call_seconds_bucket{kind="text",le="0.1"} 1',
+            'call_seconds_bucket{kind="text",le="1"} 3',
+            'call_seconds_bucket{kind="text",le="+Inf"} 4',
+            'call_seconds_sum{kind="text"} 4.25',
+            'call_seconds_count{kind="text"} 4',
+        ])
+
+    def test_gauge_callback_is_read_at_scrape_time(self):
+        depth = {('waiting',): 3}
+        gauge = self.registry.gauge('depth', 'Depth', ('state',))
+        gauge.set_function(lambda: depth)
+        self.assertIn('depth{state="waiting"} 3', gauge.render())
+        depth[('waiting',)] = 0
+        self.assertIn('depth{state="waiting"} 0', gauge.render())
+
+    def test_label_values_are_escaped_and_checked(self):
+        counter = self.registry.counter('errors_total', 'Errors', ('error',))
+        counter.inc(error='bad "quote"\nnext')
+        self.assertIn(r'errors_total{error="bad \"quote\"\nnext"} 1', counter.render())
+        with self.assertRaises(ValueError):
+            counter.inc(kind='text')
+
+    def test_registering_twice_returns_the_first_metric(self):
+        first = self.registry.counter('jobs_total', 'Jobs')
+        self.assertIs(self.registry.counter('jobs_total', 'Jobs'), first)
+
+
+class ServerTest(unittest.TestCase):
+    def test_serves_metrics_and_nothing_else(self):
+        registry = MetricsRegistry()
+        registry.counter('jobs_total', 'Jobs').inc()
+        server = MetricsServer(0, registry=registry)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(server.start())
+        self.addCleanup(server.stop)
+        base = f"http://127.0.0.1:{server._server.server_address[1]}"
+
+        with urllib.request.urlopen(f"{base}/metrics", timeout=5) as response:
+            self.assertEqual(response.headers['Content-Type'], CONTENT_TYPE)
+            self.assertEqual(response.read().decode(), registry.render())
+        with self.assertRaises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{base}/other", timeout=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""Monthly gzip archive segments, their index and paged history"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from post_archive import PostArchive
+
+
+def _finished(post_id, completed_at, status='completed'):
+    return {'id': post_id, 'topic': f"Topic {post_id}", 'schedule_time': completed_at[:16],
+            'content': 'x', 'status': status, 'completed_at': completed_at}
+
+
+class PostArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='post-archive-test-')
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.archive = PostArchive(self.directory)
+
+    def fill(self):
+        """Five posts over two months, archived in two calls"""
+        self.archive.archive([_finished('jan1', '2030-01-05T09:00:00'),
+                              _finished('feb1', '2030-02-01T09:00:00', 'failed')])
+        self.archive.archive([_finished('jan2', '2030-01-20T09:00:00', 'failed'),
+                              _finished('feb2', '2030-02-10T09:00:00'),
+                              _finished('feb3', '2030-02-20T09:00:00', 'expired')])
+
+    def test_posts_land_in_their_month_segment(self):
+        self.fill()
+        segments = self.archive.segments()
+        self.assertEqual(sorted(segments), ['2030-01', '2030-02'])
+        self.assertEqual(segments['2030-02']['statuses'], {'failed': 1, 'completed': 1, 'expired': 1})
+        self.assertEqual((segments['2030-01']['first'], segments['2030-01']['last']),
+                         ('2030-01-05T09:00:00', '2030-01-20T09:00:00'))
+        # The second call appended to the segment rather than replacing it
+        self.assertEqual([post['id'] for post in self.archive.read_segment('2030-01')], ['jan1', 'jan2'])
+
+    def test_counts_come_from_the_index(self):
+        self.fill()
+        self.assertEqual(self.archive.counts(), {'completed': 2, 'failed': 2, 'expired': 1})
+        self.assertEqual(PostArchive(os.path.join(self.directory, 'missing')).counts(), {})
+        self.assertEqual(self.archive.archive([]), 0)
+
+    def test_pages_run_newest_first_across_segments(self):
+        self.fill()
+        first, second = self.archive.page(1, 3), self.archive.page(2, 3)
+        self.assertEqual([post['id'] for post in first['posts']], ['feb3', 'feb2', 'feb1'])
+        self.assertEqual([post['id'] for post in second['posts']], ['jan2', 'jan1'])
+        self.assertEqual((first['total'], first['pages']), (5, 2))
+        self.assertEqual(self.archive.page(3, 3)['posts'], [])
+
+    def test_status_filter_pages_only_matching_posts(self):
+        self.fill()
+        failed = self.archive.page(1, 1, status='failed')
+        self.assertEqual(([post['id'] for post in failed['posts']], failed['total']), (['feb1'], 2))
+        self.assertEqual([post['id'] for post in self.archive.page(2, 1, status='failed')['posts']], ['jan2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
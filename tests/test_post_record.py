@@ -0,0 +1,57 @@
+"""Streaming the posts file with iter_post_dicts"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from post_record import iter_post_dicts
+
+POSTS = [
+    {'id': 'a', 'topic': 'Braces } and ] in "quotes"', 'content': 'Line\nbreak, comma', 'status': 'scheduled'},
+    {'id': 'b', 'topic': 'Unicode é☃ \U0001F680', 'content': None, 'status': 'completed',
+     'nested': {'list': [1, 2, {'deep': '}'}]}},
+    {'id': 'c', 'topic': 'Escapes \\" \\\\', 'content': '', 'status': 'failed', 'attempts': 3},
+]
+
+
+class IterPostDictsTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='post-record-test-')
+        self.path = os.path.join(self.work_dir, 'scheduled_posts.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _write(self, text):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def test_every_chunk_boundary(self):
+        for indent in (None, 2):
+            self._write(json.dumps(POSTS, indent=indent, ensure_ascii=False))
+            size = os.path.getsize(self.path)
+            for chunk_size in range(1, size + 2):
+                with self.subTest(indent=indent, chunk_size=chunk_size):
+                    self.assertEqual(list(iter_post_dicts(self.path, chunk_size)), POSTS)
+
+    def test_empty_inputs(self):
+        for text in ('', '  \n', '[]', ' [ \n ] '):
+            self._write(text)
+            self.assertEqual(list(iter_post_dicts(self.path, 2)), [])
+
+    def test_malformed_files_are_rejected(self):
+        for text in ('{"id": "a"}', '[{"id": "a"}', '[{"id": "a"} {"id": "b"}]', '[1, 2]', '[{"id": "a"'):
+            self._write(text)
+            for chunk_size in (1, 4, 64 * 1024):
+                with self.subTest(text=text, chunk_size=chunk_size), self.assertRaises(ValueError):
+                    list(iter_post_dicts(self.path, chunk_size))
+
+
+if __name__ == '__main__':
+    unittest.main()
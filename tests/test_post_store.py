@@ -0,0 +1,220 @@
+"""PostStore locking, versioning and optimistic update()"""
+
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from post_store import ConcurrentUpdate, PostStore
+
+
+def _post(post_id, status='scheduled', schedule_time='2030-01-01T09:00:00'):
+    return {'id': post_id, 'topic': f"Topic {post_id}", 'schedule_time': schedule_time,
+            'content': None, 'status': status}
+
+
+def _append_posts(path, worker, count):
+    store = PostStore(path)
+    for i in range(count):
+        store.update(lambda posts: posts + [_post(f"w{worker}_{i}")])
+
+
+class PostStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='post-store-test-')
+        self.path = os.path.join(self.work_dir, 'scheduled_posts.json')
+        self.config_file = os.path.join(self.work_dir, 'config.json')
+        with open(self.config_file, 'w', encoding='utf-8') as f:
+            json.dump({'scheduler': {'slot_policy': 'off'}}, f)
+        self.store = PostStore(self.path, config_file=self.config_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+class VersionTest(PostStoreTestCase):
+    def test_missing_file_is_empty_at_version_zero(self):
+        self.assertEqual(self.store.load(), [])
+        self.assertEqual(self.store.version(), 0)
+
+    def test_each_save_bumps_the_version(self):
+        self.assertEqual(self.store.save([_post('a')]), 1)
+        self.assertEqual(self.store.save([_post('a'), _post('b')]), 2)
+        self.assertEqual(self.store.load_versioned(), ([_post('a'), _post('b')], 2))
+
+    def test_save_with_a_stale_version_is_refused(self):
+        self.store.save([_post('a')])
+        posts, version = self.store.load_versioned()
+        PostStore(self.path).save(posts + [_post('b')])
+
+        with self.assertRaises(ConcurrentUpdate):
+            self.store.save(posts + [_post('c')], expected_version=version)
+        self.assertEqual([post['id'] for post in self.store.load()], ['a', 'b'])
+
+    def test_unversioned_write_counts_as_a_new_version(self):
+        self.store.save([_post('a')])
+        time.sleep(0.01)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump([_post('a'), _post('b'), _post('c')], f)
+        self.assertEqual(self.store.version(), 2)
+        # The recorded counters no longer describe the file, so they are recounted
+        self.assertEqual(self.store.summary()['counts'], {'scheduled': 3})
+
+    def test_summary_is_recorded_with_each_save(self):
+        self.store.save([_post('a', schedule_time='2030-01-02T09:00:00'),
+                         _post('b', schedule_time='2030-01-01T09:00:00'),
+                         _post('c', status='completed')])
+        with open(self.store.version_path, 'r', encoding='utf-8') as f:
+            recorded = json.load(f)
+        self.assertEqual(recorded['counts'], {'scheduled': 2, 'completed': 1})
+        self.assertEqual(recorded['next_due'], '2030-01-01T09:00:00')
+        self.assertEqual(self.store.summary(), {'counts': recorded['counts'], 'next_due': recorded['next_due']})
+
+
+class UpdateTest(PostStoreTestCase):
+    def test_mutator_returning_none_leaves_the_file_alone(self):
+        self.store.save([_post('a')])
+        self.assertIsNone(self.store.update(lambda posts: None))
+        self.assertEqual(self.store.version(), 1)
+
+    def test_update_reruns_the_mutator_after_a_concurrent_save(self):
+        self.store.save([_post('a')])
+        other = PostStore(self.path)
+        calls = []
+
+        def add_b(posts):
+            calls.append([post['id'] for post in posts])
+            if len(calls) == 1:
+                # Another writer saves between our read and our save
+                other.save(posts + [_post('x')])
+            return posts + [_post('b')]
+
+        self.store.update(add_b)
+        self.assertEqual(calls, [['a'], ['a', 'x']])
+        self.assertEqual([post['id'] for post in self.store.load()], ['a', 'x', 'b'])
+
+    def test_last_attempt_holds_the_lock(self):
+        self.store.save([])
+        other = PostStore(self.path)
+
+        def always_conflicting(posts):
+            if not self.store._file_lock._depth:
+                other.save(posts + [_post(f"x{len(posts)}")])
+            return posts + [_post('mine')]
+
+        saved = self.store.update(always_conflicting, retries=2)
+        self.assertEqual(saved[-1]['id'], 'mine')
+        self.assertEqual(self.store.load()[-1]['id'], 'mine')
+
+    def test_concurrent_processes_lose_no_updates(self):
+        self.store.save([])
+        context = multiprocessing.get_context('fork' if hasattr(os, 'fork') else 'spawn')
+        workers = [context.Process(target=_append_posts, args=(self.path, worker, 20)) for worker in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+            self.assertEqual(worker.exitcode, 0)
+
+        ids = [post['id'] for post in self.store.load()]
+        self.assertEqual(len(ids), 80)
+        self.assertEqual(len(set(ids)), 80)
+        self.assertEqual(self.store.version(), 81)
+
+
+class NewIdTest(PostStoreTestCase):
+    def test_ids_stay_unique_after_deletions(self):
+        def create(topic):
+            return {'op': 'create', 'topic': topic, 'schedule_time': '2099-01-01 09:00'}
+
+        report = self.store.apply_batch([create('one'), create('two')])
+        self.store.apply_batch([{'op': 'delete', 'post_id': report['results'][0]['post_id']}])
+        self.store.apply_batch([create('three')])
+        self.store.add('four', '2099-01-01 10:00')
+        self.store.bulk_add([(1, {'topic': 'five', 'time': '2099-01-01 11:00'})])
+
+        ids = [post['id'] for post in self.store.load()]
+        self.assertEqual(len(ids), 4)
+        self.assertEqual(len(set(ids)), 4)
+
+
+class LockTest(PostStoreTestCase):
+    def test_lock_is_reentrant_within_a_thread(self):
+        with self.store.lock():
+            with self.store.lock():
+                self.store.save([_post('a')])
+        self.assertEqual(self.store._file_lock._depth, 0)
+
+    def test_lock_is_shared_by_stores_on_the_same_path(self):
+        self.assertIs(PostStore(self.path)._file_lock, self.store._file_lock)
+
+    def test_lock_excludes_other_threads(self):
+        acquired = threading.Event()
+
+        def contend():
+            with PostStore(self.path).lock():
+                acquired.set()
+
+        with self.store.lock():
+            thread = threading.Thread(target=contend)
+            thread.start()
+            self.assertFalse(acquired.wait(0.2))
+        thread.join(5)
+        self.assertTrue(acquired.is_set())
+
+
+class SummaryTest(PostStoreTestCase):
+    def test_save_records_counts_and_the_next_due_time(self):
+        self.store.save([_post('a', schedule_time='2030-01-02T09:00:00'), _post('b'),
+                         _post('c', status='completed'), _post('d', status='retrying', schedule_time='2029-01-01T09:00:00')])
+        with mock.patch.object(self.store, 'load', side_effect=AssertionError('posts were read')):
+            summary = self.store.summary()
+        self.assertEqual(summary, {'counts': {'scheduled': 2, 'completed': 1, 'retrying': 1},
+                                   'next_due': '2030-01-01T09:00:00'})
+
+    def test_file_edited_without_counters_is_counted(self):
+        self.store.save([_post('a')])
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump([_post('a', status='cancelled'), _post('b', schedule_time='2031-01-01T09:00:00')], f)
+        self.assertEqual(self.store.summary(), {'counts': {'cancelled': 1, 'scheduled': 1},
+                                                'next_due': '2031-01-01T09:00:00'})
+
+
+class ExpireOverdueTest(PostStoreTestCase):
+    def test_posts_past_the_grace_are_expired(self):
+        self.store.save([_post('late', schedule_time='2030-01-01T08:00:00'),
+                         _post('grace', schedule_time='2030-01-01T08:58:00'),
+                         _post('retry', status='retrying', schedule_time='2030-01-01T07:00:00'),
+                         _post('later', schedule_time='2030-01-02T09:00:00')])
+        self.assertEqual(self.store.expire_overdue(grace_seconds=300, now=datetime(2030, 1, 1, 9, 0)), 1)
+        self.assertEqual([post['status'] for post in self.store.load()], ['expired', 'scheduled', 'retrying', 'scheduled'])
+        self.assertEqual(self.store.summary()['next_due'], '2030-01-01T08:58:00')
+
+    def test_nothing_overdue_means_no_write(self):
+        self.store.save([_post('a', schedule_time='2030-01-01T09:00:00')])
+        self.assertEqual(self.store.expire_overdue(grace_seconds=300, now=datetime(2030, 1, 1, 9, 4)), 0)
+        self.assertEqual(self.store.version(), 1)
+
+
+class CancelTest(PostStoreTestCase):
+    def test_only_pending_posts_can_be_cancelled(self):
+        self.store.save([_post('a'), _post('b', status='retrying'), _post('c', status='completed')])
+        self.assertTrue(self.store.cancel('a'))
+        self.assertTrue(self.store.cancel('b'))
+        self.assertFalse(self.store.cancel('c'))
+        self.assertFalse(self.store.cancel('missing'))
+        self.assertEqual([post['status'] for post in self.store.load()], ['cancelled', 'cancelled', 'completed'])
+
+
+if __name__ == '__main__':
+    unittest.main()
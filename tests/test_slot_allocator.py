@@ -0,0 +1,97 @@
+"""Slot placement under the off / reject / shift policies"""
+
+import os
+import sys
+import unittest
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from slot_allocator import SlotAllocator, SlotConflict
+
+
+def _at(hour, minute=0):
+    return datetime(2030, 1, 1, hour, minute)
+
+
+def _allocator(policy='reject', **kwargs):
+    allocator = SlotAllocator(min_gap_minutes=10, policy=policy, **kwargs)
+    allocator.reserve('nine', _at(9))
+    allocator.reserve('nine_ten', _at(9, 10))
+    allocator.reserve('noon', _at(12))
+    return allocator
+
+
+class PlaceTest(unittest.TestCase):
+    def test_free_time_is_kept(self):
+        self.assertEqual(_allocator().place(_at(10)), _at(10))
+
+    def test_gap_boundary_is_free(self):
+        self.assertEqual(_allocator().place(_at(9, 20)), _at(9, 20))
+        self.assertEqual(_allocator().place(_at(8, 50)), _at(8, 50))
+
+    def test_reject_names_the_conflict_and_the_nearest_slot(self):
+        with self.assertRaises(SlotConflict) as raised:
+            _allocator().place(_at(11, 55))
+        self.assertEqual(raised.exception.conflicting_id, 'noon')
+        self.assertEqual(raised.exception.suggestion, _at(11, 50))
+
+    def test_shift_moves_past_a_whole_cluster(self):
+        self.assertEqual(_allocator('shift').place(_at(9, 5)), _at(9, 20))
+
+    def test_off_ignores_conflicts(self):
+        self.assertEqual(_allocator('off').place(_at(9)), _at(9))
+
+    def test_accounts_do_not_share_slots(self):
+        self.assertEqual(_allocator().place(_at(9), account='other'), _at(9))
+
+    def test_account_gap_overrides_the_default(self):
+        allocator = _allocator(account_gaps={'default': 0})
+        self.assertEqual(allocator.place(_at(9)), _at(9))
+
+    def test_unknown_policy_is_refused(self):
+        with self.assertRaises(ValueError):
+            SlotAllocator(policy='sometimes')
+
+
+class NearestFreeTest(unittest.TestCase):
+    def test_prefers_the_closer_side(self):
+        allocator = _allocator()
+        self.assertEqual(allocator.nearest_free(_at(9, 2)), _at(8, 50))
+        self.assertEqual(allocator.nearest_free(_at(9, 12)), _at(9, 20))
+
+    def test_not_before_rules_out_earlier_slots(self):
+        self.assertEqual(_allocator().nearest_free(_at(9, 2), not_before=_at(9)), _at(9, 20))
+
+    def test_free_time_is_its_own_nearest(self):
+        self.assertEqual(_allocator().nearest_free(_at(15)), _at(15))
+
+
+class IndexTest(unittest.TestCase):
+    def test_release_frees_the_slot(self):
+        allocator = _allocator()
+        self.assertEqual(allocator.release('noon'), _at(12))
+        self.assertIsNone(allocator.release('noon'))
+        self.assertNotIn('noon', allocator)
+        self.assertIsNone(allocator.conflict(_at(12)))
+
+    def test_reserve_moves_an_existing_post(self):
+        allocator = _allocator()
+        allocator.reserve('noon', _at(15))
+        self.assertEqual(len(allocator), 3)
+        self.assertIsNone(allocator.conflict(_at(12)))
+        self.assertEqual(allocator.conflict(_at(15, 5)), 'noon')
+
+    def test_rebuild_indexes_scheduled_posts_only(self):
+        allocator = SlotAllocator(min_gap_minutes=10)
+        allocator.rebuild([
+            {'id': 'a', 'schedule_time': _at(9).isoformat(), 'status': 'scheduled'},
+            {'id': 'b', 'schedule_time': _at(10).isoformat(), 'status': 'completed', 'account': 'x'},
+        ])
+        self.assertEqual(len(allocator), 1)
+        self.assertIsNone(allocator.conflict(_at(10), account='x'))
+
+
+if __name__ == '__main__':
+    unittest.main()
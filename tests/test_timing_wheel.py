@@ -0,0 +1,89 @@
+"""Hashed timing wheel expiry, cancellation and overflow cascading"""
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from timing_wheel import TimingWheel
+
+START = 1_000_000.0
+
+
+def _ids(entries):
+    return sorted(entry.job_id for entry in entries)
+
+
+class TimingWheelTest(unittest.TestCase):
+    def setUp(self):
+        # Ten one-second buckets; anything 10 s or more ahead starts in the overflow heap
+        self.wheel = TimingWheel(tick=1.0, slots=10, now=START)
+
+    def test_entries_fire_once_their_tick_has_passed(self):
+        self.wheel.add('a', START + 2.5, ('payload',))
+        self.assertEqual(self.wheel.expire(START + 2.9), [])
+        due = self.wheel.expire(START + 3.0)
+        self.assertEqual(_ids(due), ['a'])
+        self.assertEqual(due[0].args, ('payload',))
+        self.assertEqual(len(self.wheel), 0)
+        self.assertEqual(self.wheel.expire(START + 9), [])
+
+    def test_past_entries_fire_on_the_next_expire(self):
+        self.wheel.add('late', START - 30)
+        self.assertEqual(_ids(self.wheel.expire(START + 1)), ['late'])
+
+    def test_cancelled_entries_never_fire(self):
+        self.wheel.add('a', START + 2)
+        self.wheel.add('far', START + 100)
+        self.assertTrue(self.wheel.cancel('a'))
+        self.assertTrue(self.wheel.cancel('far'))
+        self.assertFalse(self.wheel.cancel('a'))
+        self.assertEqual(self.wheel.expire(START + 200), [])
+        self.assertNotIn('a', self.wheel)
+
+    def test_re_adding_replaces_the_earlier_entry(self):
+        self.wheel.add('a', START + 2)
+        self.wheel.add('a', START + 5)
+        self.assertEqual(self.wheel.expire(START + 4), [])
+        self.assertEqual(_ids(self.wheel.expire(START + 6)), ['a'])
+
+    def test_overflow_entries_cascade_into_the_wheel(self):
+        for i, offset in enumerate((15, 25, 35.5)):
+            self.wheel.add(f"far{i}", START + offset)
+        fired = []
+        for second in range(1, 40):
+            fired += [(entry.job_id, second) for entry in self.wheel.expire(START + second)]
+        self.assertEqual(fired, [('far0', 16), ('far1', 26), ('far2', 36)])
+
+    def test_falling_behind_a_whole_turn_drains_everything_due(self):
+        self.wheel.add('near', START + 3)
+        self.wheel.add('far', START + 50)
+        self.wheel.add('later', START + 500)
+        self.assertEqual(_ids(self.wheel.expire(START + 120)), ['far', 'near'])
+        self.assertEqual(_ids(self.wheel.expire(START + 501)), ['later'])
+
+    def test_next_due_skips_cancelled_entries(self):
+        self.wheel.add('a', START + 3)
+        self.wheel.add('b', START + 50)
+        self.wheel.add('c', START + 60)
+        self.assertEqual(self.wheel.next_due().job_id, 'a')
+        self.wheel.cancel('a')
+        self.wheel.cancel('b')
+        self.assertEqual(self.wheel.next_due().job_id, 'c')
+        self.wheel.cancel('c')
+        self.assertIsNone(self.wheel.next_due())
+
+    def test_cancelled_overflow_is_compacted(self):
+        for i in range(3000):
+            self.wheel.add(f"job{i}", START + 100 + i)
+        for i in range(2000):
+            self.wheel.cancel(f"job{i}")
+        self.assertLess(len(self.wheel._overflow), 3000)
+        self.assertEqual(len(self.wheel), 1000)
+        self.assertEqual(len(self.wheel.expire(START + 5000)), 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
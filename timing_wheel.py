@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Hashed timing wheel scheduling core
+An alternative to one APScheduler job per post for very large queues: posts
+due within the wheel window sit in per-tick buckets, later ones wait in an
+overflow heap and cascade into the wheel as it turns. Arming and cancelling
+are O(1) (cancelled entries are dropped lazily) and each entry is a small
+slotted object, so tens of thousands of pending posts stay cheap
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from clock import Clock, SYSTEM_CLOCK
+
+
+class _Entry:
+    __slots__ = ('job_id', 'due', 'args', 'cancelled')
+
+    def __init__(self, job_id: str, due: float, args: tuple):
+        self.job_id = job_id
+        self.due = due
+        self.args = args
+        self.cancelled = False
+
+
+class TimingWheel:
+    """
+    Buckets of `tick` seconds covering the next `slots` ticks, plus an
+    overflow heap for anything further out. Not thread-safe on its own.
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 3600, now: Optional[float] = None):
+        self.tick = tick
+        self.slots = slots
+        self._buckets: List[List[_Entry]] = [[] for _ in range(slots)]
+        self._overflow: List[Tuple[float, int, _Entry]] = []
+        self._overflow_dead = 0
+        self._seq = itertools.count()
+        self._entries: Dict[str, _Entry] = {}
+        # Absolute index of the first tick not yet expired
+        self._current = int((time.time() if now is None else now) // tick)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._entries
+
+    def add(self, job_id: str, due: float, args: tuple = ()):
+        """Arm job_id to fire at epoch time due, replacing any earlier entry"""
+        self.cancel(job_id)
+        entry = _Entry(job_id, due, args)
+        self._entries[job_id] = entry
+        self._place(entry)
+
+    def cancel(self, job_id: str) -> bool:
+        entry = self._entries.pop(job_id, None)
+        if entry is None:
+            return False
+        entry.cancelled = True
+        if self._tick_of(entry) >= self._current + self.slots:
+            self._overflow_dead += 1
+            if self._overflow_dead > len(self._overflow) // 2 and self._overflow_dead > 1024:
+                self._compact_overflow()
+        return True
+
+    def expire(self, now: float) -> List[_Entry]:
+        """Remove and return every entry due before the tick containing now"""
+        target = int(now // self.tick)
+        due: List[_Entry] = []
+        if target - self._current >= self.slots:
+            # Fell behind by a whole turn (suspend, clock jump): drain everything once
+            for i in range(self.slots):
+                self._drain(i, due)
+            self._current = target
+        while self._current < target:
+            self._drain(self._current % self.slots, due)
+            self._current += 1
+            if self._overflow and self._overflow[0][0] < (self._current + self.slots) * self.tick:
+                self._cascade(due)
+        self._cascade(due)
+        return due
+
+    def next_due(self) -> Optional[_Entry]:
+        """Earliest live entry (scans at most one turn of the wheel)"""
+        for offset in range(self.slots):
+            live = [e for e in self._buckets[(self._current + offset) % self.slots] if not e.cancelled]
+            if live:
+                return min(live, key=lambda e: e.due)
+        while self._overflow and self._overflow[0][2].cancelled:
+            heapq.heappop(self._overflow)
+            self._overflow_dead -= 1
+        return self._overflow[0][2] if self._overflow else None
+
+    def entries(self):
+        return self._entries.values()
+
+    def _tick_of(self, entry: _Entry) -> int:
+        return max(int(entry.due // self.tick), self._current)
+
+    def _place(self, entry: _Entry):
+        tick = self._tick_of(entry)
+        if tick < self._current + self.slots:
+            self._buckets[tick % self.slots].append(entry)
+        else:
+            heapq.heappush(self._overflow, (entry.due, next(self._seq), entry))
+
+    def _drain(self, index: int, due: List[_Entry]):
+        bucket = self._buckets[index]
+        if not bucket:
+            return
+        self._buckets[index] = []
+        for entry in bucket:
+            if not entry.cancelled:
+                del self._entries[entry.job_id]
+                due.append(entry)
+
+    def _cascade(self, due: List[_Entry]):
+        """Move overflow entries that now fall inside the window into buckets"""
+        horizon = (self._current + self.slots) * self.tick
+        while self._overflow and self._overflow[0][0] < horizon:
+            entry = heapq.heappop(self._overflow)[2]
+            if entry.cancelled:
+                self._overflow_dead -= 1
+            elif int(entry.due // self.tick) < self._current:
+                del self._entries[entry.job_id]
+                due.append(entry)
+            else:
+                self._buckets[int(entry.due // self.tick) % self.slots].append(entry)
+
+    def _compact_overflow(self):
+        self._overflow = [item for item in self._overflow if not item[2].cancelled]
+        heapq.heapify(self._overflow)
+        self._overflow_dead = 0
+
+
+class WheelScheduler:
+    """
+    Drives a TimingWheel from a ticker thread and hands due entries to a
+    bounded thread pool, with the same misfire grace and one-run-per-id rules
+    the APScheduler core is configured with
+    """
+
+    def __init__(self, target: Callable, max_workers: int = 10, misfire_grace_time: float = 300,
+                 tick: float = 1.0, slots: int = 3600,
+                 on_submit: Optional[Callable[[str, float], None]] = None,
+                 on_missed: Optional[Callable[[str], None]] = None,
+                 on_busy: Optional[Callable[[str], None]] = None, clock: Clock = SYSTEM_CLOCK):
+        self.target = target
+        self.clock = clock
+        self.max_workers = max_workers
+        self.misfire_grace_time = misfire_grace_time
+        self.on_submit = on_submit
+        self.on_missed = on_missed
+        self.on_busy = on_busy
+        self._wheel = TimingWheel(tick=tick, slots=slots, now=clock.time())
+        self._lock = threading.Lock()
+        self._running_ids = set()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._executor = None
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def start(self, ticker: bool = True):
+        """
+        Start the worker pool and, unless ticker is False, the thread that
+        turns the wheel; without it the caller drives the wheel with run_due()
+        """
+        if self._executor is not None:
+            return
+        self._stopped.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='wheel-job')
+        if ticker:
+            self._thread = threading.Thread(target=self._run, name='timing-wheel', daemon=True)
+            self._thread.start()
+
+    def shutdown(self, wait: bool = True):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def add_job(self, job_id: str, run_date: datetime, args: tuple = ()):
+        with self._lock:
+            self._wheel.add(job_id, run_date.timestamp(), tuple(args))
+
+    def remove_job(self, job_id: str) -> bool:
+        with self._lock:
+            return self._wheel.cancel(job_id)
+
+    def has_job(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._wheel
+
+    def job_count(self) -> int:
+        with self._lock:
+            return len(self._wheel)
+
+    def next_job(self) -> Optional[Tuple[str, datetime]]:
+        with self._lock:
+            entry = self._wheel.next_due()
+            return (entry.job_id, datetime.fromtimestamp(entry.due)) if entry else None
+
+    def upcoming(self, limit: Optional[int] = None) -> List[Tuple[str, datetime]]:
+        """Armed jobs in fire order; limit keeps this O(n log limit)"""
+        with self._lock:
+            entries = list(self._wheel.entries())
+        if limit is None:
+            entries.sort(key=lambda e: e.due)
+        else:
+            entries = heapq.nsmallest(limit, entries, key=lambda e: e.due)
+        return [(entry.job_id, datetime.fromtimestamp(entry.due)) for entry in entries]
+
+    def run_due(self) -> int:
+        """Dispatch every entry due by the clock's current time; returns how many were due"""
+        now = self.clock.time()
+        with self._lock:
+            due = self._wheel.expire(now)
+        for entry in due:
+            self._dispatch(entry, now)
+        return len(due)
+
+    def _run(self):
+        while not self._stopped.wait(self._wheel.tick):
+            self.run_due()
+
+    def _dispatch(self, entry: _Entry, now: float):
+        lag = now - entry.due
+        if lag > self.misfire_grace_time:
+            if self.on_missed:
+                self.on_missed(entry.job_id)
+            return
+        with self._lock:
+            if entry.job_id in self._running_ids:
+                busy = True
+            else:
+                busy = False
+                self._running_ids.add(entry.job_id)
+        if busy:
+            if self.on_busy:
+                self.on_busy(entry.job_id)
+            return
+        if self.on_submit:
+            self.on_submit(entry.job_id, lag)
+        self._executor.submit(self._call, entry)
+
+    def _call(self, entry: _Entry):
+        try:
+            self.target(*entry.args)
+        except Exception as e:
+            print(f"[ERROR] Job {entry.job_id} raised: {e}")
+        finally:
+            with self._lock:
+                self._running_ids.discard(entry.job_id)
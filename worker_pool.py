@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Bounded worker pools for executing scheduled posts
+Keeps content generation and LinkedIn publishing on separately sized pools
+and tracks queue depth and firing lag for status reporting
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Optional
+
+
+class StageTimeout(Exception):
+    """Raised when a job stage does not finish before the job deadline"""
+
+
+class PostWorkerPool:
+    STAGES = ('generation', 'publish')
+
+    def __init__(self, generation_workers: int = 4, publish_workers: int = 2, job_timeout: float = 300):
+        self.job_timeout = job_timeout
+        self._executors = {
+            'generation': ThreadPoolExecutor(max_workers=generation_workers, thread_name_prefix='post-generation'),
+            'publish': ThreadPoolExecutor(max_workers=publish_workers, thread_name_prefix='post-publish'),
+        }
+        self._limits = {'generation': generation_workers, 'publish': publish_workers}
+        self._lock = threading.Lock()
+        self._stage_queued = {stage: 0 for stage in self.STAGES}
+        self._stage_active = {stage: 0 for stage in self.STAGES}
+        # Submission events can arrive after the job thread has already
+        # started, so waiting jobs are derived from two running totals.
+        self._jobs_submitted = 0
+        self._jobs_started = 0
+        self._jobs_running = 0
+        self._jobs_timed_out = 0
+        self._lag_samples = 0
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+        self._lag_last = 0.0
+
+    def job_deadline(self) -> float:
+        """Monotonic deadline for a job starting now"""
+        return time.monotonic() + self.job_timeout
+
+    def job_submitted(self, lag_seconds: Optional[float] = None):
+        """Record a job handed to the scheduler executor"""
+        with self._lock:
+            self._jobs_submitted += 1
+            if lag_seconds is not None:
+                lag_seconds = max(0.0, lag_seconds)
+                self._lag_samples += 1
+                self._lag_total += lag_seconds
+                self._lag_max = max(self._lag_max, lag_seconds)
+                self._lag_last = lag_seconds
+
+    def job_started(self):
+        """Record a job picked up by an executor thread"""
+        with self._lock:
+            self._jobs_started += 1
+            self._jobs_running += 1
+
+    def job_finished(self):
+        """Record a job that has left the executor"""
+        with self._lock:
+            self._jobs_running = max(0, self._jobs_running - 1)
+
+    def run_stage(self, stage: str, func, *args, deadline: Optional[float] = None, **kwargs):
+        """
+        Run func on the pool for the given stage and wait for the result
+
+        Args:
+            stage (str): 'generation' or 'publish'
+            deadline (float, optional): time.monotonic() deadline for the whole job
+
+        Raises:
+            StageTimeout: if the stage is still running when the deadline passes
+        """
+        with self._lock:
+            self._stage_queued[stage] += 1
+
+        def _tracked():
+            with self._lock:
+                self._stage_queued[stage] -= 1
+                self._stage_active[stage] += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._stage_active[stage] -= 1
+
+        future = self._executors[stage].submit(_tracked)
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # The worker thread cannot be interrupted; it keeps its slot until
+            # the underlying call returns, but the job itself gives up here.
+            if future.cancel():
+                with self._lock:
+                    self._stage_queued[stage] -= 1
+            with self._lock:
+                self._jobs_timed_out += 1
+            raise StageTimeout(f"{stage} stage exceeded the {self.job_timeout}s job deadline")
+
+    def snapshot(self) -> Dict:
+        """Return queue depth, active workers and lag figures"""
+        with self._lock:
+            avg_lag = self._lag_total / self._lag_samples if self._lag_samples else 0.0
+            return {
+                'jobs_waiting': max(0, self._jobs_submitted - self._jobs_started),
+                'jobs_running': self._jobs_running,
+                'jobs_timed_out': self._jobs_timed_out,
+                'stages': {
+                    stage: {
+                        'limit': self._limits[stage],
+                        'active': self._stage_active[stage],
+                        'queued': self._stage_queued[stage],
+                    }
+                    for stage in self.STAGES
+                },
+                'lag_last': self._lag_last,
+                'lag_avg': avg_lag,
+                'lag_max': self._lag_max,
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and optionally wait for running stages"""
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait)